@@ -2,9 +2,11 @@
 Route Health Check
 """
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.models.schemas import HealthResponse
 from app.config import get_settings
-import os
+from app.services.readiness import readiness
+from app.services.warmup import warmup
 
 router = APIRouter()
 settings = get_settings()
@@ -12,21 +14,41 @@ settings = get_settings()
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Vérifie l'état de santé de l'API et des services"""
-    
-    # Vérifier les API keys
-    serper_available = bool(os.getenv("SERPER_API_KEY"))
-    google_available = bool(os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"))
-    
+    """
+    Vérifie l'état de santé de l'API et des services.
+
+    Ne fait aucun appel externe : renvoie le dernier résultat des sondes
+    exécutées en arrière-plan, et la marge actuelle du limiteur LLM.
+    """
+    checks = readiness.snapshot()
     services_status = {
         "api": True,
-        "crewai": True,  # Toujours disponible si le code est présent
-        "serper": serper_available,
-        "google_ai": google_available
+        "crewai": warmup.ready,  # Flow et agents chargés (préchauffage terminé)
+        **{name: result["ok"] for name, result in checks.items()},
     }
-    
+
     return HealthResponse(
-        status="healthy" if all(services_status.values()) else "degraded",
+        status=readiness.status(),
         version=settings.app_version,
-        services=services_status
+        services=services_status,
+        checks=checks,
+        rate_limit=readiness.rate_limit(),
+    )
+
+
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Pour les load balancers : 200 si les sondes obligatoires (LLM, disque)
+    passent et que le flow est chargé, 503 sinon
+    """
+    ready = readiness.ready() and warmup.ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "status": readiness.status(),
+            "flow": warmup.stats(),
+            "rate_limit": readiness.rate_limit(),
+        },
     )
@@ -0,0 +1,38 @@
+"""
+Route Metrics (format texte Prometheus)
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from firstone.http_pool import http_pool_stats
+from firstone.model_routing import hedge_policy, model_health
+from firstone.metrics import registry
+from app.services.pdf_executor import pdf_executor
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose les compteurs et histogrammes en mémoire pour Prometheus"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/metrics/http")
+async def http_metrics():
+    """Statistiques du pool HTTP partagé : requêtes, connexions ouvertes et taux de réutilisation par hôte"""
+    return http_pool_stats() or {"started": False, "hosts": {}}
+
+
+@router.get("/metrics/llm")
+async def llm_metrics():
+    """Latence récente de chaque modèle et modèles évités (429 ou lenteur) avec le temps restant"""
+    return {"models": model_health.stats(), "hedging": hedge_policy.stats()}
+
+
+@router.get("/metrics/pdf")
+async def pdf_metrics():
+    """Exécuteur PDF : workers, tâches en attente ou en cours, terminées et refusées"""
+    return pdf_executor.stats()
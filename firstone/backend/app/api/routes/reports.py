@@ -0,0 +1,133 @@
+"""
+Routes de téléchargement des rapports (ETag, Range et gzip)
+"""
+from fastapi import APIRouter, HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Tuple
+import gzip
+
+from app.config import get_settings
+from app.services.report_store import report_store
+
+router = APIRouter()
+settings = get_settings()
+
+# En dessous de cette taille, la compression gzip n'apporte rien
+GZIP_MIN_SIZE = 1024
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """Compare un en-tête If-None-Match / If-Range avec l'ETag courant"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Analyse un en-tête Range à intervalle unique (bytes=a-b, bytes=a-, bytes=-n)
+
+    Returns:
+        (start, end) inclusifs, ou None si l'intervalle n'est pas satisfiable
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str == "":
+            # Suffixe: les n derniers octets
+            length = int(end_str)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+@router.get("/{run_id}")
+async def list_reports(run_id: str):
+    """Liste les artefacts d'un run"""
+    try:
+        artifacts = report_store.list_artifacts(run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not artifacts:
+        raise HTTPException(status_code=404, detail=f"Aucun rapport pour le run '{run_id}'")
+
+    return {
+        "run_id": run_id,
+        "artifacts": [
+            {
+                "name": artifact.name,
+                "size": artifact.size,
+                "digest": artifact.digest,
+                "content_type": artifact.content_type,
+                "created_at": artifact.created_at,
+                "url": f"{settings.api_prefix}/reports/{run_id}/{artifact.name}"
+            }
+            for artifact in artifacts
+        ]
+    }
+
+
+@router.get("/{run_id}/{name}")
+async def download_report(run_id: str, name: str, request: Request):
+    """
+    Télécharge un artefact d'un run
+
+    Supporte If-None-Match (304), Range/If-Range (206) et Accept-Encoding: gzip.
+    """
+    try:
+        artifact = report_store.stat(run_id, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Rapport '{name}' non trouvé pour le run '{run_id}'")
+
+    etag = f'"{artifact.digest}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, must-revalidate",
+        "Content-Disposition": f'inline; filename="{artifact.name}"',
+        "Vary": "Accept-Encoding",
+    }
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    content = await run_in_threadpool(report_store.get, run_id, name)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or _etag_matches(if_range, etag)):
+        byte_range = _parse_range(range_header, len(content))
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{len(content)}"
+            return Response(status_code=416, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+        return Response(
+            content=content[start:end + 1],
+            status_code=206,
+            media_type=artifact.content_type,
+            headers=headers
+        )
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if "gzip" in accept_encoding.lower() and len(content) >= GZIP_MIN_SIZE:
+        content = await run_in_threadpool(gzip.compress, content, 6)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(content=content, media_type=artifact.content_type, headers=headers)
+
@@ -2,20 +2,16 @@
 Routes de recherche avec WebSocket progress tracking
 """
 from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, TYPE_CHECKING
+import asyncio
 import uuid
-from datetime import datetime
 import time
-import asyncio
 from threading import Thread
 from pathlib import Path
 import shutil
 
 
-from pydantic import BaseModel
-from crewai.flow.flow import Flow, listen, start
-from crewai.flow.flow import router as flow_router
-
+from app.config import get_settings
 from app.models.schemas import (
     ResearchRequest,
     ResearchResponse,
@@ -23,449 +19,73 @@ from app.models.schemas import (
     ResearchStatus
 )
 from app.websocket_manager import manager
-from firstone.crew import Firstone
+from app.services.report_store import report_store
+from app.services.result_cache import lookup_cached_result, result_cache
+from app.services.single_flight import InFlightRun, single_flight
+from app.services.research_jobs import DONE, EXTRACTING, RESEARCHING, ResearchJob, research_jobs
+from app.services.pdf_executor import PdfExecutorBusy, pdf_executor
+from app.services.warmup import warmup
+from firstone import budget
+from firstone.pdf_text import extract_pdf_text, pdf_summary, record_extraction
+from firstone.result_cache import CacheHit, file_digest, normalize_topic
+from firstone.tracing import tracer
+
+if TYPE_CHECKING:
+    from app.services.research_flow import ResearchFlowState
 
 router = APIRouter()
+settings = get_settings()
 
+# Tâches des jobs /send-with-pdfs en cours
+_jobs_tasks: set = set()
 
 
 # Create uploads directory
 UPLOAD_DIR = Path("uploads/pdfs")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-class ResearchFlowState(BaseModel):
-    """State model for the research flow"""
-    topic: str = ""
-    current_year: str = ""
-    research_result: str = ""
-    feedback: Optional[str] = None
-    valid: bool = False
-    retry_count: int = 0
-    pdf_paths: List[str] = []  # List of PDF file paths to analyze
-    pdf_content: str = ""  # Ext
-
-
-class ResearchFlow(Flow[ResearchFlowState]):
-    """Flow for iterative research-review-synthesis workflow with WebSocket progress"""
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.ws_manager = manager  # Reference to global WebSocket manager
-
-    def send_ws_update(self, agent: str, status: str, message: str = "", 
-                       details: Dict = None, iteration: int = None):
-        """Synchronous wrapper to send WebSocket updates from sync flow"""
-        try:
-            # Create new event loop for this thread if needed
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            # Run the async broadcast in the loop
-            if loop.is_running():
-                # If loop is already running, create task
-                asyncio.create_task(
-                    self.ws_manager.broadcast(agent, status, message, details, iteration)
-                )
-            else:
-                # If loop is not running, run until complete
-                loop.run_until_complete(
-                    self.ws_manager.broadcast(agent, status, message, details, iteration)
-                )
-        except Exception as e:
-            print(f"⚠️ WebSocket update failed: {e}")
-
-    @start("retry")
-    def generate_research(self):
-        """Generate research with researcher agent"""
-        iteration = self.state.retry_count + 1
-        
-        # Notify research start
-        self.send_ws_update(
-            agent="Researcher",
-            status="thinking" if iteration == 1 else "retry",
-            message=f"Starting research iteration {iteration}...",
-            iteration=iteration
-        )
-        
-        print(f"\n{'='*80}")
-        print(f"📚 ITERATION {iteration} - Running Research Task")
-        print(f"{'='*80}\n")
-        
-        # Delay between retries
-        if self.state.retry_count > 0:
-            delay = 10
-            self.send_ws_update(
-                agent="Researcher",
-                status="thinking",
-                message=f"Waiting {delay}s before retry (API rate limit)...",
-                iteration=iteration
-            )
-            print(f"⏱️  Waiting {delay} seconds before retry...")
-            time.sleep(delay)
-        
-        # Prepare inputs
-        inputs = {
-            "topic": self.state.topic,
-            "current_year": self.state.current_year
-        }
-
-        # Add PDF content if available
-        if self.state.pdf_content:
-            inputs["uploaded_pdfs"] = f"""
-📚 UPLOADED PDF DOCUMENTS (USE AS PRIMARY SOURCES):
-
-{self.state.pdf_content}
-
-IMPORTANT INSTRUCTIONS FOR USING UPLOADED PDFs:
-- These PDFs are the PRIMARY sources for your research
-- Extract key findings, methodologies, and citations from these documents
-- Reference these documents prominently in your research
-- Supplement with additional papers from ArXiv/Web only if necessary
-- Make sure to cite the uploaded PDFs in your report
-"""
-            print(f"\n📄 Using {len(self.state.pdf_paths)} uploaded PDF(s) as primary sources")
-        
-        
-        if self.state.feedback:
-            self.send_ws_update(
-                agent="Researcher",
-                status="working",
-                message=f"Addressing reviewer feedback (attempt {iteration}/3)...",
-                iteration=iteration
-            )
-            inputs["feedback"] = f"""
-PREVIOUS ATTEMPT WAS REJECTED (Attempt {self.state.retry_count}).
-
-REVIEWER FEEDBACK:
-{self.state.feedback}
 
-FOCUS ON IMPROVEMENTS:
-- Address specific issues from feedback
-- Ensure 5-7 high-quality papers
-- Provide clear explanations (50+ words each)
-- Use credible sources (ArXiv, peer-reviewed)
+def save_upload(source, path: Path) -> None:
+    """Copie un fichier uploadé sur le disque (bloquant : exécuté par l'exécuteur PDF)"""
+    with path.open("wb") as buffer:
+        shutil.copyfileobj(source, buffer)
 
-This is attempt {iteration} of 3. Make it count!
-"""
-        else:
-            self.send_ws_update(
-                agent="Researcher",
-                status="working",
-                message="Gathering information from web and ArXiv papers...",
-                iteration=iteration
-            )
-        
-        # Create research crew
-        from crewai import Crew, Process
-        research_crew = Crew(
-            agents=[Firstone().researcher()],
-            tasks=[Firstone().research_task()],
-            process=Process.sequential,
-            verbose=True,
-            memory=False,
-            cache=True,
-            max_rpm=10,
-        )
-        
-        try:
-            result = research_crew.kickoff(inputs=inputs)
-            print("\n📄 Research result received")
-            self.state.research_result = result.raw
-            
-            # Notify research completion
-            self.send_ws_update(
-                agent="Researcher",
-                status="done",
-                message=f"Research completed ({len(result.raw)} chars)",
-                iteration=iteration,
-                details={"output_length": len(result.raw)}
-            )
-            
-        except Exception as e:
-            if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
-                self.send_ws_update(
-                    agent="Researcher",
-                    status="retry",
-                    message="API quota exceeded, waiting 60s...",
-                    iteration=iteration
-                )
-                print(f"\n⚠️  API Quota Exceeded. Waiting 60 seconds...")
-                time.sleep(60)
-                result = research_crew.kickoff(inputs=inputs)
-                self.state.research_result = result.raw
-            else:
-                self.send_ws_update(
-                    agent="Researcher",
-                    status="error",
-                    message=f"Error: {str(e)}",
-                    iteration=iteration
-                )
-                raise e
-
-    @flow_router(generate_research)
-    def evaluate_research(self):
-        """Evaluate research with reviewer agent"""
-        iteration = self.state.retry_count + 1
-        
-        # Notify review start
-        self.send_ws_update(
-            agent="Reviewer",
-            status="thinking",
-            message=f"Evaluating research quality (attempt {iteration})...",
-            iteration=iteration
-        )
-        
-        print(f"\n{'='*80}")
-        print(f"🔍 EVALUATING RESEARCH (Attempt {iteration})")
-        print(f"{'='*80}\n")
-        
-        # Check max retry
-        if self.state.retry_count >= 3:
-            self.send_ws_update(
-                agent="Reviewer",
-                status="error",
-                message="Maximum retry limit reached (3 attempts)",
-                iteration=iteration
-            )
-            print("\n⚠️  Maximum retry count reached")
-            return "max_retry_exceeded"
-        
-        self.send_ws_update(
-            agent="Reviewer",
-            status="working",
-            message="Analyzing research papers and validating quality...",
-            iteration=iteration
-        )
-        
-        # Create review crew
-        from crewai import Crew, Process, Task
-        
-        review_task = Task(
-            description=f"""
-Review and critically evaluate this research report about {self.state.topic}:
 
-{self.state.research_result}
+def coalescing_key(endpoint: str, topic: str, pdf_hashes: List[str] = ()) -> Optional[str]:
+    """
+    Clé de coalescence du run ; None (pas de coalescence) si le sujet normalisé est vide
 
-Follow the balanced quality criteria defined in your task configuration.
-""",
-            expected_output=Firstone().tasks_config['review_task']['expected_output'],
-            agent=Firstone().reviewer(),
-            output_pydantic=Firstone.ResearchVerification if hasattr(Firstone, 'ResearchVerification') else None
-        )
-        
-        review_crew = Crew(
-            agents=[Firstone().reviewer()],
-            tasks=[review_task],
-            process=Process.sequential,
-            verbose=True,
-        )
-        
-        result = review_crew.kickoff(inputs={"topic": self.state.topic})
-        
-        # Extract validation
-        if hasattr(result, 'pydantic') and result.pydantic:
-            self.state.valid = result.pydantic.valid
-            self.state.feedback = result.pydantic.feedback
-        else:
-            # Fallback parsing
-            import json
-            try:
-                raw_output = str(result.raw)
-                if '{' in raw_output and '}' in raw_output:
-                    start = raw_output.index('{')
-                    end = raw_output.rindex('}') + 1
-                    json_str = raw_output[start:end]
-                    review_data = json.loads(json_str)
-                    self.state.valid = review_data.get('approved', review_data.get('valid', False))
-                    
-                    if not self.state.valid:
-                        rejection_reasons = review_data.get('rejection_reasons', [])
-                        if rejection_reasons:
-                            self.state.feedback = "\n".join(f"- {reason}" for reason in rejection_reasons)
-                        else:
-                            self.state.feedback = review_data.get('feedback', 'Did not meet quality standards')
-                    else:
-                        self.state.feedback = None
-            except Exception as e:
-                print(f"⚠️  Could not parse review output: {e}")
-                self.state.valid = False
-                self.state.feedback = "Review parsing failed"
-        
-        self.state.retry_count += 1
-        
-        if self.state.valid:
-            self.send_ws_update(
-                agent="Reviewer",
-                status="done",
-                message="✓ Research approved! Proceeding to synthesis...",
-                iteration=iteration,
-                details={"approved": True}
-            )
-            print("\n✅ Research APPROVED")
-            return "approved"
-        
-        self.send_ws_update(
-            agent="Reviewer",
-            status="retry",
-            message=f"✗ Research rejected. Retry {self.state.retry_count}/3",
-            iteration=iteration,
-            details={
-                "approved": False,
-                "feedback": self.state.feedback[:200] if self.state.feedback else ""
-            }
-        )
-        print(f"\n❌ Research REJECTED - Retry {self.state.retry_count}/3")
-        return "retry"
-
-    @listen("approved")
-    def synthesize_result(self):
-        """Generate final synthesis report"""
-        self.send_ws_update(
-            agent="Synthesizer",
-            status="thinking",
-            message="Starting synthesis report generation...",
-            details={"iterations_required": self.state.retry_count}
-        )
-        
-        print(f"\n{'='*80}")
-        print(f"📊 GENERATING SYNTHESIS REPORT")
-        print(f"{'='*80}\n")
-        
-        self.send_ws_update(
-            agent="Synthesizer",
-            status="working",
-            message="Analyzing patterns and synthesizing findings...",
-        )
-        
-        # Create synthesis crew
-        from crewai import Crew, Process, Task
-        
-        synthesis_task = Task(
-            description=f"""
-Create a comprehensive synthesis report on {self.state.topic} using the approved research papers below.
-
-APPROVED RESEARCH PAPERS:
-{self.state.research_result}
-
-REVIEW STATUS: APPROVED after {self.state.retry_count} iteration(s)
-
-Your tasks:
-1. Extract key themes and patterns across papers
-2. Identify consensus and disagreement areas
-3. Synthesize insights into cohesive narrative
-4. Provide actionable recommendations
-
-Include: Executive Summary, Introduction, Main Findings, Analysis, Conclusions, References
-""",
-            expected_output="""Comprehensive markdown synthesis report (2000-4000 words) without code blocks.""",
-            agent=Firstone().synthesizer(),
-            output_file='output/synthesis_report.md'
-        )
-        
-        synthesis_crew = Crew(
-            agents=[Firstone().synthesizer()],
-            tasks=[synthesis_task],
-            process=Process.sequential,
-            verbose=True,
-        )
-        
-        synthesis_inputs = {
-            "topic": self.state.topic,
-            "current_year": self.state.current_year,
+    L'endpoint en fait partie : un run /send n'a pas de job, une requête
+    /send-with-pdfs (même sans PDF) ne doit donc pas s'y attacher.
+    """
+    if not normalize_topic(topic):
+        return None
+    return f"{endpoint}:{result_cache.key(topic, pdf_hashes)}"
+
+
+async def cached_response(topic: str, hit: CacheHit) -> ResearchResponse:
+    """Serve a completed result from the cache, notifying WebSocket clients as a normal run would"""
+    match = "exact" if hit.exact else f"similar topic '{hit.topic}' ({hit.similarity:.0%})"
+    await manager.broadcast(
+        agent="System",
+        status="completed",
+        message=f"✓ Result served from cache ({match})",
+        run_id=hit.run_id,
+        details={
+            "run_id": hit.run_id,
+            "cached": True,
+            "final_report": hit.report
         }
-        
-        result = synthesis_crew.kickoff(inputs=synthesis_inputs)
-        
-        # Lire le rapport généré
-        report_content = ""
-        try:
-            with open("output/synthesis_report.md", "r", encoding="utf-8") as f:
-                report_content = f.read()
-        except Exception as e:
-            print(f"⚠️ Could not read synthesis report: {e}")
-            report_content = str(result.raw) if result else "Report generation failed"
-        
-        self.send_ws_update(
-            agent="Synthesizer",
-            status="done",
-            message=f"✓ Synthesis complete! Report saved to output/synthesis_report.md",
-            details={
-                "total_iterations": self.state.retry_count,
-                "output_file": "output/synthesis_report.md",
-                "report_content": report_content
-            }
-        )
-        
-        # Notify overall completion with report
-        self.send_ws_update(
-            agent="System",
-            status="completed",
-            message=f"✓ All tasks completed successfully after {self.state.retry_count} iteration(s)!",
-            details={
-                "total_iterations": self.state.retry_count,
-                "final_report": report_content
-            }
-        )
-        
-        print(f"\n{'='*80}")
-        print(f"✅ SYNTHESIS COMPLETE")
-        print(f"Total iterations: {self.state.retry_count}")
-        print(f"{'='*80}\n")
-
-    @listen("max_retry_exceeded")
-    def max_retry_exceeded_exit(self):
-        """Handle max retry exceeded"""
-        self.send_ws_update(
-            agent="System",
-            status="error",
-            message=f"✗ Research failed after 3 attempts. Last feedback: {self.state.feedback[:100] if self.state.feedback else ''}...",
-            details={
-                "total_attempts": self.state.retry_count,
-                "last_feedback": self.state.feedback
-            }
-        )
-        
-        print(f"\n{'='*80}")
-        print(f"❌ RESEARCH FAILED - MAX RETRIES EXCEEDED")
-        print(f"{'='*80}\n")
-        
-        # Save failed research
-        with open("output/failed_research.md", "w") as file:
-            file.write(f"# Failed Research Report\n\n")
-            file.write(f"**Topic:** {self.state.topic}\n\n")
-            file.write(f"**Attempts:** {self.state.retry_count}\n\n")
-            file.write(f"## Last Research Output\n\n{self.state.research_result}\n\n")
-            file.write(f"## Last Reviewer Feedback\n\n{self.state.feedback}\n")
-
-
-def run_flow_sync(topic: str):
-    """Synchronous wrapper to run the flow"""
-    try:
-        # Send initial update
-        asyncio.run(manager.broadcast(
-            agent="System",
-            status="started",
-            message=f"Starting research flow for: {topic}"
-        ))
-        
-        # Initialize and run flow
-        research_flow = ResearchFlow()
-        research_flow.state.topic = topic
-        research_flow.state.current_year = str(datetime.now().year)
-        
-        # Run flow synchronously (CrewAI flows are sync)
-        research_flow.kickoff()
-        
-    except Exception as e:
-        asyncio.run(manager.broadcast(
-            agent="System",
-            status="error",
-            message=f"Flow execution error: {str(e)}"
-        ))
-        raise
+    )
+    return ResearchResponse(
+        status=ResearchStatus.COMPLETED,
+        topic=topic,
+        result=hit.report,
+        run_id=hit.run_id,
+        cached=True,
+        message=f"Résultat en cache pour '{topic}' ({match}, il y a {hit.age_seconds / 3600:.1f} h). "
+                f"Utilisez force_refresh pour relancer la recherche."
+    )
 
 
 @router.post("/send", response_model=ResearchResponse)
@@ -478,9 +98,33 @@ async def create_research(
     """
     topic = request.topic
     
+    # Serve identical or near-identical completed topics from the cache
+    hit = lookup_cached_result(topic, force_refresh=request.force_refresh)
+    if hit:
+        return await cached_response(topic, hit)
+    
+    # Attach to an identical run already in progress instead of starting a new one
+    run, leader = single_flight.join_or_start(coalescing_key("send", topic), str(uuid.uuid4()), topic)
+    if not leader:
+        return ResearchResponse(
+            status=ResearchStatus.RUNNING,
+            topic=topic,
+            result="",
+            run_id=run.run_id,
+            coalesced=True,
+            message=f"Identical research already running for '{run.topic}'. Progress events carry run_id {run.run_id}."
+        )
+    
     # Use a separate thread for the synchronous flow
     def run_in_thread():
-        run_flow_sync(topic)
+        try:
+            warmup.join()
+            from app.services.research_flow import run_flow_sync
+            state = run_flow_sync(topic, run_id=run.run_id, token_budget=request.token_budget)
+        except BaseException as e:
+            single_flight.finish(run.key, error=e)
+            raise
+        single_flight.finish(run.key, result=state)
     
     # Add thread execution to background tasks
     background_tasks.add_task(lambda: Thread(target=run_in_thread).start())
@@ -489,6 +133,7 @@ async def create_research(
         status=ResearchStatus.PENDING,
         topic=topic,
         result="",
+        run_id=run.run_id,
         message=f"Research started for '{topic}'. Connect to ws://localhost:8000/api/ws/progress for real-time updates."
     )
 
@@ -524,29 +169,26 @@ async def upload_pdf(
         file_extension = Path(file.filename).suffix
         file_path = UPLOAD_DIR / f"{file_id}{file_extension}"
         
-        # Save uploaded file
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save uploaded file (blocking I/O, off the event loop)
+        await pdf_executor.run("save", save_upload, file.file, file_path, cpu=False)
         
-        # Extract basic info from PDF
+        # Extract basic info from PDF (parsed in a worker process)
         page_count = 0
         extracted_topic = topic
         
         try:
-            import PyPDF2
-            with open(file_path, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                page_count = len(pdf_reader.pages)
-                
-                # Extract first page text for topic detection if not provided
-                if not extracted_topic and page_count > 0:
-                    first_page = pdf_reader.pages[0].extract_text()
-                    # Simple topic extraction (first 100 chars)
-                    if first_page:
-                        extracted_topic = first_page[:100].strip().replace('\n', ' ')
-                    else:
-                        extracted_topic = file.filename.replace('.pdf', '')
-        except:
+            page_count, first_page = await pdf_executor.run("summary", pdf_summary, str(file_path))
+            
+            # Extract first page text for topic detection if not provided
+            if not extracted_topic and page_count > 0:
+                # Simple topic extraction (first 100 chars)
+                if first_page:
+                    extracted_topic = first_page[:100].strip().replace('\n', ' ')
+                else:
+                    extracted_topic = file.filename.replace('.pdf', '')
+        except PdfExecutorBusy:
+            raise
+        except Exception:
             if not extracted_topic:
                 extracted_topic = file.filename.replace('.pdf', '')
         
@@ -560,6 +202,13 @@ async def upload_pdf(
             "page_count": page_count
         }
         
+    except HTTPException:
+        raise
+    except PdfExecutorBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Trop de PDF en cours de traitement, réessayez dans quelques secondes"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -567,20 +216,191 @@ async def upload_pdf(
         )
 
 
+def flow_response(topic: str, state: "ResearchFlowState", pdf_count: int = 0,
+                  coalesced: bool = False) -> ResearchResponse:
+    """Build the API response from a finished flow state"""
+    from app.services.research_flow import run_usage
+    if state.valid:
+        # Research was approved and synthesis completed
+        # Read the synthesis report from this run's namespace
+        try:
+            result = report_store.read_text(state.id, "synthesis_report.md")
+        except KeyError:
+            result = state.research_result
+        
+        pdf_info = f" avec {pdf_count} PDF(s)" if pdf_count else ""
+        short_info = " (synthèse courte : budget de tokens presque épuisé)" \
+            if state.budget_action == budget.SHORT_SYNTHESIS else ""
+        
+        return ResearchResponse(
+            status=ResearchStatus.COMPLETED,
+            topic=topic,
+            result=result,
+            run_id=state.id,
+            coalesced=coalesced,
+            usage=run_usage(state.id),
+            budget_action=state.budget_action,
+            message=f"Recherche '{topic}'{pdf_info} terminée avec succès après {state.retry_count} itération(s){short_info}"
+        )
+    
+    # Research failed after max retries (or stopped by the token budget)
+    reason = "budget de tokens épuisé, arrêt" if state.budget_action == budget.SKIP_RETRY else "échouée"
+    return ResearchResponse(
+        status=ResearchStatus.FAILED,
+        topic=topic,
+        run_id=state.id,
+        coalesced=coalesced,
+        usage=run_usage(state.id),
+        budget_action=state.budget_action,
+        result=f"Research failed after {state.retry_count} attempts.\n\nLast feedback:\n{state.feedback}",
+        message=f"Recherche '{topic}' {reason} après {state.retry_count} tentative(s)"
+    )
+
+
+async def extract_pdf(job: ResearchJob, pdf_path: str, digest: str, index: int, total: int) -> str:
+    """Extrait un PDF dans l'exécuteur PDF, avec ses événements de progression"""
+    name = Path(pdf_path).name
+    details = {"file": name, "index": index, "total": total, "stage": "pdf_extraction"}
+    job.update_file(name, status="extracting")
+    await manager.broadcast(
+        agent="System",
+        status="working",
+        message=f"Extracting {name} ({index}/{total})...",
+        run_id=job.job_id,
+        details=details
+    )
+    
+    started = time.perf_counter()
+    try:
+        content, stats = await pdf_executor.run(
+            "extract", extract_pdf_text, pdf_path, 20,  # Limit to 20 pages per PDF
+            settings.pdf_normalize, settings.pdf_drop_references, digest,
+        )
+    except Exception as e:
+        job.update_file(name, status="error", error=str(e))
+        await manager.broadcast(
+            agent="System",
+            status="error",
+            message=f"Extraction of {name} failed: {e}",
+            run_id=job.job_id,
+            details=details
+        )
+        raise
+    duration = time.perf_counter() - started
+    
+    # Backend d'extraction choisi et gain du nettoyage (en-têtes, césures, espaces...) sur ce document
+    record_extraction(stats)
+    extraction = stats.to_dict() if stats else None
+    saved = f", {stats.backend}, -{stats.token_reduction:.1%} tokens after cleanup" if stats else ""
+    if stats:
+        print(f"  🧹 {name} ({stats.backend}, {stats.backend_source}) : {stats.chars_before} → "
+              f"{stats.chars_after} caractères, ~{stats.tokens_before} → ~{stats.tokens_after} tokens")
+    
+    job.update_file(name, status="done", chars=len(content), duration_s=round(duration, 3),
+                    extraction=extraction)
+    await manager.broadcast(
+        agent="System",
+        status="done",
+        message=f"✓ {name} extracted ({index}/{total}, {len(content)} chars in {duration:.1f}s{saved})",
+        run_id=job.job_id,
+        details={**details, "chars": len(content), "duration_s": round(duration, 3), "extraction": extraction}
+    )
+    return f"\n{'='*80}\nFichier: {name}\n{'='*80}\n{content}"
+
+
+def job_error_message(error: BaseException) -> str:
+    """Message d'erreur d'un job, dans les termes des réponses HTTP de l'endpoint"""
+    error_msg = str(error)
+    if isinstance(error, PdfExecutorBusy):
+        return "Trop de PDF en cours de traitement, réessayez dans quelques secondes"
+    if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
+        return "API quota dépassé. Veuillez réessayer dans 1-2 minutes."
+    return f"Erreur lors de l'exécution de la recherche: {error_msg}"
+
+
+def finish_pdf_job(job: ResearchJob, run: InFlightRun, pdf_count: int,
+                   state: Optional["ResearchFlowState"] = None,
+                   error: Optional[BaseException] = None) -> None:
+    """Enregistre la réponse (ou l'erreur) du job et libère sa clé single-flight"""
+    if error is None:
+        job.finish(response=flow_response(job.topic, state, pdf_count).model_dump(mode="json"))
+    else:
+        job.finish(error=job_error_message(error))
+    single_flight.finish(run.key, result=state, error=error)
+
+
+def run_pdf_flow(job: ResearchJob, run: InFlightRun, pdf_paths: List[str], pdf_hashes: List[str],
+                 pdf_content: str, token_budget: Optional[int]) -> None:
+    """Exécute le flow de recherche (synchrone) dans un thread dédié"""
+    from app.services.research_flow import run_flow_sync
+    try:
+        state = run_flow_sync(
+            job.topic,
+            run_id=run.run_id,
+            pdf_hashes=pdf_hashes,
+            token_budget=token_budget,
+            pdf_paths=pdf_paths,
+            pdf_content=pdf_content,
+        )
+    except BaseException as e:
+        finish_pdf_job(job, run, len(pdf_paths), error=e)
+        raise
+    finish_pdf_job(job, run, len(pdf_paths), state=state)
+
+
+async def run_pdf_job(job: ResearchJob, run: InFlightRun, pdf_paths: List[str], pdf_hashes: List[str],
+                      token_budget: Optional[int]) -> None:
+    """
+    Job de /send-with-pdfs : extraction des PDFs en parallèle, puis flow
+    dans un thread dès que tous les fichiers sont prêts
+    """
+    try:
+        job.set_stage(EXTRACTING)
+        if pdf_paths:
+            print(f"\n📚 Extraction du contenu de {len(pdf_paths)} PDF(s) en parallèle...")
+        pdf_contents = await asyncio.gather(*(
+            extract_pdf(job, pdf_path, digest, index, len(pdf_paths))
+            for index, (pdf_path, digest) in enumerate(zip(pdf_paths, pdf_hashes), start=1)
+        ))
+        if pdf_paths:
+            print(f"✅ Contenu extrait de {len(pdf_paths)} PDF(s)")
+        await warmup.wait()
+    except BaseException as e:
+        finish_pdf_job(job, run, len(pdf_paths), error=e)
+        if not isinstance(e, Exception):
+            raise
+        return
+    
+    job.set_stage(RESEARCHING)
+    Thread(
+        target=run_pdf_flow,
+        args=(job, run, pdf_paths, pdf_hashes, "\n\n".join(pdf_contents), token_budget),
+        name=f"research-{run.run_id[:8]}",
+    ).start()
+
+
 @router.post("/send-with-pdfs", response_model=ResearchResponse)
 async def send_research_with_pdfs(
     topic: str,
-    file_ids: Optional[List[str]] = None
+    file_ids: Optional[List[str]] = None,
+    force_refresh: bool = False,
+    token_budget: Optional[int] = None
 ):
     """
     Send a research request with optional PDF files as context.
     
+    Returns at once with the job ID (run_id); the PDFs are extracted in
+    parallel and the flow runs in the background. Follow the job with
+    GET /jobs/{run_id} or the WebSocket progress events.
+    
     Args:
         topic: Research topic
         file_ids: List of file IDs from previous uploads
+        force_refresh: Ignore cached results and run the research again
+        token_budget: Token budget for this run (default: settings.run_token_budget, 0 for none)
         
     Returns:
-        Research response
+        Research response (pending, or completed when served from the cache)
     """
     try:
         # Prepare PDF paths if provided
@@ -596,79 +416,97 @@ async def send_research_with_pdfs(
                         detail=f"PDF avec file_id {file_id} non trouvé"
                     )
         
-        # Create and initialize the research flow
-        research_flow = ResearchFlow()
-        research_flow.state.topic = topic
-        research_flow.state.current_year = str(datetime.now().year)
-        research_flow.state.pdf_paths = pdf_paths
-        
-        # Extract PDF content if provided
-        if pdf_paths:
-            print(f"\n📚 Extraction du contenu de {len(pdf_paths)} PDF(s)...")
-            from firstone.tools.pdf_reader_tool import PDFReaderTool
-            pdf_tool = PDFReaderTool()
-            
-            pdf_contents = []
-            for pdf_path in pdf_paths:
-                print(f"  - Extraction de {Path(pdf_path).name}...")
-                content = pdf_tool._run(pdf_path=pdf_path, max_pages=20)  # Limit to 20 pages per PDF
-                pdf_contents.append(f"\n{'='*80}\nFichier: {Path(pdf_path).name}\n{'='*80}\n{content}")
-            
-            research_flow.state.pdf_content = "\n\n".join(pdf_contents)
-            print(f"✅ Contenu extrait de {len(pdf_paths)} PDF(s)")
-        
-        # Kickoff the flow asynchronously
-        await research_flow.kickoff_async()
-        
-        # Get the final result from the state
-        if research_flow.state.valid:
-            # Research was approved and synthesis completed
-            # Read the synthesis report from file
-            try:
-                with open("output/synthesis_report.md", "r") as f:
-                    result = f.read()
-            except FileNotFoundError:
-                result = research_flow.state.research_result
-            
-            pdf_info = f" avec {len(pdf_paths)} PDF(s)" if pdf_paths else ""
-            
-            return ResearchResponse(
-                status=ResearchStatus.COMPLETED,
-                topic=topic,
-                result=result,
-                message=f"Recherche '{topic}'{pdf_info} terminée avec succès après {research_flow.state.retry_count} itération(s)"
-            )
-        else:
-            # Research failed after max retries
+        # Refuse now rather than fail the job later if the PDF executor is full
+        if len(pdf_paths) > pdf_executor.headroom():
+            raise PdfExecutorBusy(f"{len(pdf_paths)} PDF(s) for {pdf_executor.headroom()} free slot(s)")
+        
+        # Serve identical or near-identical completed topics (same PDFs) from the cache
+        pdf_hashes = list(await asyncio.gather(*(
+            pdf_executor.run("hash", file_digest, pdf_path, cpu=False) for pdf_path in pdf_paths
+        )))
+        hit = lookup_cached_result(topic, pdf_hashes, force_refresh=force_refresh)
+        if hit:
+            return await cached_response(topic, hit)
+        
+        # Attach to an identical run already in progress instead of starting a new one
+        run, leader = single_flight.join_or_start(
+            coalescing_key("send-with-pdfs", topic, pdf_hashes), str(uuid.uuid4()), topic
+        )
+        if not leader:
+            print(f"🔗 Requête attachée au run en cours {run.run_id}")
             return ResearchResponse(
-                status=ResearchStatus.FAILED,
+                status=ResearchStatus.RUNNING,
                 topic=topic,
-                result=f"Research failed after {research_flow.state.retry_count} attempts.\n\nLast feedback:\n{research_flow.state.feedback}",
-                message=f"Recherche '{topic}' échouée après {research_flow.state.retry_count} tentatives"
+                result="",
+                run_id=run.run_id,
+                coalesced=True,
+                message=f"Identical research already running for '{run.topic}'. "
+                        f"Follow job {run.run_id} at GET /api/v1/research/jobs/{run.run_id}."
             )
+        
+        job = research_jobs.create(run.run_id, topic, [Path(pdf_path).name for pdf_path in pdf_paths])
+        task = asyncio.create_task(run_pdf_job(job, run, pdf_paths, pdf_hashes, token_budget))
+        # Garder une référence : la boucle ne conserve que des références faibles aux tâches
+        _jobs_tasks.add(task)
+        task.add_done_callback(_jobs_tasks.discard)
+        
+        return ResearchResponse(
+            status=ResearchStatus.PENDING,
+            topic=topic,
+            result="",
+            run_id=run.run_id,
+            message=f"Research with {len(pdf_paths)} PDF(s) started for '{topic}'. "
+                    f"Follow job {run.run_id} at GET /api/v1/research/jobs/{run.run_id} "
+                    f"or ws://localhost:8000/api/ws/progress."
+        )
     
+    except HTTPException:
+        raise
+    except PdfExecutorBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Trop de PDF en cours de traitement, réessayez dans quelques secondes"
+        )
     except Exception as e:
-        error_msg = str(e)
-        
-        if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
-            return ResearchResponse(
-                status=ResearchStatus.FAILED,
-                topic=topic,
-                result="",
-                message="API quota dépassé. Veuillez réessayer dans 1-2 minutes."
-            )
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Erreur lors de l'exécution de la recherche: {error_msg}"
-            )
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors du lancement de la recherche: {str(e)}"
+        )
 
 
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """État d'un job /send-with-pdfs : étape, extraction de chaque PDF, réponse finale"""
+    job = research_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Aucun job {job_id}")
+    return job.to_dict()
+
 
 @router.get("/status")
 async def get_status():
     """Get current system status"""
     return {
         "active_connections": len(manager.active_connections),
+        "in_flight": [run.to_dict() for run in single_flight.list_runs()],
+        "jobs": [job.to_dict() for job in research_jobs.list_jobs() if job.stage != DONE],
         "status": "operational"
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/{run_id}/trace")
+async def get_trace(run_id: str):
+    """Arbre des spans d'un run (étapes du flow, kickoffs, appels LLM et outils)"""
+    spans = tracer.get_spans(run_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail=f"Aucune trace pour le run {run_id}")
+    
+    ended = [s.end_ns for s in spans if s.end_ns is not None]
+    started = min(s.start_ns for s in spans)
+    return {
+        "run_id": run_id,
+        "span_count": len(spans),
+        "in_progress": len(ended) < len(spans),
+        "duration_ms": (max(ended) - started) / 1e6 if ended else None,
+        "spans": tracer.trace_tree(run_id),
+    }
@@ -27,6 +27,18 @@ class Settings(BaseSettings):
     
     # API Keys (depuis .env)
     model: str = ""  # Modèle LLM utilisé (ex: gemini/gemini-2.5-flash)
+    # Chaînes de modèles par agent, séparées par des virgules (le premier est préféré ;
+    # vide : agents.yaml puis MODEL). Ex : REVIEWER_MODELS=gemini/gemini-2.5-flash-lite,gemini/gemini-2.5-flash
+    researcher_models: str = ""
+    reviewer_models: str = ""
+    synthesizer_models: str = ""
+    # Un modèle en 429 ou trop lent est évité pendant ce délai (les appels passent au suivant)
+    llm_fallback_cooldown: float = 60.0
+    llm_slow_seconds: float = 45.0
+    # Requêtes LLM dupliquées (hedging) quand la réponse dépasse le p95 récent du modèle
+    llm_hedging: bool = False
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_delay: float = 1.0
     serper_api_key: str = ""
     google_api_key: str = ""
     gemini_api_key: str = ""
@@ -38,6 +50,66 @@ class Settings(BaseSettings):
     output_dir: Path = base_dir / "output"
     upload_dir: Path = knowledge_dir / "uploaded_pdfs"
     
+    # Stockage des rapports (un espace de noms par run, contenu dédupliqué)
+    report_store_dir: Path = output_dir / "store"
+    report_compression: str = "none"  # none, zlib ou lzma
+    
+    # Cache des recherches terminées (sujets identiques ou quasi identiques)
+    result_cache_enabled: bool = True
+    result_cache_path: Path = report_store_dir / "result_cache.sqlite3"
+    result_cache_ttl_hours: float = 72.0
+    result_cache_similarity: float = 0.8
+    
+    # Catalogue local d'articles (alimenté par chaque run, consulté avant arXiv/Serper)
+    paper_catalog_enabled: bool = True
+    paper_catalog_path: Path = report_store_dir / "paper_catalog.sqlite3"
+    
+    # Pool HTTP partagé par les outils (keep-alive ; HTTP/2 si le paquet h2 est installé)
+    http_max_connections: int = 50
+    http_max_keepalive: int = 20
+    http_keepalive_expiry: float = 60.0
+    http_per_host: int = 8
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
+    http2: bool = True
+    
+    # Traces des runs (spans en mémoire, export optionnel : "", "jsonl" ou "otlp")
+    trace_export: str = ""
+    trace_dir: Path = output_dir / "traces"
+    
+    # Budget de tokens par run (0 : illimité) ; au-delà, pas de nouvelle tentative et synthèse courte
+    run_token_budget: int = 0
+    
+    # Synthèse spéculative lancée pendant la revue (gardée si la revue approuve, annulée sinon)
+    speculative_synthesis: bool = False
+    
+    # Revue article par article pendant la recherche (au moins 5 acceptés pour approuver)
+    pipelined_review: bool = False
+    
+    # Le chercheur s'arrête dès ce nombre d'articles exploitables trouvés (0 : jamais avant max_iter)
+    early_stop_papers: int = 7
+    
+    # Sondes de disponibilité en arrière-plan (/health lit leur dernier résultat)
+    readiness_interval: float = 30.0  # 0 : sondes désactivées
+    readiness_probe_timeout: float = 5.0
+    readiness_min_free_mb: int = 500
+    
+    # Exécuteur PDF : extraction dans des processus séparés (False : threads), file bornée
+    pdf_workers: int = 2
+    pdf_max_pending: int = 32
+    pdf_worker_processes: bool = True
+    
+    # Nettoyage du texte des PDFs avant les prompts (en-têtes, césures, espaces ; bibliographie en option)
+    pdf_normalize: bool = True
+    pdf_drop_references: bool = False
+    
+    # Backend d'extraction des PDFs (auto : choisi par document sur quelques pages, mémorisé par empreinte)
+    pdf_backend: str = "auto"
+    pdf_backend_cache_path: Path = report_store_dir / "pdf_backends.sqlite3"
+    
+    # Chargement de crewAI et des agents après le démarrage (0 : immédiat)
+    flow_warmup_delay: float = 1.0
+    
     # WebSocket
     ws_heartbeat_interval: int = 30
     
@@ -12,12 +12,35 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "src"))
 
 from app.config import get_settings
-from app.api.routes import research, upload, health
+from app.api.routes import research, upload, health, reports, metrics
+from app.services.http_pool import http_pool
+from app.services.pdf_executor import pdf_executor
+from app.services.readiness import readiness
+from app.services.warmup import warmup
 from app.websocket_manager import manager
+from firstone.model_routing import hedge_policy, model_health, set_agent_models
+from firstone.pdf_backends import set_default_backend
+from firstone.pdf_text import set_default_normalization
+from firstone.run_context import set_default_token_budget
+from firstone.speculation import set_default_enabled as set_speculative_synthesis
+from firstone.tracing import tracer
 
 settings = get_settings()
 
 
+def configure_agents():
+    """Réglages des modules d'agents (ils importent crewAI : appliqués par le préchauffage)"""
+    from firstone.early_stop import set_default_target as set_early_stop_target
+    from firstone.review_pipeline import set_default_enabled as set_pipelined_review
+    
+    # Revue des articles pendant la recherche (sinon FIRSTONE_PIPELINED_REVIEW)
+    if settings.pipelined_review:
+        set_pipelined_review(True)
+    
+    # Arrêt anticipé du chercheur
+    set_early_stop_target(settings.early_stop_papers)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestion du cycle de vie de l'application"""
@@ -28,10 +51,50 @@ async def lifespan(app: FastAPI):
     settings.knowledge_dir.mkdir(exist_ok=True)
     settings.output_dir.mkdir(exist_ok=True)
     settings.upload_dir.mkdir(exist_ok=True)
+    settings.report_store_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Export des traces à la fin de chaque run
+    tracer.configure(settings.trace_export, str(settings.trace_dir))
+    
+    # Budget de tokens par défaut des runs (sinon FIRSTONE_RUN_TOKEN_BUDGET)
+    if settings.run_token_budget:
+        set_default_token_budget(settings.run_token_budget)
+    
+    # Synthèse spéculative pendant la revue (sinon FIRSTONE_SPECULATIVE_SYNTHESIS)
+    if settings.speculative_synthesis:
+        set_speculative_synthesis(True)
+    
+    # Modèle(s) de chaque agent, avec repli immédiat sur 429 ou latence excessive
+    for agent_name in ("researcher", "reviewer", "synthesizer"):
+        set_agent_models(agent_name, getattr(settings, f"{agent_name}_models"))
+    model_health.cooldown = settings.llm_fallback_cooldown
+    model_health.slow_seconds = settings.llm_slow_seconds
+    
+    # Hedging des appels LLM lents (sinon FIRSTONE_LLM_HEDGE)
+    if settings.llm_hedging:
+        hedge_policy.enabled = True
+    hedge_policy.percentile = settings.llm_hedge_percentile
+    hedge_policy.min_delay = settings.llm_hedge_min_delay
+    
+    # Nettoyage du texte des PDFs lus par l'outil des agents (sinon FIRSTONE_PDF_NORMALIZE)
+    set_default_normalization(settings.pdf_normalize, settings.pdf_drop_references)
+    set_default_backend(settings.pdf_backend, str(settings.pdf_backend_cache_path))
+    
+    # Pool HTTP des outils : connexions ouvertes une fois, réutilisées par tous les runs
+    http_pool.start()
+    
+    # Sondes de disponibilité (LLM, Serper, arXiv, disque) en tâche de fond
+    readiness.start()
+    
+    # crewAI, agents et outils chargés en arrière-plan : l'API répond pendant ce temps
+    warmup.start(configure_agents)
     
     yield
     
     # Shutdown
+    await readiness.stop()
+    pdf_executor.close()
+    http_pool.close()
     print("👋 Arrêt de l'application")
 
 
@@ -98,6 +161,7 @@ async def websocket_progress(websocket: WebSocket):
 # Inclure les routes REST
 # ====================================
 app.include_router(health.router, tags=["Health"])
+app.include_router(metrics.router, tags=["Metrics"])
 app.include_router(
     research.router,
     prefix=f"{settings.api_prefix}/research",
@@ -108,6 +172,11 @@ app.include_router(
     prefix=f"{settings.api_prefix}/upload",
     tags=["Upload"]
 )
+app.include_router(
+    reports.router,
+    prefix=f"{settings.api_prefix}/reports",
+    tags=["Reports"]
+)
 # NOTE: WebSocket is registered directly above, not through router
 
 
@@ -119,6 +188,8 @@ async def root():
         "version": settings.app_version,
         "docs": "/docs",
         "health": "/health",
+        "metrics": "/metrics",
+        "reports": f"{settings.api_prefix}/reports/{{run_id}}",
         "websocket": "/api/ws/progress"
     })
 
@@ -18,6 +18,8 @@ class ResearchStatus(str, Enum):
 class ResearchRequest(BaseModel):
     """Requête pour lancer une recherche"""
     topic: str = Field(..., description="Sujet de recherche", min_length=3)
+    force_refresh: bool = Field(False, description="Ignorer le cache et relancer la recherche")
+    token_budget: Optional[int] = Field(None, ge=0, description="Budget de tokens du run (défaut : configuration, 0 : illimité)")
 
 
 class ResearchResponse(BaseModel):
@@ -25,6 +27,11 @@ class ResearchResponse(BaseModel):
     status: ResearchStatus = Field(..., description="Statut de la recherche")
     topic: str = Field(..., description="Sujet recherché")
     result: str = Field(..., description="Résultat de la recherche")
+    run_id: Optional[str] = Field(None, description="Identifiant du run (espace de noms des rapports)")
+    cached: bool = Field(False, description="Résultat servi depuis le cache")
+    coalesced: bool = Field(False, description="Requête attachée à un run identique déjà en cours")
+    usage: Optional[Dict[str, Any]] = Field(None, description="Tokens et appels LLM consommés par le run")
+    budget_action: Optional[str] = Field(None, description="Chemin économique pris près du budget (skip_retry, short_synthesis)")
     created_at: datetime = Field(default_factory=datetime.now)
     message: str = Field(..., description="Message de statut")
 
@@ -68,3 +75,5 @@ class HealthResponse(BaseModel):
             "serper": False
         }
     )
+    checks: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    rate_limit: Dict[str, Any] = Field(default_factory=dict)
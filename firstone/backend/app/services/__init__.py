@@ -1,10 +1,27 @@
 """
 Services package initialization
+
+Les singletons sont importés à la première utilisation : importer un service
+léger (readiness, single_flight...) ne charge pas l'orchestrateur et crewAI.
 """
-from app.services.orchestrator import orchestrator_service
-from app.services.knowledge_service import knowledge_service
+import importlib
+
+_SERVICES = {
+    "orchestrator_service": "app.services.orchestrator",
+    "knowledge_service": "app.services.knowledge_service",
+    "report_store": "app.services.report_store",
+    "result_cache": "app.services.result_cache",
+    "single_flight": "app.services.single_flight",
+    "readiness": "app.services.readiness",
+    "warmup": "app.services.warmup",
+    "pdf_executor": "app.services.pdf_executor",
+    "research_jobs": "app.services.research_jobs",
+}
+
+__all__ = list(_SERVICES)
+
 
-__all__ = [
-    "orchestrator_service",
-    "knowledge_service"
-]
+def __getattr__(name):
+    if name in _SERVICES:
+        return getattr(importlib.import_module(_SERVICES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
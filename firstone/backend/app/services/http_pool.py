@@ -0,0 +1,26 @@
+"""
+Service du pool HTTP partagé par tous les outils (Serper, arXiv)
+"""
+from pathlib import Path
+import sys
+
+# Ajouter src au path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "src"))
+
+from firstone.http_pool import HttpPool, set_http_pool
+from app.config import get_settings
+
+settings = get_settings()
+
+
+# Instance singleton, démarrée et fermée par le lifespan de l'application
+http_pool = HttpPool(
+    max_connections=settings.http_max_connections,
+    max_keepalive=settings.http_max_keepalive,
+    keepalive_expiry=settings.http_keepalive_expiry,
+    per_host=settings.http_per_host,
+    timeout=settings.http_timeout,
+    connect_timeout=settings.http_connect_timeout,
+    http2=settings.http2,
+)
+set_http_pool(http_pool)
@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "s
 
 from firstone.crew import Firstone
 from app.config import get_settings
+from app.services.report_store import report_store
 
 settings = get_settings()
 
@@ -63,11 +64,9 @@ class OrchestratorService:
                 inputs
             )
             
-            # Lire le rapport généré
-            report_path = settings.output_dir / "report.md"
-            report_content = ""
-            if report_path.exists():
-                report_content = report_path.read_text(encoding='utf-8')
+            # Sauvegarder le rapport dans l'espace de noms de cette recherche
+            report_content = str(getattr(result, 'raw', result))
+            report_store.put(research_id, "synthesis_report.md", report_content)
             
             # Mettre à jour le statut
             self.active_researches[research_id]['status'] = 'completed'
@@ -0,0 +1,18 @@
+"""
+Service du catalogue local d'articles (recherche plein texte SQLite FTS5)
+"""
+from pathlib import Path
+import sys
+
+# Ajouter src au path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "src"))
+
+from firstone.paper_catalog import PaperCatalog, set_paper_catalog
+from app.config import get_settings
+
+settings = get_settings()
+
+
+# Instance singleton (aussi utilisée par l'outil de recherche du chercheur)
+paper_catalog = PaperCatalog(settings.paper_catalog_path) if settings.paper_catalog_enabled else None
+set_paper_catalog(paper_catalog)
@@ -0,0 +1,28 @@
+"""
+Service de l'exécuteur PDF : copies, empreintes, comptage de pages et
+extraction de texte hors de la boucle d'événements
+"""
+from pathlib import Path
+import sys
+
+# Ajouter src au path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "src"))
+
+from firstone.pdf_backends import set_default_backend
+from firstone.pdf_executor import PdfExecutor, PdfExecutorBusy
+from app.config import get_settings
+
+settings = get_settings()
+
+
+# Instance singleton, fermée par le lifespan de l'application (workers lancés au premier PDF)
+pdf_executor = PdfExecutor(
+    workers=settings.pdf_workers,
+    max_pending=settings.pdf_max_pending,
+    processes=settings.pdf_worker_processes,
+    # Backend d'extraction et base des choix par document, appliqués dans chaque worker
+    initializer=set_default_backend,
+    initargs=(settings.pdf_backend, str(settings.pdf_backend_cache_path)),
+)
+
+__all__ = ["pdf_executor", "PdfExecutorBusy"]
@@ -0,0 +1,234 @@
+"""
+Sondes de disponibilité (readiness) exécutées en arrière-plan
+
+Les dépendances de l'API (fournisseur LLM, Serper, arXiv, espace disque des
+répertoires de sortie et d'upload) sont sondées toutes les
+`readiness_interval` secondes par une tâche du lifespan, avec des requêtes
+qui ne consomment aucun quota de génération :
+- LLM : liste des modèles du fournisseur (valide la clé, détecte un 429),
+- Serper : joignabilité de l'hôte (une recherche serait facturée) et clé présente,
+- arXiv : requête de recherche sans résultat (max_results=0),
+- disque : espace libre et droit d'écriture.
+
+Avec `readiness_interval` <= 0 les sondes sont désactivées : elles sont
+considérées comme ignorées et la disponibilité ne dépend que du
+préchauffage.
+
+Les résultats sont mis en cache : `/health` et `/health/ready` ne font que
+lire ce cache, on peut donc les interroger à haute fréquence sans coût. La
+marge du limiteur LLM partagé (appels possibles tout de suite) est lue à
+chaque requête et exposée en gauge.
+"""
+import asyncio
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Ajouter src au path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "src"))
+
+from firstone.http_pool import get_http_pool
+from firstone.model_routing import agent_models, model_health
+from firstone.metrics import registry
+from firstone.rate_limit import shared_rate_limiter
+from app.config import get_settings
+
+settings = get_settings()
+
+READINESS_PROBE_UP = registry.gauge(
+    "firstone_readiness_probe_up", "Last result of each readiness probe (1: ok, 0: failing)", ["probe"])
+READINESS_PROBE_DURATION = registry.histogram(
+    "firstone_readiness_probe_duration_seconds", "Duration of one readiness probe", ["probe"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+LLM_RATE_HEADROOM = registry.gauge(
+    "firstone_llm_rate_headroom", "LLM calls the shared rate limiter allows right now (-1: no limit)")
+
+SERPER_URL = "https://google.serper.dev"
+ARXIV_URL = "http://export.arxiv.org/api/query"
+# Liste des modèles par fournisseur : valide la clé sans appel de génération
+LLM_PROBES = {
+    "gemini": ("https://generativelanguage.googleapis.com/v1beta/models", ("GEMINI_API_KEY", "GOOGLE_API_KEY")),
+    "openai": ("https://api.openai.com/v1/models", ("OPENAI_API_KEY",)),
+}
+
+# Sondes dont l'échec rend l'API indisponible (/health/ready en 503)
+REQUIRED_PROBES = ("llm", "disk")
+
+
+class ProbeFailed(Exception):
+    """Échec d'une sonde, avec le détail à afficher"""
+
+
+class ReadinessMonitor:
+    """Exécute les sondes périodiquement et garde leur dernier résultat"""
+
+    def __init__(self, interval: float = 30.0, timeout: float = 5.0, min_free_mb: int = 500):
+        self.interval = interval
+        self.timeout = timeout
+        self.min_free_mb = min_free_mb
+        self.probes: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {
+            "llm": self.probe_llm,
+            "serper": self.probe_serper,
+            "arxiv": self.probe_arxiv,
+            "disk": self.probe_disk,
+        }
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def start(self) -> None:
+        """Lance la boucle de sondes (appelé par le lifespan)"""
+        if self._task is None and self.enabled:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Exécute toutes les sondes en parallèle et met le cache à jour"""
+        await asyncio.gather(*(self._run(name, probe) for name, probe in self.probes.items()))
+        return self._results
+
+    async def _run(self, name: str, probe: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(probe(), self.timeout)
+            result = {"ok": True, **details}
+        except asyncio.TimeoutError:
+            result = {"ok": False, "error": f"timeout après {self.timeout:g} s"}
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+        elapsed = time.perf_counter() - started
+        READINESS_PROBE_DURATION.observe(elapsed, probe=name)
+        READINESS_PROBE_UP.set(int(result["ok"]), probe=name)
+        result["latency_ms"] = round(elapsed * 1000, 1)
+        result["checked_at"] = datetime.now().isoformat()
+        self._results[name] = result
+
+    # ------------------------------------------------------------------
+    # Sondes
+
+    async def probe_llm(self) -> Dict[str, Any]:
+        """Chaque fournisseur des chaînes de modèles des agents répond à la liste des modèles"""
+        providers: Dict[str, List[str]] = {}
+        for agent_name in ("researcher", "reviewer", "synthesizer"):
+            for model in agent_models(agent_name):
+                model = model or settings.model or os.getenv("MODEL", "")
+                if model:
+                    providers.setdefault(model.split("/", 1)[0], []).append(model)
+        if not providers:
+            raise ProbeFailed("aucun modèle configuré (MODEL)")
+
+        checked, skipped = [], []
+        for provider in sorted(providers):
+            if provider not in LLM_PROBES:
+                # Fournisseur sans sonde connue (ollama, stand-ins...) : non bloquant
+                skipped.append(provider)
+                continue
+            url, key_names = LLM_PROBES[provider]
+            key = next((os.getenv(name) for name in key_names if os.getenv(name)), None)
+            if not key:
+                raise ProbeFailed(f"{provider} : clé API absente ({' / '.join(key_names)})")
+            if provider == "gemini":
+                # Clé en en-tête, jamais dans l'URL (journaux des proxys, URL des exceptions httpx)
+                response = await get_http_pool().arequest(
+                    "GET", url, params={"pageSize": 1}, headers={"x-goog-api-key": key})
+            else:
+                response = await get_http_pool().arequest(
+                    "GET", url, headers={"Authorization": f"Bearer {key}"})
+            if response.status_code == 429:
+                raise ProbeFailed(f"{provider} : quota épuisé (429)")
+            if response.status_code >= 400:
+                raise ProbeFailed(f"{provider} : HTTP {response.status_code}")
+            checked.append(provider)
+        return {"providers": checked, "skipped": skipped}
+
+    async def probe_serper(self) -> Dict[str, Any]:
+        if not (settings.serper_api_key or os.getenv("SERPER_API_KEY")):
+            raise ProbeFailed("SERPER_API_KEY absente")
+        # Toute réponse HTTP suffit : l'hôte est joignable, aucune recherche n'est facturée
+        response = await get_http_pool().arequest("HEAD", SERPER_URL)
+        if response.status_code >= 500:
+            raise ProbeFailed(f"HTTP {response.status_code}")
+        return {}
+
+    async def probe_arxiv(self) -> Dict[str, Any]:
+        response = await get_http_pool().arequest(
+            "GET", ARXIV_URL, params={"search_query": "all:health", "max_results": 0})
+        if response.status_code >= 400:
+            raise ProbeFailed(f"HTTP {response.status_code}")
+        return {}
+
+    async def probe_disk(self) -> Dict[str, Any]:
+        free = {}
+        for name, directory in (("output_dir", settings.output_dir), ("upload_dir", settings.upload_dir)):
+            if not os.access(directory, os.W_OK):
+                raise ProbeFailed(f"{name} non accessible en écriture ({directory})")
+            free_mb = shutil.disk_usage(directory).free // (1024 * 1024)
+            if free_mb < self.min_free_mb:
+                raise ProbeFailed(f"{name} : {free_mb} Mo libres (minimum {self.min_free_mb})")
+            free[name] = free_mb
+        return {"free_mb": free}
+
+    # ------------------------------------------------------------------
+    # Lecture du cache
+
+    def rate_limit(self) -> Dict[str, Any]:
+        """Marge du limiteur LLM partagé et modèles évités (429 ou lenteur)"""
+        headroom = shared_rate_limiter.headroom()
+        LLM_RATE_HEADROOM.set(headroom)
+        cooling = {model: state["reason"] for model, state in model_health.stats().items() if state["reason"]}
+        return {
+            "headroom": headroom,
+            "max_per_minute": shared_rate_limiter.max_per_minute,
+            "cooling_models": cooling,
+        }
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self._results)
+
+    def ready(self) -> bool:
+        """Toutes les sondes obligatoires ont réussi à leur dernier passage (ou sont désactivées)"""
+        if not self.enabled:
+            return True
+        results = self._results
+        return all(results.get(name, {}).get("ok") for name in REQUIRED_PROBES)
+
+    def status(self) -> str:
+        if not self.enabled:
+            # Sondes ignorées : aucun résultat n'arrivera, pas d'état « starting »
+            return "healthy"
+        if len(self._results) < len(self.probes):
+            return "starting"
+        if not self.ready():
+            return "unavailable"
+        return "healthy" if all(result["ok"] for result in self._results.values()) else "degraded"
+
+
+# Instance singleton, démarrée et arrêtée par le lifespan de l'application
+readiness = ReadinessMonitor(
+    interval=settings.readiness_interval,
+    timeout=settings.readiness_probe_timeout,
+    min_free_mb=settings.readiness_min_free_mb,
+)
@@ -0,0 +1,20 @@
+"""
+Service de stockage des rapports générés (un espace de noms par run)
+"""
+from pathlib import Path
+import sys
+
+# Ajouter src au path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "src"))
+
+from firstone.report_store import ReportStore
+from app.config import get_settings
+
+settings = get_settings()
+
+
+# Instance singleton
+report_store = ReportStore(
+    settings.report_store_dir,
+    compression=settings.report_compression
+)
@@ -0,0 +1,632 @@
+"""
+Flow de recherche du backend (recherche, revue, synthèse) avec progression WebSocket
+
+Ce module charge crewAI, les agents et leurs outils : les routes ne
+l'importent qu'à la demande, une fois le préchauffage terminé (voir
+app.services.warmup), pour que l'API réponde dès le démarrage.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+from crewai.flow.flow import Flow, listen, start
+from crewai.flow.flow import router as flow_router
+
+from app.websocket_manager import manager
+from app.services.paper_catalog import paper_catalog
+from app.services.report_store import report_store
+from app.services.result_cache import result_cache
+from firstone import budget, early_stop, papers, review_pipeline, speculation
+from firstone.run_context import get_run_stats
+from firstone.flow_hooks import InstrumentedFlow, backoff, crew_kickoff
+from firstone.tracing import span
+from firstone.crew import Firstone, PaperRecord
+
+
+def run_usage(run_id: str) -> Optional[Dict[str, Any]]:
+    """Tokens et appels LLM consommés par un run"""
+    stats = get_run_stats(run_id)
+    if stats is None:
+        return None
+    return {
+        "prompt_tokens": stats.prompt_tokens,
+        "completion_tokens": stats.completion_tokens,
+        "total_tokens": stats.total_tokens,
+        "token_budget": stats.token_budget or None,
+        "llm_calls": stats.llm_calls,
+        "tool_calls": stats.tool_calls,
+    }
+
+
+class ResearchFlowState(BaseModel):
+    """State model for the research flow"""
+    topic: str = ""
+    current_year: str = ""
+    research_result: str = ""
+    papers: List[PaperRecord] = []  # Sortie structurée du chercheur, stockée une fois par run
+    feedback: Optional[str] = None
+    valid: bool = False
+    retry_count: int = 0
+    pdf_paths: List[str] = []  # List of PDF file paths to analyze
+    pdf_content: str = ""  # Ext
+    token_budget: Optional[int] = None  # None : budget par défaut (settings.run_token_budget)
+    budget_action: Optional[str] = None  # Chemin économique pris près du budget
+    speculative_synthesis: Optional[bool] = None  # None : réglage par défaut (settings.speculative_synthesis)
+    pipelined_review: Optional[bool] = None  # None : réglage par défaut (settings.pipelined_review)
+    paper_verdicts: List[dict] = []  # Revues article par article de la dernière tentative (mode pipeline)
+
+
+class ResearchFlow(InstrumentedFlow, Flow[ResearchFlowState]):
+    """Flow for iterative research-review-synthesis workflow with WebSocket progress"""
+
+    _speculation: Optional[speculation.Speculation] = None  # Synthèse lancée pendant la revue
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ws_manager = manager  # Reference to global WebSocket manager
+
+    def send_ws_update(self, agent: str, status: str, message: str = "", 
+                       details: Dict = None, iteration: int = None):
+        """Synchronous wrapper to send WebSocket updates from sync flow"""
+        with span("send_ws_update", agent=agent, status=status):
+            try:
+                # Create new event loop for this thread if needed
+                try:
+                    loop = asyncio.get_event_loop()
+                except RuntimeError:
+                    loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(loop)
+            
+                # Run the async broadcast in the loop
+                if loop.is_running():
+                    # If loop is already running, create task
+                    asyncio.create_task(
+                        self.ws_manager.broadcast(agent, status, message, details, iteration, self.state.id)
+                    )
+                else:
+                    # If loop is not running, run until complete
+                    loop.run_until_complete(
+                        self.ws_manager.broadcast(agent, status, message, details, iteration, self.state.id)
+                    )
+            except Exception as e:
+                print(f"⚠️ WebSocket update failed: {e}")
+
+    @start("retry")
+    def generate_research(self):
+        """Generate research with researcher agent"""
+        iteration = self.state.retry_count + 1
+        
+        # Notify research start
+        self.send_ws_update(
+            agent="Researcher",
+            status="thinking" if iteration == 1 else "retry",
+            message=f"Starting research iteration {iteration}...",
+            iteration=iteration
+        )
+        
+        print(f"\n{'='*80}")
+        print(f"📚 ITERATION {iteration} - Running Research Task")
+        print(f"{'='*80}\n")
+        
+        # Delay between retries
+        if self.state.retry_count > 0:
+            delay = 10
+            self.send_ws_update(
+                agent="Researcher",
+                status="thinking",
+                message=f"Waiting {delay}s before retry (API rate limit)...",
+                iteration=iteration
+            )
+            print(f"⏱️  Waiting {delay} seconds before retry...")
+            backoff(delay, reason="retry_delay")
+        
+        # Prepare inputs
+        inputs = {
+            "topic": self.state.topic,
+            "current_year": self.state.current_year
+        }
+
+        # Add PDF content if available
+        if self.state.pdf_content:
+            inputs["uploaded_pdfs"] = f"""
+📚 UPLOADED PDF DOCUMENTS (USE AS PRIMARY SOURCES):
+
+{self.state.pdf_content}
+
+IMPORTANT INSTRUCTIONS FOR USING UPLOADED PDFs:
+- These PDFs are the PRIMARY sources for your research
+- Extract key findings, methodologies, and citations from these documents
+- Reference these documents prominently in your research
+- Supplement with additional papers from ArXiv/Web only if necessary
+- Make sure to cite the uploaded PDFs in your report
+"""
+            print(f"\n📄 Using {len(self.state.pdf_paths)} uploaded PDF(s) as primary sources")
+        
+        
+        if self.state.feedback:
+            self.send_ws_update(
+                agent="Researcher",
+                status="working",
+                message=f"Addressing reviewer feedback (attempt {iteration}/3)...",
+                iteration=iteration
+            )
+            inputs["feedback"] = f"""
+PREVIOUS ATTEMPT WAS REJECTED (Attempt {self.state.retry_count}).
+
+REVIEWER FEEDBACK:
+{self.state.feedback}
+
+FOCUS ON IMPROVEMENTS:
+- Address specific issues from feedback
+- Ensure 5-7 high-quality papers
+- Provide clear explanations (50+ words each)
+- Use credible sources (ArXiv, peer-reviewed)
+
+This is attempt {iteration} of 3. Make it count!
+"""
+        else:
+            self.send_ws_update(
+                agent="Researcher",
+                status="working",
+                message="Gathering information from web and ArXiv papers...",
+                iteration=iteration
+            )
+        
+        # Optionnel : chaque article est revu pendant que la recherche continue
+        research_task = Firstone().research_task()
+        pipeline = None
+        if review_pipeline.enabled(self.state.pipelined_review):
+            pipeline = review_pipeline.ReviewPipeline(
+                self.state.topic,
+                on_verdict=lambda verdict: self.send_paper_verdict(verdict, iteration),
+            )
+            pipeline.attach(research_task)
+        # Arrête la boucle d'outils du chercheur dès qu'il a assez d'articles exploitables
+        early_stop.EarlyStopController(self.state.current_year, pipeline=pipeline).attach(research_task.agent)
+        
+        # Create research crew
+        from crewai import Crew, Process
+        research_crew = Crew(
+            agents=[Firstone().researcher()],
+            tasks=[research_task],
+            process=Process.sequential,
+            verbose=True,
+            memory=False,
+            cache=True,
+            max_rpm=10,
+        )
+        
+        try:
+            with crew_kickoff("researcher"):
+                result = research_crew.kickoff(inputs=inputs)
+            print("\n📄 Research result received")
+            self.keep_research(result, pipeline)
+            
+            # Notify research completion
+            self.send_ws_update(
+                agent="Researcher",
+                status="done",
+                message=f"Research completed ({len(self.state.papers)} papers, {len(result.raw)} chars)",
+                iteration=iteration,
+                details={"output_length": len(result.raw), "paper_count": len(self.state.papers)}
+            )
+            
+        except Exception as e:
+            if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
+                self.send_ws_update(
+                    agent="Researcher",
+                    status="retry",
+                    message="API quota exceeded, waiting 60s...",
+                    iteration=iteration
+                )
+                print(f"\n⚠️  API Quota Exceeded. Waiting 60 seconds...")
+                backoff(60, reason="quota_exceeded")
+                with crew_kickoff("researcher"):
+                    result = research_crew.kickoff(inputs=inputs)
+                self.keep_research(result, pipeline)
+            else:
+                self.send_ws_update(
+                    agent="Researcher",
+                    status="error",
+                    message=f"Error: {str(e)}",
+                    iteration=iteration
+                )
+                raise e
+
+    def keep_research(self, result, pipeline=None):
+        """Stocke une seule fois par run les fiches d'articles du chercheur"""
+        self.state.papers = papers.from_result(result)
+        self.state.paper_verdicts = []
+        if pipeline:
+            verdicts = pipeline.drain(self.state.papers)
+            self.state.paper_verdicts = [verdict.to_dict() for verdict in verdicts]
+            # Seuls les articles acceptés passent à la synthèse
+            self.state.papers = pipeline.accepted() or self.state.papers
+        self.state.research_result = papers.to_markdown(self.state.papers) if self.state.papers else result.raw
+        if self.state.papers:
+            report_store.put(self.state.id, papers.PAPERS_ARTIFACT, papers.to_json(self.state.papers))
+            # Les runs suivants retrouveront ces articles dans le catalogue local
+            if paper_catalog:
+                paper_catalog.add_papers(self.state.papers, origin=f"run:{self.state.id}")
+
+    def send_paper_verdict(self, verdict: review_pipeline.PaperVerdict, iteration: int):
+        """Notifie la revue d'un article (appelé depuis les workers du pipeline)"""
+        self.send_ws_update(
+            agent="Reviewer",
+            status="working",
+            message=f"{'✓' if verdict.accepted else '✗'} Paper {verdict.index}: {verdict.title}",
+            iteration=iteration,
+            details={"paper": verdict.index, "approved": verdict.accepted, "feedback": verdict.reason[:200]},
+        )
+
+    @flow_router(generate_research)
+    def evaluate_research(self):
+        """Evaluate research with reviewer agent"""
+        iteration = self.state.retry_count + 1
+        
+        # Notify review start
+        self.send_ws_update(
+            agent="Reviewer",
+            status="thinking",
+            message=f"Evaluating research quality (attempt {iteration})...",
+            iteration=iteration
+        )
+        
+        print(f"\n{'='*80}")
+        print(f"🔍 EVALUATING RESEARCH (Attempt {iteration})")
+        print(f"{'='*80}\n")
+        
+        # Check max retry
+        if self.state.retry_count >= 3:
+            self.send_ws_update(
+                agent="Reviewer",
+                status="error",
+                message="Maximum retry limit reached (3 attempts)",
+                iteration=iteration
+            )
+            print("\n⚠️  Maximum retry count reached")
+            return "max_retry_exceeded"
+        
+        self.send_ws_update(
+            agent="Reviewer",
+            status="working",
+            message="Analyzing research papers and validating quality...",
+            iteration=iteration
+        )
+        
+        if self.state.paper_verdicts:
+            # Articles déjà revus un par un pendant la recherche (voir firstone/review_pipeline.py)
+            self.state.valid, self.state.feedback = review_pipeline.outcome(self.state.paper_verdicts)
+        else:
+            self.review_research()
+        
+        self.state.retry_count += 1
+        
+        if self.state.valid:
+            self.send_ws_update(
+                agent="Reviewer",
+                status="done",
+                message="✓ Research approved! Proceeding to synthesis...",
+                iteration=iteration,
+                details={"approved": True}
+            )
+            print("\n✅ Research APPROVED")
+            return "approved"
+        
+        self.drop_speculation()
+        self.send_ws_update(
+            agent="Reviewer",
+            status="retry",
+            message=f"✗ Research rejected. Retry {self.state.retry_count}/3",
+            iteration=iteration,
+            details={
+                "approved": False,
+                "feedback": self.state.feedback[:200] if self.state.feedback else ""
+            }
+        )
+        # Plus de place dans le budget de tokens pour une nouvelle tentative
+        if not budget.can_retry(papers.for_review(self.state.papers, self.state.research_result)):
+            self.state.budget_action = budget.SKIP_RETRY
+            budget.record_action(budget.SKIP_RETRY)
+            print("\n💸 Budget de tokens presque épuisé - pas de nouvelle tentative")
+            return "max_retry_exceeded"
+        
+        print(f"\n❌ Research REJECTED - Retry {self.state.retry_count}/3")
+        return "retry"
+
+    def review_research(self):
+        """Revue de l'ensemble de la recherche par l'agent reviewer"""
+        # Create review crew
+        from crewai import Crew, Process, Task
+        
+        # Projection compacte des fiches d'articles plutôt que le rapport complet
+        review_task = Task(
+            description=f"""
+Review and critically evaluate these research papers about {self.state.topic}.
+{papers.REVIEW_NOTE}
+
+{papers.for_review(self.state.papers, self.state.research_result)}
+
+Follow the balanced quality criteria defined in your task configuration.
+""",
+            expected_output=Firstone().tasks_config['review_task']['expected_output'],
+            agent=Firstone().reviewer(),
+            output_pydantic=Firstone.ResearchVerification if hasattr(Firstone, 'ResearchVerification') else None
+        )
+        
+        review_crew = Crew(
+            agents=[Firstone().reviewer()],
+            tasks=[review_task],
+            process=Process.sequential,
+            verbose=True,
+        )
+        
+        # Optionnel : la synthèse démarre maintenant, gardée seulement si la revue approuve
+        self.speculate_synthesis()
+        try:
+            with crew_kickoff("reviewer"):
+                result = review_crew.kickoff(inputs={"topic": self.state.topic})
+        except Exception:
+            self.drop_speculation()
+            raise
+        
+        # Extract validation
+        if hasattr(result, 'pydantic') and result.pydantic:
+            self.state.valid = result.pydantic.valid
+            self.state.feedback = result.pydantic.feedback
+        else:
+            # Fallback parsing
+            import json
+            try:
+                raw_output = str(result.raw)
+                if '{' in raw_output and '}' in raw_output:
+                    start = raw_output.index('{')
+                    end = raw_output.rindex('}') + 1
+                    json_str = raw_output[start:end]
+                    review_data = json.loads(json_str)
+                    self.state.valid = review_data.get('approved', review_data.get('valid', False))
+                    
+                    if not self.state.valid:
+                        rejection_reasons = review_data.get('rejection_reasons', [])
+                        if rejection_reasons:
+                            self.state.feedback = "\n".join(f"- {reason}" for reason in rejection_reasons)
+                        else:
+                            self.state.feedback = review_data.get('feedback', 'Did not meet quality standards')
+                    else:
+                        self.state.feedback = None
+            except Exception as e:
+                print(f"⚠️  Could not parse review output: {e}")
+                self.state.valid = False
+                self.state.feedback = "Review parsing failed"
+
+    @listen("approved")
+    def synthesize_result(self):
+        """Generate final synthesis report"""
+        self.send_ws_update(
+            agent="Synthesizer",
+            status="thinking",
+            message="Starting synthesis report generation...",
+            details={"iterations_required": self.state.retry_count}
+        )
+        
+        print(f"\n{'='*80}")
+        print(f"📊 GENERATING SYNTHESIS REPORT")
+        print(f"{'='*80}\n")
+        
+        self.send_ws_update(
+            agent="Synthesizer",
+            status="working",
+            message="Analyzing patterns and synthesizing findings...",
+        )
+        
+        approved_research = papers.for_synthesis(self.state.papers, self.state.research_result)
+        short = budget.use_short_synthesis(approved_research)
+        if short:
+            # Budget de tokens presque épuisé : rapport court
+            self.state.budget_action = budget.SHORT_SYNTHESIS
+            budget.record_action(budget.SHORT_SYNTHESIS)
+            self.send_ws_update(
+                agent="Synthesizer",
+                status="working",
+                message="Token budget nearly spent, writing a short synthesis...",
+                details={"budget_action": budget.SHORT_SYNTHESIS}
+            )
+        
+        # Synthèse spéculative écrite pendant la revue, si ses entrées sont toujours valables
+        speculative, self._speculation = self._speculation, None
+        result = speculative.take(key=(approved_research, short)) if speculative else None
+        if result is not None:
+            print("⚡ Synthèse spéculative utilisée")
+        else:
+            result = self.run_synthesis(approved_research, short, self.state.retry_count)
+        
+        report_content = str(result.raw) if result else "Report generation failed"
+        
+        # Sauvegarder le rapport dans l'espace de noms de ce run
+        report_store.put(self.state.id, "synthesis_report.md", report_content)
+        output_file = report_store.relative_path(self.state.id, "synthesis_report.md")
+        
+        self.send_ws_update(
+            agent="Synthesizer",
+            status="done",
+            message=f"✓ Synthesis complete! Report saved to {output_file}",
+            details={
+                "total_iterations": self.state.retry_count,
+                "run_id": self.state.id,
+                "output_file": output_file,
+                "report_content": report_content
+            }
+        )
+        
+        # Notify overall completion with report
+        self.send_ws_update(
+            agent="System",
+            status="completed",
+            message=f"✓ All tasks completed successfully after {self.state.retry_count} iteration(s)!",
+            details={
+                "total_iterations": self.state.retry_count,
+                "run_id": self.state.id,
+                "final_report": report_content,
+                "usage": run_usage(self.state.id)
+            }
+        )
+        
+        print(f"\n{'='*80}")
+        print(f"✅ SYNTHESIS COMPLETE")
+        print(f"Total iterations: {self.state.retry_count}")
+        print(f"{'='*80}\n")
+
+    def run_synthesis(self, approved_research: str, short: bool, iterations: int):
+        """Exécute le crew de synthèse sur les fiches d'articles approuvées"""
+        from crewai import Crew, Process, Task
+        if short:
+            synthesis_task = Task(
+                description=budget.short_synthesis_description(self.state.topic, approved_research, iterations),
+                expected_output=budget.SHORT_SYNTHESIS_EXPECTED_OUTPUT,
+                agent=Firstone().synthesizer(),
+            )
+        else:
+            synthesis_task = Task(
+                description=f"""
+Create a comprehensive synthesis report on {self.state.topic} using the approved research papers below.
+
+APPROVED RESEARCH PAPERS:
+{approved_research}
+
+REVIEW STATUS: APPROVED after {iterations} iteration(s)
+
+Your tasks:
+1. Extract key themes and patterns across papers
+2. Identify consensus and disagreement areas
+3. Synthesize insights into cohesive narrative
+4. Provide actionable recommendations
+
+Include: Executive Summary, Introduction, Main Findings, Analysis, Conclusions, References
+""",
+                expected_output="""Comprehensive markdown synthesis report (2000-4000 words) without code blocks.""",
+                agent=Firstone().synthesizer(),
+            )
+        
+        synthesis_crew = Crew(
+            agents=[Firstone().synthesizer()],
+            tasks=[synthesis_task],
+            process=Process.sequential,
+            verbose=True,
+        )
+        
+        synthesis_inputs = {
+            "topic": self.state.topic,
+            "current_year": self.state.current_year,
+        }
+        
+        with crew_kickoff("synthesizer"):
+            return synthesis_crew.kickoff(inputs=synthesis_inputs)
+
+    def speculate_synthesis(self):
+        """Lance la synthèse sur la recherche en cours de revue (voir firstone/speculation.py)"""
+        if not speculation.enabled(self.state.speculative_synthesis):
+            return
+        approved_research = papers.for_synthesis(self.state.papers, self.state.research_result)
+        iterations = self.state.retry_count + 1  # Si cette revue approuve
+        print("⚡ Synthèse spéculative lancée pendant la revue")
+        # Seulement sans budget de tokens : jamais la synthèse courte
+        self._speculation = speculation.Speculation.start(
+            "synthesis",
+            lambda: self.run_synthesis(approved_research, False, iterations),
+            key=(approved_research, False),
+        )
+
+    def drop_speculation(self):
+        """Annule la synthèse spéculative après une revue rejetée (ou en erreur)"""
+        speculative, self._speculation = self._speculation, None
+        if speculative:
+            speculative.cancel()
+            print("⚡ Synthèse spéculative abandonnée")
+
+    @listen("max_retry_exceeded")
+    def max_retry_exceeded_exit(self):
+        """Handle max retry exceeded"""
+        stopped_by_budget = self.state.budget_action == budget.SKIP_RETRY
+        reason = (f"token budget spent after {self.state.retry_count} attempt(s)" if stopped_by_budget
+                  else "3 attempts")
+        self.send_ws_update(
+            agent="System",
+            status="error",
+            message=f"✗ Research failed after {reason}. Last feedback: {self.state.feedback[:100] if self.state.feedback else ''}...",
+            details={
+                "total_attempts": self.state.retry_count,
+                "run_id": self.state.id,
+                "last_feedback": self.state.feedback,
+                "budget_action": self.state.budget_action,
+                "usage": run_usage(self.state.id)
+            }
+        )
+        
+        print(f"\n{'='*80}")
+        if stopped_by_budget:
+            print(f"❌ RESEARCH STOPPED - TOKEN BUDGET SPENT")
+        else:
+            print(f"❌ RESEARCH FAILED - MAX RETRIES EXCEEDED")
+        print(f"{'='*80}\n")
+        
+        # Save failed research in this run's namespace
+        stopped = "**Stopped:** token budget spent\n\n" if stopped_by_budget else ""
+        report_store.put(
+            self.state.id,
+            "failed_research.md",
+            f"# Failed Research Report\n\n"
+            f"**Topic:** {self.state.topic}\n\n"
+            f"**Attempts:** {self.state.retry_count}\n\n"
+            f"{stopped}"
+            f"## Last Research Output\n\n{self.state.research_result}\n\n"
+            f"## Last Reviewer Feedback\n\n{self.state.feedback}\n",
+        )
+
+
+def run_flow_sync(topic: str, run_id: Optional[str] = None,
+                  pdf_hashes: Optional[List[str]] = None,
+                  token_budget: Optional[int] = None,
+                  pdf_paths: Optional[List[str]] = None,
+                  pdf_content: str = "") -> ResearchFlowState:
+    """
+    Synchronous wrapper to run the flow, returns the final flow state.
+    `pdf_content` is the text already extracted from `pdf_paths`.
+    """
+    # Initialize flow (its state id is the run's artifact namespace)
+    research_flow = ResearchFlow()
+    if run_id:
+        research_flow.state.id = run_id
+    research_flow.state.topic = topic
+    research_flow.state.current_year = str(datetime.now().year)
+    research_flow.state.token_budget = token_budget
+    research_flow.state.pdf_paths = pdf_paths or []
+    research_flow.state.pdf_content = pdf_content
+    
+    try:
+        # Send initial update
+        asyncio.run(manager.broadcast(
+            agent="System",
+            status="started",
+            message=f"Starting research flow for: {topic}",
+            run_id=research_flow.state.id
+        ))
+        
+        # Run flow synchronously (CrewAI flows are sync)
+        research_flow.kickoff()
+        
+        # Make the completed synthesis available to later identical topics
+        # (not a short synthesis written under budget pressure)
+        if research_flow.state.valid and not research_flow.state.budget_action:
+            result_cache.put(topic, research_flow.state.id, pdf_hashes or [])
+        
+        return research_flow.state
+        
+    except Exception as e:
+        asyncio.run(manager.broadcast(
+            agent="System",
+            status="error",
+            message=f"Flow execution error: {str(e)}",
+            run_id=research_flow.state.id
+        ))
+        raise
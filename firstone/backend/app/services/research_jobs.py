@@ -0,0 +1,97 @@
+"""
+Suivi des recherches avec PDFs exécutées en arrière-plan
+
+`/send-with-pdfs` répond tout de suite avec l'identifiant du job (le run_id) ;
+le job passe ensuite par l'extraction des PDFs, en parallèle, fichier par
+fichier, puis par le flow de recherche. Chaque job garde l'état de ses
+fichiers et, une fois terminé, la réponse finale ou l'erreur. Les
+`max_jobs` derniers jobs restent consultables.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Étapes d'un job
+QUEUED = "queued"
+EXTRACTING = "extracting"
+RESEARCHING = "researching"
+DONE = "done"
+
+
+@dataclass
+class ResearchJob:
+    """Une recherche avec PDFs et l'avancement de ses étapes"""
+    job_id: str
+    topic: str
+    files: Dict[str, Dict[str, Any]]
+    stage: str = QUEUED
+    status: str = "pending"
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+    response: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def set_stage(self, stage: str, status: str = "running") -> None:
+        with self._lock:
+            self.stage = stage
+            self.status = status
+
+    def update_file(self, name: str, **values: Any) -> None:
+        with self._lock:
+            self.files[name].update(values)
+
+    def finish(self, response: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Termine le job avec la réponse du flow, ou l'erreur qui l'a arrêté"""
+        with self._lock:
+            self.stage = DONE
+            self.response = response
+            self.error = error
+            self.status = response["status"] if response else "failed"
+            self.finished_at = datetime.now()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "topic": self.topic,
+                "status": self.status,
+                "stage": self.stage,
+                "files": {name: dict(state) for name, state in self.files.items()},
+                "created_at": self.created_at.isoformat(),
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "response": self.response,
+                "error": self.error,
+            }
+
+
+class ResearchJobs:
+    """Registre thread-safe des jobs, limité aux `max_jobs` plus récents"""
+
+    def __init__(self, max_jobs: int = 200):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ResearchJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, topic: str, filenames: List[str]) -> ResearchJob:
+        job = ResearchJob(job_id=job_id, topic=topic,
+                          files={name: {"status": "pending"} for name in filenames})
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[ResearchJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+
+# Instance singleton
+research_jobs = ResearchJobs()
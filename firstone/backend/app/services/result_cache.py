@@ -0,0 +1,35 @@
+"""
+Service de cache des recherches terminées
+"""
+from pathlib import Path
+from typing import Iterable, Optional
+import sys
+
+# Ajouter src au path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "src"))
+
+from firstone.result_cache import CacheHit, ResultCache
+from app.config import get_settings
+from app.services.report_store import report_store
+
+settings = get_settings()
+
+
+def lookup_cached_result(
+    topic: str,
+    pdf_hashes: Iterable[str] = (),
+    force_refresh: bool = False
+) -> Optional[CacheHit]:
+    """Retourne un résultat frais pour ce sujet, sauf si le cache est désactivé ou ignoré"""
+    if force_refresh or not settings.result_cache_enabled:
+        return None
+    return result_cache.lookup(topic, pdf_hashes)
+
+
+# Instance singleton
+result_cache = ResultCache(
+    settings.result_cache_path,
+    store=report_store,
+    ttl_seconds=settings.result_cache_ttl_hours * 3600,
+    similarity_threshold=settings.result_cache_similarity
+)
@@ -0,0 +1,88 @@
+"""
+Coalescence des recherches identiques en cours (single-flight)
+
+Une seule exécution du flow par clé (sujet normalisé + ensemble de PDFs) :
+les requêtes identiques arrivant pendant l'exécution s'attachent au run en
+cours, reçoivent ses événements de progression (même run_id) et son résultat
+final, sans aucun appel LLM supplémentaire.
+"""
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class InFlightRun:
+    """Un run en cours et les requêtes qui l'attendent"""
+    key: str
+    run_id: str
+    topic: str
+    started_at: datetime = field(default_factory=datetime.now)
+    followers: int = 0
+    result: Any = None
+    error: Optional[BaseException] = None
+    done: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def _complete(self, result: Any, error: Optional[BaseException]):
+        with self._lock:
+            self.result = result
+            self.error = error
+            self.done = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "topic": self.topic,
+            "started_at": self.started_at.isoformat(),
+            "followers": self.followers
+        }
+
+
+class SingleFlight:
+    """Registre thread-safe des runs en cours, indexés par clé de déduplication"""
+
+    def __init__(self):
+        self._runs: Dict[str, InFlightRun] = {}
+        self._lock = threading.Lock()
+
+    def join_or_start(self, key: Optional[str], run_id: str, topic: str) -> Tuple[InFlightRun, bool]:
+        """
+        S'attache au run en cours pour cette clé, ou en démarre un nouveau
+
+        Sans clé (sujet vide une fois normalisé), le run n'est pas enregistré :
+        aucune autre requête ne peut s'y attacher.
+
+        Returns:
+            (run, leader) — leader est True si l'appelant doit exécuter le flow
+        """
+        if not key:
+            return InFlightRun(key="", run_id=run_id, topic=topic), True
+        with self._lock:
+            run = self._runs.get(key)
+            if run is not None:
+                run.followers += 1
+                return run, False
+            run = InFlightRun(key=key, run_id=run_id, topic=topic)
+            self._runs[key] = run
+            return run, True
+
+    def finish(self, key: str, result: Any = None, error: Optional[BaseException] = None):
+        """Termine le run et le retire du registre : les requêtes suivantes en démarrent un nouveau"""
+        with self._lock:
+            run = self._runs.pop(key, None) if key else None
+        if run is not None:
+            run._complete(result, error)
+
+    def get(self, key: str) -> Optional[InFlightRun]:
+        with self._lock:
+            return self._runs.get(key)
+
+    def list_runs(self) -> List[InFlightRun]:
+        with self._lock:
+            return list(self._runs.values())
+
+
+# Instance singleton
+single_flight = SingleFlight()
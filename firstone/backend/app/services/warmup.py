@@ -0,0 +1,94 @@
+"""
+Préchauffage du flow de recherche en arrière-plan
+
+crewAI, crewai_tools, les SDK des LLM et les agents prennent plusieurs
+secondes à importer. L'application démarre sans eux : le lifespan lance ce
+préchauffage dans un thread, qui importe le module du flow puis applique les
+réglages des modules d'agents, pendant que /health, /metrics et le
+WebSocket répondent déjà. Les imports monopolisent le GIL : ils ne
+commencent qu'après `delay` secondes, le temps que le serveur réponde à ses
+premières sondes. Les routes de recherche attendent la fin du préchauffage
+(`wait` / `join`, qui l'avancent si besoin) avant d'utiliser le flow.
+"""
+import asyncio
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.config import get_settings
+
+# Modules lourds chargés par le préchauffage
+FLOW_MODULES = ("app.services.research_flow",)
+
+
+class Warmup:
+    """Importe les modules lourds une fois, dans un thread, et signale la fin"""
+
+    def __init__(self, modules: Sequence[str] = FLOW_MODULES, delay: float = 0.0):
+        self.modules = list(modules)
+        self.delay = delay
+        self.duration_s: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self._hooks: List[Callable[[], Any]] = []
+        self._done = threading.Event()
+        self._needed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self.error is None
+
+    def start(self, *hooks: Callable[[], Any]) -> None:
+        """Lance le préchauffage ; `hooks` s'exécutent une fois les modules importés"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._hooks.extend(hooks)
+            self._thread = threading.Thread(target=self._run, name="flow-warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        # Une recherche arrivée entre-temps n'attend pas la fin du délai
+        self._needed.wait(self.delay)
+        started = time.perf_counter()
+        try:
+            for module in self.modules:
+                importlib.import_module(module)
+            for hook in self._hooks:
+                hook()
+        except BaseException as e:
+            self.error = e
+            print(f"❌ Préchauffage du flow échoué : {e}")
+        finally:
+            self.duration_s = time.perf_counter() - started
+            self._done.set()
+        if self.error is None:
+            print(f"🔥 Flow de recherche chargé en {self.duration_s:.1f} s")
+
+    def join(self) -> None:
+        """Bloque jusqu'à la fin du préchauffage (le lance si besoin)"""
+        self._needed.set()
+        self.start()
+        self._done.wait()
+        if self.error is not None:
+            raise RuntimeError(f"Chargement du flow de recherche impossible : {self.error}") from self.error
+
+    async def wait(self) -> None:
+        """Comme `join`, sans bloquer la boucle d'événements"""
+        if not self._done.is_set():
+            await asyncio.get_running_loop().run_in_executor(None, self.join)
+        elif self.error is not None:
+            self.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "duration_s": round(self.duration_s, 3) if self.duration_s is not None else None,
+            "error": str(self.error) if self.error is not None else None,
+        }
+
+
+# Instance singleton, lancée par le lifespan de l'application
+warmup = Warmup(delay=get_settings().flow_warmup_delay)
@@ -2,8 +2,20 @@
 from fastapi import WebSocket
 from typing import List, Dict, Any
 import asyncio
+import time
 from datetime import datetime
 
+from firstone.metrics import FAST_BUCKETS, registry
+
+WS_CONNECTIONS = registry.gauge(
+    "firstone_ws_connections", "Clients connected to the progress WebSocket")
+WS_MESSAGES = registry.counter(
+    "firstone_ws_messages_total", "Progress messages sent to clients, by result (sent, failed)",
+    ["result"])
+WS_FANOUT_DURATION = registry.histogram(
+    "firstone_ws_fanout_duration_seconds", "Time to send one progress event to every client",
+    buckets=FAST_BUCKETS)
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
@@ -14,6 +26,7 @@ class ConnectionManager:
         await websocket.accept()
         async with self._lock:
             self.active_connections.append(websocket)
+            WS_CONNECTIONS.set(len(self.active_connections))
         print(f"✅ WebSocket client connected. Total: {len(self.active_connections)}")
 
     async def disconnect(self, websocket: WebSocket):
@@ -21,6 +34,7 @@ class ConnectionManager:
         async with self._lock:
             if websocket in self.active_connections:
                 self.active_connections.remove(websocket)
+            WS_CONNECTIONS.set(len(self.active_connections))
         print(f"❌ WebSocket client disconnected. Total: {len(self.active_connections)}")
 
     async def send_progress(self, message: Dict[str, Any]):
@@ -32,18 +46,24 @@ class ConnectionManager:
         async with self._lock:
             connections_copy = self.active_connections.copy()
         
+        started = time.perf_counter()
         for connection in connections_copy:
             try:
                 await connection.send_json(message)
             except Exception as e:
                 print(f"⚠️ Error sending to client: {e}")
                 disconnected.append(connection)
+        WS_FANOUT_DURATION.observe(time.perf_counter() - started)
+        WS_MESSAGES.inc(len(connections_copy) - len(disconnected), result="sent")
+        if disconnected:
+            WS_MESSAGES.inc(len(disconnected), result="failed")
         
         # Clean up disconnected clients
         for conn in disconnected:
             await self.disconnect(conn)
 
-    async def broadcast(self, agent: str, status: str, message: str = "", details: Dict = None, iteration: int = None):
+    async def broadcast(self, agent: str, status: str, message: str = "", details: Dict = None,
+                        iteration: int = None, run_id: str = None):
         """Broadcast agent progress with structured data"""
         payload = {
             "agent": agent,
@@ -58,6 +78,10 @@ class ConnectionManager:
         if iteration is not None:
             payload["iteration"] = iteration
         
+        # Lets clients attached to the same run (coalesced requests) filter events
+        if run_id is not None:
+            payload["run_id"] = run_id
+        
         await self.send_progress(payload)
         
         # Console logging
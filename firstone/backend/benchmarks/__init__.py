@@ -0,0 +1,6 @@
+"""
+Benchmarks hors ligne du backend (aucun appel réseau ni quota LLM)
+
+À lancer depuis le répertoire backend/ :
+    python -m benchmarks.flow_bench --help
+"""
@@ -0,0 +1,94 @@
+"""
+Outils communs aux benchmarks : environnement isolé, percentiles, rapports
+"""
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = BACKEND_DIR.parent / "src"
+
+
+def prepare_environment(workdir: Optional[str] = None, max_rpm: int = 0) -> Path:
+    """
+    Isole un benchmark : stockage dans un répertoire temporaire, cache de
+    résultats et télémétrie désactivés. À appeler AVANT d'importer app.*
+    """
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="firstone-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.environ.update({
+        "OUTPUT_DIR": str(workdir / "output"),
+        "REPORT_STORE_DIR": str(workdir / "output" / "store"),
+        "RESULT_CACHE_ENABLED": "false",
+        "RESULT_CACHE_PATH": str(workdir / "result_cache.sqlite3"),
+        "PAPER_CATALOG_PATH": str(workdir / "paper_catalog.sqlite3"),
+        "PDF_BACKEND_CACHE_PATH": str(workdir / "pdf_backends.sqlite3"),
+        "FIRSTONE_PDF_BACKEND_CACHE": str(workdir / "pdf_backends.sqlite3"),
+        "FIRSTONE_MAX_RPM": str(max_rpm),
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "CREWAI_TRACING_ENABLED": "false",
+        "OTEL_SDK_DISABLED": "true",
+    })
+    (workdir / "output" / "store").mkdir(parents=True, exist_ok=True)
+    for path in (str(BACKEND_DIR), str(SRC_DIR)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return workdir
+
+
+def percentiles(values: Iterable[float]) -> Dict[str, Optional[float]]:
+    """p50/p90/p95/p99, moyenne et max (interpolation linéaire)"""
+    data = sorted(values)
+    if not data:
+        return {"count": 0, "mean": None, "p50": None, "p90": None, "p95": None, "p99": None, "max": None}
+
+    def pct(q: float) -> float:
+        pos = (len(data) - 1) * q
+        low = int(pos)
+        high = min(low + 1, len(data) - 1)
+        return data[low] + (data[high] - data[low]) * (pos - low)
+
+    return {
+        "count": len(data),
+        "mean": round(sum(data) / len(data), 4),
+        "p50": round(pct(0.50), 4),
+        "p90": round(pct(0.90), 4),
+        "p95": round(pct(0.95), 4),
+        "p99": round(pct(0.99), 4),
+        "max": round(data[-1], 4),
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Contexte d'exécution, pour comparer des rapports entre versions"""
+    import subprocess
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_report(report: Dict[str, Any], path: Optional[str]) -> None:
+    """Écrit le rapport JSON (stdout si path vaut '-')"""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if not path or path == "-":
+        print(text)
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(text + "\n", encoding="utf-8")
+    print(f"📝 Rapport écrit dans {path}")
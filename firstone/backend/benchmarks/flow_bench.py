@@ -0,0 +1,246 @@
+"""
+Benchmark hors ligne du ResearchFlow
+
+Le LLM et les outils arXiv/Serper sont remplacés par les stand-ins locaux de
+firstone.fakes (latence configurable, réponses fixes). Le flow est exécuté :
+- directement (run_flow_sync dans un pool de threads),
+- via l'application FastAPI (POST /api/v1/research/send-with-pdfs, puis
+  suivi du job jusqu'à sa fin),
+à des niveaux de concurrence croissants. Avec --cassette, le mode direct
+rejoue à la place un run enregistré (firstone.cassette), de façon
+déterministe et à pleine vitesse. Le rapport donne les percentiles de
+latence de bout en bout, le débit (runs/min) et le surcoût du framework par
+étape du flow (durée de l'étape moins le temps passé dans le LLM factice, les
+outils et les attentes, d'après les spans de la trace du run).
+
+Exemple :
+    python -m benchmarks.flow_bench --concurrency 1,2,4,8 --runs 8 \\
+        --llm-latency 0.2 --tool-latency 0.05 --output output/bench/flow.json
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import environment_info, percentiles, prepare_environment, write_report
+
+# Spans dont la durée est du temps « externe » simulé (pas du surcoût framework)
+EXTERNAL_SPANS = {"llm.call", "tool.call", "backoff"}
+
+
+def external_ms(node: Dict[str, Any]) -> float:
+    """Temps passé dans les spans externes sous ce nœud (sans double compte)"""
+    if node["name"] in EXTERNAL_SPANS:
+        return node["duration_ms"] or 0.0
+    return sum(external_ms(child) for child in node["children"])
+
+
+def step_overheads(run_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Surcoût par étape du flow (ms), agrégé sur tous les runs"""
+    from firstone.tracing import tracer
+
+    samples: Dict[str, List[float]] = {}
+    totals: Dict[str, List[float]] = {}
+    for run_id in run_ids:
+        for root in tracer.trace_tree(run_id):
+            for step in root["children"]:
+                if step["duration_ms"] is None:
+                    continue
+                samples.setdefault(step["name"], []).append(step["duration_ms"] - external_ms(step))
+                totals.setdefault(step["name"], []).append(step["duration_ms"])
+    return {
+        name: {"overhead_ms": percentiles(values), "step_ms": percentiles(totals[name])}
+        for name, values in samples.items()
+    }
+
+
+def summarize(mode: str, concurrency: int, latencies: List[float], elapsed: float,
+              run_ids: List[str], errors: int) -> Dict[str, Any]:
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "runs": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_minute": round(len(latencies) / elapsed * 60, 2) if elapsed else None,
+        "latency_s": percentiles(latencies),
+        "steps": step_overheads(run_ids),
+    }
+
+
+def bench_direct(concurrency: int, runs: int, cassette: Optional[str] = None) -> Dict[str, Any]:
+    """run_flow_sync dans un pool de `concurrency` threads"""
+    from app.services.research_flow import run_flow_sync
+    from firstone.cassette import Cassette, use_cassette
+
+    def one(i: int):
+        run_id = str(uuid.uuid4())
+        started = time.perf_counter()
+        if cassette:
+            # Chaque run rejoue sa propre copie de la cassette
+            with use_cassette(cassette, "replay"):
+                state = run_flow_sync(Cassette(cassette).header.get("topic", ""), run_id=run_id)
+        else:
+            state = run_flow_sync(f"benchmark topic {uuid.uuid4().hex[:8]} {i}", run_id=run_id)
+        return run_id, time.perf_counter() - started, state.valid
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(runs)))
+    elapsed = time.perf_counter() - started
+    return summarize(
+        "direct", concurrency, [r[1] for r in results], elapsed,
+        [r[0] for r in results], sum(1 for r in results if not r[2]),
+    )
+
+
+async def _bench_api(concurrency: int, runs: int) -> Dict[str, Any]:
+    import httpx
+    from app.main import app
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    accepted: List[float] = []
+    run_ids: List[str] = []
+    errors = 0
+
+    async def one(client: httpx.AsyncClient, i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/v1/research/send-with-pdfs",
+                params={"topic": f"benchmark topic {uuid.uuid4().hex[:8]} {i}", "force_refresh": True},
+            )
+            accepted.append(time.perf_counter() - started)
+            body = response.json() if response.status_code == 200 else {}
+            run_id = body.get("run_id")
+            if run_id:
+                run_ids.append(run_id)
+                # L'endpoint répond tout de suite : suivre le job jusqu'à sa fin
+                while body.get("stage") != "done":
+                    await asyncio.sleep(0.05)
+                    body = (await client.get(f"/api/v1/research/jobs/{run_id}")).json()
+                body = body["response"] or {}
+            latencies.append(time.perf_counter() - started)
+            if body.get("status") != "completed":
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await asyncio.gather(*(one(client, i) for i in range(runs)))
+    elapsed = time.perf_counter() - started
+    result = summarize("api", concurrency, latencies, elapsed, run_ids, errors)
+    result["accepted_s"] = percentiles(accepted)
+    return result
+
+
+def bench_api(concurrency: int, runs: int) -> Dict[str, Any]:
+    """Requêtes HTTP concurrentes sur l'app FastAPI (transport ASGI, sans socket)"""
+    return asyncio.run(_bench_api(concurrency, runs))
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'='*80}")
+    print("📊 FLOW BENCHMARK")
+    print(f"{'='*80}")
+    print(f"{'mode':<8}{'conc':>6}{'runs':>6}{'err':>5}{'runs/min':>10}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}")
+    for r in results:
+        lat = r["latency_s"]
+        print(f"{r['mode']:<8}{r['concurrency']:>6}{r['runs']:>6}{r['errors']:>5}"
+              f"{r['runs_per_minute'] or 0:>10}{lat['p50'] or 0:>9.3f}{lat['p95'] or 0:>9.3f}{lat['p99'] or 0:>9.3f}")
+    print("\nSurcoût framework par étape (ms, p50 / p95) :")
+    for r in results:
+        for step, stats in r["steps"].items():
+            o = stats["overhead_ms"]
+            print(f"  {r['mode']:<7}c={r['concurrency']:<4}{step:<26}{o['p50']:>10.1f} / {o['p95']:.1f}")
+    print(f"{'='*80}\n")
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne du ResearchFlow")
+    parser.add_argument("--mode", choices=["direct", "api", "both"], default="both")
+    parser.add_argument("--concurrency", default="1,2,4",
+                        help="Niveaux de concurrence, séparés par des virgules")
+    parser.add_argument("--runs", type=int, default=4, help="Runs par niveau de concurrence")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Latence simulée d'un appel LLM (s)")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Latence simulée d'un outil (s)")
+    parser.add_argument("--llm-tail-rate", type=float, default=0.0,
+                        help="Part des appels LLM ralentis de --llm-tail-latency (queue de latence)")
+    parser.add_argument("--llm-tail-latency", type=float, default=0.0, help="Ralentissement de ces appels (s)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Variation relative des latences")
+    parser.add_argument("--reject-rate", type=float, default=0.0,
+                        help="Probabilité de rejet par le reviewer (déclenche les retries et leur attente de 10 s)")
+    parser.add_argument("--max-rpm", type=int, default=0, help="Limiteur LLM partagé (0 = désactivé)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--speculative", action="store_true",
+                        help="Synthèse spéculative pendant la revue (FIRSTONE_SPECULATIVE_SYNTHESIS)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Revue article par article pendant la recherche (FIRSTONE_PIPELINED_REVIEW)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Hedging des appels LLM au-delà du p95 récent (FIRSTONE_LLM_HEDGE), sans délai minimal")
+    parser.add_argument("--cassette", default=None,
+                        help="Rejouer ce run enregistré (mode direct uniquement) au lieu des stand-ins")
+    parser.add_argument("--workdir", default=None, help="Répertoire de travail (temporaire par défaut)")
+    parser.add_argument("-o", "--output", default="-", help="Fichier JSON du rapport ('-' pour stdout)")
+    args = parser.parse_args(argv)
+
+    workdir = prepare_environment(args.workdir, max_rpm=args.max_rpm)
+
+    from contextlib import redirect_stdout
+    import io
+    from firstone import fakes
+    fakes.install(llm_latency=args.llm_latency, tool_latency=args.tool_latency,
+                  jitter=args.jitter, reject_rate=args.reject_rate, seed=args.seed,
+                  llm_tail_rate=args.llm_tail_rate, llm_tail_latency=args.llm_tail_latency)
+
+    if args.speculative:
+        from firstone.speculation import set_default_enabled
+        set_default_enabled(True)
+    if args.pipelined:
+        from firstone.review_pipeline import set_default_enabled as set_pipelined_review
+        set_pipelined_review(True)
+    from firstone.model_routing import hedge_policy
+    if args.hedge:
+        hedge_policy.enabled = True
+        # Les latences simulées sont courtes : le p95 seul fixe l'échéance, et
+        # quelques réponses suffisent à l'estimer (un run n'en fait qu'une dizaine)
+        hedge_policy.min_delay = 0.0
+        hedge_policy.min_samples = 5
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    modes = ["direct", "api"] if args.mode == "both" else [args.mode]
+    if args.cassette:
+        # Même sujet à chaque run : via l'API, les runs seraient fusionnés (single-flight)
+        modes = ["direct"]
+    results = []
+    for mode in modes:
+        for concurrency in levels:
+            print(f"⏱️  {mode} concurrency={concurrency} runs={args.runs}...")
+            # Les logs des agents et du flow faussent les mesures : on les absorbe
+            with redirect_stdout(io.StringIO()):
+                if mode == "direct":
+                    results.append(bench_direct(concurrency, args.runs, args.cassette))
+                else:
+                    results.append(bench_api(concurrency, args.runs))
+
+    print_table(results)
+    report = {
+        "benchmark": "flow",
+        "environment": environment_info(),
+        "parameters": {**vars(args), "workdir": str(workdir)},
+        "results": results,
+        "llm_hedging": hedge_policy.stats(),
+    }
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    import os
+    main()
+    # Le bus d'événements de crewAI garde un thread actif à la sortie
+    os._exit(0)
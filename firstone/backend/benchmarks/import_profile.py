@@ -0,0 +1,165 @@
+"""
+Profil du temps d'import et du démarrage de l'API
+
+Chaque module demandé est importé dans un interpréteur neuf avec
+``python -X importtime`` ; le rapport donne son temps d'import total et les
+modules les plus lents, en temps cumulé (avec leurs dépendances) et en temps
+propre, ainsi que le temps cumulé par paquet de premier niveau (crewai,
+crewai_tools, openai...).
+
+Avec --boot, l'application est lancée dans un sous-processus uvicorn et le
+rapport donne le délai entre le lancement du processus et la première
+réponse de /health, puis la fin du préchauffage du flow (services.crewai).
+
+Exemple :
+    python -m benchmarks.import_profile --module app.main \\
+        --module app.services.research_flow --top 15 --boot
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, SRC_DIR, environment_info, prepare_environment, write_report
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_times(module: str) -> List[Dict[str, Any]]:
+    """Lignes de ``-X importtime`` pour l'import de `module` (temps en ms)"""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(BACKEND_DIR), str(SRC_DIR)])}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible :\n{process.stderr[-2000:]}")
+    entries = []
+    for line in process.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            entries.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": len(match.group(3)) // 2,
+            })
+    return entries
+
+
+def profile_module(module: str, top: int) -> Dict[str, Any]:
+    entries = import_times(module)
+    # Les lignes de premier niveau (profondeur 0) couvrent tout l'import
+    total = sum(e["cumulative_ms"] for e in entries if e["depth"] == 0)
+    packages: Dict[str, float] = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        packages[package] = packages.get(package, 0.0) + entry["self_ms"]
+    by_cumulative = sorted(entries, key=lambda e: e["cumulative_ms"], reverse=True)
+    by_self = sorted(entries, key=lambda e: e["self_ms"], reverse=True)
+    return {
+        "module": module,
+        "total_ms": round(total, 1),
+        "modules_imported": len(entries),
+        "slowest_cumulative": [
+            {"module": e["module"], "ms": round(e["cumulative_ms"], 1)} for e in by_cumulative[:top]
+        ],
+        "slowest_self": [{"module": e["module"], "ms": round(e["self_ms"], 1)} for e in by_self[:top]],
+        "packages": [
+            {"package": name, "ms": round(ms, 1)}
+            for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+
+def profile_boot(port: int = 8765, timeout: float = 120.0) -> Dict[str, Any]:
+    """Délais de démarrage : première réponse de /health, puis flow préchauffé"""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(BACKEND_DIR), str(SRC_DIR)])}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "error"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    first_health: Optional[float] = None
+    warmed: Optional[float] = None
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline and warmed is None:
+            if process.poll() is not None:
+                raise RuntimeError("Le serveur s'est arrêté au démarrage")
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0)
+            except httpx.HTTPError:
+                time.sleep(0.02)
+                continue
+            now = time.perf_counter() - started
+            if first_health is None:
+                first_health = now
+            if response.json()["services"].get("crewai"):
+                warmed = now
+            else:
+                time.sleep(0.1)
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {
+        "first_health_ms": round(first_health * 1000, 1) if first_health is not None else None,
+        "flow_ready_ms": round(warmed * 1000, 1) if warmed is not None else None,
+    }
+
+
+def print_profile(profiles: List[Dict[str, Any]], boot: Optional[Dict[str, Any]]) -> None:
+    print(f"\n{'='*80}")
+    print("📊 IMPORT TIME PROFILE")
+    print(f"{'='*80}")
+    for profile in profiles:
+        print(f"\n  {profile['module']}: {profile['total_ms']:.0f} ms ({profile['modules_imported']} modules)")
+        print("    Plus lents (cumulé) :")
+        for entry in profile["slowest_cumulative"]:
+            print(f"      {entry['ms']:>9.1f} ms  {entry['module']}")
+        print("    Par paquet (temps propre) :")
+        for entry in profile["packages"]:
+            print(f"      {entry['ms']:>9.1f} ms  {entry['package']}")
+    if boot:
+        print(f"\n  Démarrage : /health en {boot['first_health_ms']} ms, "
+              f"flow préchauffé en {boot['flow_ready_ms']} ms")
+    print(f"\n{'='*80}\n")
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Profil du temps d'import et du démarrage de l'API")
+    parser.add_argument("--module", action="append", default=None,
+                        help="Module à profiler (répétable, défaut : app.main)")
+    parser.add_argument("--top", type=int, default=15, help="Nombre de modules listés")
+    parser.add_argument("--boot", action="store_true",
+                        help="Mesurer aussi le délai avant la première réponse de /health")
+    parser.add_argument("--port", type=int, default=8765, help="Port du serveur lancé par --boot")
+    parser.add_argument("-o", "--output", default=None, help="Fichier JSON du rapport ('-' pour stdout)")
+    args = parser.parse_args(argv)
+
+    prepare_environment()
+    profiles = [profile_module(module, args.top) for module in args.module or ["app.main"]]
+    boot = profile_boot(args.port) if args.boot else None
+
+    print_profile(profiles, boot)
+    report = {
+        "benchmark": "import_profile",
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "imports": profiles,
+        "boot": boot,
+    }
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
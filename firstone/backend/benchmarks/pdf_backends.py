@@ -0,0 +1,101 @@
+"""
+Comparaison des backends d'extraction PDF et du choix automatique
+
+Pour chaque PDF, le texte des `--max-pages` premières pages est extrait
+avec chaque backend installé (pdfplumber, pypdf, PyPDF2) : meilleur temps
+sur `--repeat` passes, longueur et qualité du texte (firstone.pdf_backends).
+Puis le mode auto : premier passage (échantillonnage de quelques pages et
+choix) et passage suivant (choix retrouvé par l'empreinte du document), à
+comparer à pdfplumber, l'ancien backend par défaut.
+
+Exemple :
+    python -m benchmarks.pdf_backends uploads/pdfs/*.pdf --max-pages 20 \\
+        --output output/bench/pdf_backends.json
+"""
+import argparse
+import glob
+import time
+from typing import Any, Dict, List
+
+from benchmarks.common import BACKEND_DIR, environment_info, prepare_environment, write_report
+
+
+def bench_document(pdf_path: str, max_pages: int, repeat: int) -> Dict[str, Any]:
+    from firstone import pdf_backends
+    from firstone.result_cache import file_digest
+
+    backends = {}
+    for name in pdf_backends.available_backends():
+        pdf_backends.set_default_backend(name)
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            _, pages, _ = pdf_backends.read_pages(pdf_path, max_pages)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        text = "\n".join(page or "" for page in pages)
+        backends[name] = {
+            "seconds": round(best, 4),
+            "chars": len(text),
+            "quality": round(pdf_backends.text_quality(text), 4),
+        }
+
+    # Mode auto, avec une base de choix vide (en mémoire)
+    pdf_backends.set_default_backend(pdf_backends.AUTO, "off")
+    digest = file_digest(pdf_path)
+    passes = []
+    for _ in range(2):
+        started = time.perf_counter()
+        _, _, choice = pdf_backends.read_pages(pdf_path, max_pages, digest)
+        passes.append({"seconds": round(time.perf_counter() - started, 4), "backend": choice.backend,
+                       "source": choice.source, "selection_seconds": round(choice.selection_seconds, 4)})
+    baseline = backends.get("pdfplumber", {}).get("seconds")
+    return {
+        "pdf": pdf_path,
+        "backends": backends,
+        "auto_first": passes[0],
+        "auto_cached": passes[1],
+        "speedup_vs_pdfplumber": round(baseline / passes[1]["seconds"], 2) if baseline else None,
+    }
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'='*80}")
+    print("📊 PDF BACKENDS")
+    print(f"{'='*80}")
+    for result in results:
+        print(f"\n  {result['pdf']}")
+        for name, stats in result["backends"].items():
+            print(f"    {name:<12}{stats['seconds']:>9.3f} s{stats['chars']:>9} car.  qualité {stats['quality']:.3f}")
+        first, cached = result["auto_first"], result["auto_cached"]
+        print(f"    auto → {cached['backend']} : 1er passage {first['seconds']:.3f} s "
+              f"(choix {first['selection_seconds']:.3f} s), suivants {cached['seconds']:.3f} s "
+              f"(x{result['speedup_vs_pdfplumber']} vs pdfplumber)")
+    print(f"\n{'='*80}\n")
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Comparaison des backends d'extraction PDF")
+    parser.add_argument("pdfs", nargs="*", help="PDFs à mesurer (défaut : uploads/pdfs/*.pdf)")
+    parser.add_argument("--max-pages", type=int, default=20, help="Pages extraites par document")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes par backend (meilleur temps retenu)")
+    parser.add_argument("-o", "--output", default=None, help="Fichier JSON du rapport ('-' pour stdout)")
+    args = parser.parse_args(argv)
+
+    prepare_environment()
+    pdfs = args.pdfs or sorted(glob.glob(str(BACKEND_DIR / "uploads" / "pdfs" / "*.pdf")))
+    results = [bench_document(pdf, args.max_pages, args.repeat) for pdf in pdfs]
+
+    print_table(results)
+    report = {
+        "benchmark": "pdf_backends",
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "documents": results,
+    }
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Test de charge du fan-out WebSocket (/api/ws/progress et ConnectionManager)
+
+Le serveur FastAPI réel est lancé dans un sous-processus uvicorn, avec deux
+routes de pilotage propres au benchmark (/__bench/fire et /__bench/stats).
+Ce processus ouvre N clients WebSocket locaux, dont une fraction de clients
+lents (lecture retardée, petite file de réception), puis le serveur émet des
+événements de progression synthétiques à un débit donné via
+ConnectionManager.broadcast, comme le fait le flow.
+
+Mesures :
+- latence de livraison (émission côté serveur -> réception client), clients
+  rapides et lents séparément,
+- retard de la boucle d'événements du serveur pendant l'émission,
+- mémoire (RSS) du serveur par connexion,
+- événements perdus (non reçus avant la fin du délai de vidage) et
+  déconnexions,
+- durée d'un fan-out (histogramme firstone_ws_fanout_duration_seconds).
+
+Exemple :
+    python -m benchmarks.ws_load --clients 1000,5000 --slow-fraction 0.05 \\
+        --events 200 --rate 20 --output output/bench/ws.json --compare output/bench/ws_prev.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import BACKEND_DIR, environment_info, percentiles, prepare_environment, write_report
+
+
+def raise_fd_limit() -> int:
+    """Une connexion = un descripteur de fichier de chaque côté"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def rss_bytes() -> int:
+    """RSS courant du processus (Linux), 0 si indisponible"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+# ====================================
+# Côté serveur (sous-processus)
+# ====================================
+def serve(port: int, backlog: int) -> None:
+    """Lance l'app FastAPI avec les routes de pilotage du benchmark"""
+    raise_fd_limit()
+    prepare_environment()
+
+    import uvicorn
+    from app.main import app
+    from app.websocket_manager import WS_FANOUT_DURATION, manager
+
+    lag_samples: List[float] = []
+    state: Dict[str, Any] = {"probe": None, "firing": None}
+
+    async def probe_loop_lag(interval: float = 0.05):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag_samples.append(max(0.0, loop.time() - expected))
+
+    async def fire(count: int, rate: float, token: str):
+        # Un broadcast par tâche, comme send_ws_update dans le flow
+        interval = 1.0 / rate if rate > 0 else 0.0
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks = []
+        for seq in range(count):
+            delay = start + seq * interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(manager.broadcast(
+                "Bench", "working", f"event {seq}",
+                details={"bench": token, "seq": seq, "sent_at": time.time()},
+            )))
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @app.post("/__bench/fire")
+    async def bench_fire(count: int, rate: float, token: str):
+        lag_samples.clear()
+        if state["probe"] is None:
+            state["probe"] = asyncio.create_task(probe_loop_lag())
+        state["firing"] = asyncio.create_task(fire(count, rate, token))
+        return {"scheduled": count}
+
+    @app.get("/__bench/stats")
+    async def bench_stats():
+        firing = state["firing"]
+        return {
+            "connections": len(manager.active_connections),
+            "rss_bytes": rss_bytes(),
+            "firing_done": firing is None or firing.done(),
+            "loop_lag_s": percentiles(lag_samples),
+            "fanout": WS_FANOUT_DURATION.snapshot(),
+        }
+
+    # Les logs par connexion/événement du serveur ne sont pas mesurés
+    sys.stdout = open(os.devnull, "w")
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error", backlog=backlog)
+
+
+# ====================================
+# Côté clients
+# ====================================
+class ClientStats:
+    def __init__(self, slow: bool):
+        self.slow = slow
+        self.received = 0
+        self.latencies: List[float] = []
+        self.connect_s: Optional[float] = None
+        self.closed_early = False
+
+
+async def run_client(url: str, stats: ClientStats, token: str, expected: int,
+                     slow_delay: float, connected: asyncio.Event, stop: asyncio.Event,
+                     connect_slots: asyncio.Semaphore) -> None:
+    from websockets.asyncio.client import connect
+
+    async with connect_slots:
+        started = time.perf_counter()
+        ws = await connect(url, open_timeout=120, ping_interval=None,
+                           max_queue=4 if stats.slow else 64)
+        stats.connect_s = time.perf_counter() - started
+    connected.set()
+    try:
+        while stats.received < expected and not stop.is_set():
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            message = json.loads(raw)
+            details = message.get("details") or {}
+            if details.get("bench") != token:
+                continue
+            stats.received += 1
+            stats.latencies.append(time.time() - details["sent_at"])
+            if stats.slow:
+                await asyncio.sleep(slow_delay)
+    except Exception:
+        stats.closed_early = True
+    finally:
+        await ws.close()
+
+
+async def get_json(client, path: str) -> Dict[str, Any]:
+    response = await client.get(path)
+    response.raise_for_status()
+    return response.json()
+
+
+async def run_scenario(port: int, clients: int, slow_fraction: float, slow_delay: float,
+                       events: int, rate: float, drain_timeout: float,
+                       connect_concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    base = f"http://127.0.0.1:{port}"
+    url = f"ws://127.0.0.1:{port}/api/ws/progress"
+    token = uuid.uuid4().hex
+    slow_count = int(clients * slow_fraction)
+    stats = [ClientStats(slow=i < slow_count) for i in range(clients)]
+    stop = asyncio.Event()
+    connect_slots = asyncio.Semaphore(connect_concurrency)
+
+    async with httpx.AsyncClient(base_url=base, timeout=60) as http:
+        baseline = await get_json(http, "/__bench/stats")
+
+        events_connected = [asyncio.Event() for _ in stats]
+        tasks = [
+            asyncio.create_task(run_client(url, s, token, events, slow_delay, e, stop, connect_slots))
+            for s, e in zip(stats, events_connected)
+        ]
+        connect_started = time.perf_counter()
+        await asyncio.wait_for(asyncio.gather(*(e.wait() for e in events_connected)), timeout=600)
+        connect_elapsed = time.perf_counter() - connect_started
+
+        # Laisser le serveur enregistrer toutes les connexions
+        for _ in range(100):
+            connected = await get_json(http, "/__bench/stats")
+            if connected["connections"] >= clients:
+                break
+            await asyncio.sleep(0.1)
+
+        fire_started = time.perf_counter()
+        await http.post("/__bench/fire", params={"count": events, "rate": rate, "token": token})
+        deadline = time.perf_counter() + events / rate + drain_timeout if rate > 0 else time.perf_counter() + drain_timeout
+        while time.perf_counter() < deadline and not all(t.done() for t in tasks):
+            await asyncio.sleep(0.2)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        delivery_elapsed = time.perf_counter() - fire_started
+
+        after = await get_json(http, "/__bench/stats")
+
+    fast = [s for s in stats if not s.slow]
+    slow = [s for s in stats if s.slow]
+    expected_total = events * clients
+    received_total = sum(s.received for s in stats)
+    fanout_count = after["fanout"]["count"] - baseline["fanout"]["count"]
+    fanout_sum = after["fanout"]["sum"] - baseline["fanout"]["sum"]
+    rss_delta = connected["rss_bytes"] - baseline["rss_bytes"]
+
+    return {
+        "clients": clients,
+        "slow_clients": slow_count,
+        "events": events,
+        "rate_per_s": rate,
+        "connect_s": percentiles(s.connect_s for s in stats if s.connect_s is not None),
+        "connect_elapsed_s": round(connect_elapsed, 3),
+        "delivery_elapsed_s": round(delivery_elapsed, 3),
+        "delivery_latency_s": {
+            "all": percentiles(l for s in stats for l in s.latencies),
+            "fast": percentiles(l for s in fast for l in s.latencies),
+            "slow": percentiles(l for s in slow for l in s.latencies),
+        },
+        "server_loop_lag_s": after["loop_lag_s"],
+        "server_rss_bytes": after["rss_bytes"],
+        "memory_per_connection_bytes": round(rss_delta / clients) if clients else None,
+        "dropped_events": expected_total - received_total,
+        "dropped_rate": round((expected_total - received_total) / expected_total, 6) if expected_total else 0.0,
+        "clients_missing_events": sum(1 for s in stats if s.received < events),
+        "clients_closed_early": sum(1 for s in stats if s.closed_early),
+        "fanout_mean_s": round(fanout_sum / fanout_count, 6) if fanout_count else None,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, backlog: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.ws_load", "--serve", "--port", str(port), "--backlog", str(backlog)],
+        cwd=BACKEND_DIR,
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Le serveur de benchmark s'est arrêté au démarrage")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.3)
+    process.kill()
+    raise RuntimeError("Le serveur de benchmark n'a pas démarré à temps")
+
+
+# ====================================
+# Rapport et comparaison
+# ====================================
+COMPARED = [
+    ("delivery p50 (s)", lambda r: r["delivery_latency_s"]["all"]["p50"]),
+    ("delivery p99 (s)", lambda r: r["delivery_latency_s"]["all"]["p99"]),
+    ("fast p99 (s)", lambda r: r["delivery_latency_s"]["fast"]["p99"]),
+    ("loop lag p99 (s)", lambda r: r["server_loop_lag_s"]["p99"]),
+    ("mem/conn (B)", lambda r: r["memory_per_connection_bytes"]),
+    ("dropped", lambda r: r["dropped_events"]),
+    ("fan-out mean (s)", lambda r: r["fanout_mean_s"]),
+]
+
+
+def print_results(results: List[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None) -> None:
+    before = {r["clients"]: r for r in (previous or {}).get("results", [])}
+    print(f"\n{'='*80}")
+    print("📊 WEBSOCKET FAN-OUT LOAD TEST")
+    print(f"{'='*80}")
+    for result in results:
+        print(f"\n  {result['clients']} clients ({result['slow_clients']} lents), "
+              f"{result['events']} événements à {result['rate_per_s']}/s")
+        old = before.get(result["clients"])
+        for label, get in COMPARED:
+            value = get(result)
+            line = f"    {label:<20}{value if value is not None else '-':>14}"
+            if old is not None:
+                old_value = get(old)
+                if old_value and value is not None:
+                    line += f"   (avant {old_value}, {((value - old_value) / old_value):+.1%})"
+            print(line)
+    print(f"\n{'='*80}\n")
+
+
+def main(argv: List[str] = None) -> Optional[Dict[str, Any]]:
+    parser = argparse.ArgumentParser(description="Test de charge du fan-out WebSocket")
+    parser.add_argument("--clients", default="1000", help="Nombres de clients, séparés par des virgules")
+    parser.add_argument("--slow-fraction", type=float, default=0.05, help="Part de clients lents")
+    parser.add_argument("--slow-delay", type=float, default=0.2, help="Délai de lecture d'un client lent (s)")
+    parser.add_argument("--events", type=int, default=100, help="Événements émis par scénario")
+    parser.add_argument("--rate", type=float, default=10.0, help="Événements par seconde")
+    parser.add_argument("--drain-timeout", type=float, default=30.0,
+                        help="Attente max après la dernière émission avant de compter les pertes (s)")
+    parser.add_argument("--connect-concurrency", type=int, default=200,
+                        help="Ouvertures de connexion simultanées")
+    parser.add_argument("--compare", default=None, help="Rapport précédent à comparer")
+    parser.add_argument("-o", "--output", default="-", help="Fichier JSON du rapport ('-' pour stdout)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--backlog", type=int, default=2048, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.port, args.backlog)
+        return None
+
+    fd_limit = raise_fd_limit()
+    levels = [int(c) for c in args.clients.split(",") if c.strip()]
+    if max(levels) + 64 > fd_limit:
+        print(f"⚠️  Limite de descripteurs ({fd_limit}) trop basse pour {max(levels)} clients")
+
+    results = []
+    for clients in levels:
+        # Un serveur neuf par scénario : la mémoire par connexion reste comparable
+        port = free_port()
+        server = start_server(port, backlog=max(2048, clients))
+        try:
+            print(f"⏱️  {clients} clients...")
+            results.append(asyncio.run(run_scenario(
+                port, clients, args.slow_fraction, args.slow_delay, args.events,
+                args.rate, args.drain_timeout, args.connect_concurrency,
+            )))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    print_results(results, previous)
+
+    report = {
+        "benchmark": "websocket_fanout",
+        "environment": environment_info(),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("serve", "port", "backlog")},
+        "results": results,
+    }
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
+    # Le serveur importe crewAI, dont le bus d'événements garde un thread actif
+    os._exit(0)
@@ -1,3 +1,10 @@
-from .tools.pdf_reader_tool import read_pdf, PDFReaderTool
-
+# The PDF tool pulls in crewAI: it is imported on first access, so light modules
+# (metrics, rate limiting, caches) don't load the agent machinery
 __all__ = ['read_pdf', 'PDFReaderTool']
+
+
+def __getattr__(name):
+    if name in __all__:
+        from .tools import pdf_reader_tool
+        return getattr(pdf_reader_tool, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
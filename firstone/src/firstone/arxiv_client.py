@@ -0,0 +1,336 @@
+"""
+Batched arXiv API client shared by the whole process.
+
+crewAI's ArxivPaperTool opens a new connection for every search and the
+researcher often follows up paper by paper, each lookup being its own
+request. `ArxivClient` instead:
+
+- coalesces lookups by ID from every thread into ``id_list`` requests (up
+  to 100 IDs each): while one request waits for its slot, the IDs asked for
+  by other agents and runs join it,
+- sends them through the shared HTTP pool (firstone.http_pool), which
+  keeps a single keep-alive connection to arXiv,
+- parses the Atom feed incrementally as it is received and caches entries,
+  so a paper returned by a search is not fetched again by ID,
+- enforces arXiv's pacing rule (one request every 3 seconds, on a single
+  connection) centrally, and honours ``Retry-After`` on 429/503.
+
+FIRSTONE_ARXIV_URL points the client at another server, typically the
+stand-in of firstone.arxiv_standin serving recorded feeds;
+FIRSTONE_ARXIV_INTERVAL changes the pacing (0 for a local stand-in) and
+FIRSTONE_ARXIV_RECORD_DIR saves every feed received, for the stand-in.
+"""
+import hashlib
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from firstone.http_pool import HttpPool, get_http_pool
+from firstone.metrics import ARXIV_BATCH_SIZE, ARXIV_PACING_WAIT, ARXIV_REQUESTS
+from firstone.paper_catalog import arxiv_id
+
+API_URL = "http://export.arxiv.org/api/query"
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+MAX_IDS_PER_REQUEST = 100
+DEFAULT_INTERVAL = 3.0
+USER_AGENT = "firstone-research/0.1 (+https://github.com/iliasofir/Ai_Agent_research)"
+
+
+@dataclass
+class ArxivEntry:
+    """One paper of an arXiv Atom feed"""
+    arxiv_id: str
+    title: str
+    summary: str
+    authors: List[str] = field(default_factory=list)
+    published: str = ""
+    updated: str = ""
+    link: str = ""
+    pdf_url: str = ""
+    categories: List[str] = field(default_factory=list)
+
+    @property
+    def year(self) -> Optional[int]:
+        return int(self.published[:4]) if self.published[:4].isdigit() else None
+
+    def catalog_row(self, origin: str = "arxiv_api") -> Tuple[Any, ...]:
+        """Row for PaperCatalog.add_rows"""
+        return (
+            self.title, ", ".join(self.authors), self.year, f"arXiv:{self.arxiv_id}",
+            self.link or f"https://arxiv.org/abs/{self.arxiv_id}", self.summary,
+            " ".join(self.categories), origin,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _text(element: ET.Element, tag: str) -> str:
+    child = element.find(tag)
+    return " ".join(child.text.split()) if child is not None and child.text else ""
+
+
+def entry_from_element(element: ET.Element) -> Optional[ArxivEntry]:
+    """ArxivEntry for an Atom <entry>, None for arXiv's error entries"""
+    identifier = arxiv_id(_text(element, f"{ATOM}id"))
+    if not identifier:
+        return None
+    link = pdf_url = ""
+    for link_element in element.findall(f"{ATOM}link"):
+        if link_element.get("title") == "pdf":
+            pdf_url = link_element.get("href", "")
+        elif link_element.get("rel") == "alternate":
+            link = link_element.get("href", "")
+    return ArxivEntry(
+        arxiv_id=identifier,
+        title=_text(element, f"{ATOM}title"),
+        summary=_text(element, f"{ATOM}summary"),
+        authors=[_text(author, f"{ATOM}name") for author in element.findall(f"{ATOM}author")],
+        published=_text(element, f"{ATOM}published"),
+        updated=_text(element, f"{ATOM}updated"),
+        link=link,
+        pdf_url=pdf_url,
+        categories=[c.get("term", "") for c in element.findall(f"{ATOM}category") if c.get("term")],
+    )
+
+
+def parse_feed(chunks: Iterable[bytes]) -> Iterator[ArxivEntry]:
+    """Entries of an Atom feed, yielded as soon as each one is received"""
+    parser = ET.XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if element.tag == f"{ATOM}entry":
+                entry = entry_from_element(element)
+                element.clear()
+                if entry is not None:
+                    yield entry
+    parser.close()
+
+
+class Pacer:
+    """Minimum interval between requests, shared by every thread"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def wait(self) -> float:
+        """Block until this caller's slot, returns the time spent waiting"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+            delay = slot - now
+            if delay > 0:
+                self.waits += 1
+                self.wait_seconds += delay
+        if delay > 0:
+            time.sleep(delay)
+        ARXIV_PACING_WAIT.observe(delay)
+        return delay
+
+    def defer(self, seconds: float) -> None:
+        """Push the next slot back (server asked to retry later)"""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+class ArxivClient:
+    """Thread-safe arXiv API client: batched ID lookups, paced requests, entry cache"""
+
+    def __init__(
+        self,
+        base_url: str = API_URL,
+        interval: float = DEFAULT_INTERVAL,
+        pool: Optional[HttpPool] = None,
+        max_retries: int = 3,
+        cache_entries: int = 4096,
+        record_dir: Optional[Union[str, Path]] = None,
+    ):
+        self.base_url = base_url
+        self.pacer = Pacer(interval)
+        self.max_retries = max_retries
+        self.cache_entries = cache_entries
+        self.record_dir = Path(record_dir) if record_dir else None
+        self._pool = pool
+        self._entries: "OrderedDict[str, ArxivEntry]" = OrderedDict()
+        self._pending: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.requests = 0
+        self.ids_requested = 0
+        self.cache_hits = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+
+    def search(self, query: str, max_results: int = 5, start: int = 0) -> List[ArxivEntry]:
+        """One ``search_query`` request, e.g. ``all:"graph neural networks"``"""
+        params = {"search_query": query, "start": start, "max_results": max_results}
+        entries = self._request(params, kind="search")
+        self._remember(entries)
+        return entries
+
+    def fetch(self, ids: Sequence[str]) -> Dict[str, ArxivEntry]:
+        """
+        Entries by arXiv ID (URLs, ``arXiv:`` prefixes and versions accepted).
+
+        IDs already cached are answered locally; the others are queued and
+        fetched by ``id_list`` requests shared with concurrent callers. IDs
+        unknown to arXiv are missing from the result.
+        """
+        wanted = list(dict.fromkeys(filter(None, (arxiv_id(i) or arxiv_id(f"arxiv:{i}") for i in ids))))
+        found: Dict[str, ArxivEntry] = {}
+        futures: Dict[str, Future] = {}
+        with self._lock:
+            for identifier in wanted:
+                entry = self._entries.get(identifier)
+                if entry is not None:
+                    self._entries.move_to_end(identifier)
+                    self.cache_hits += 1
+                    found[identifier] = entry
+                else:
+                    futures[identifier] = self._pending.setdefault(identifier, Future())
+        while not all(f.done() for f in futures.values()):
+            # One caller at a time sends a batch; the others' IDs ride along
+            with self._flush_lock:
+                if not all(f.done() for f in futures.values()):
+                    self._flush()
+        for identifier, future in futures.items():
+            entry = future.result()
+            if entry is not None:
+                found[identifier] = entry
+        return found
+
+    def get(self, identifier: str) -> Optional[ArxivEntry]:
+        return next(iter(self.fetch([identifier]).values()), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cached, pending = len(self._entries), len(self._pending)
+        return {
+            "base_url": self.base_url,
+            "requests": self.requests,
+            "ids_requested": self.ids_requested,
+            "cache_hits": self.cache_hits,
+            "cached_entries": cached,
+            "pending_ids": pending,
+            "pacing_interval": self.pacer.interval,
+            "pacing_waits": self.pacer.waits,
+            "pacing_wait_seconds": round(self.pacer.wait_seconds, 3),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+
+    def _flush(self) -> None:
+        """Send one ``id_list`` request for the queued IDs (called under _flush_lock)"""
+        # Wait for the slot first: IDs queued meanwhile join this batch
+        self.pacer.wait()
+        with self._lock:
+            batch = list(self._pending.items())[:MAX_IDS_PER_REQUEST]
+            for identifier, _ in batch:
+                del self._pending[identifier]
+        if not batch:
+            return
+        ARXIV_BATCH_SIZE.observe(len(batch))
+        params = {"id_list": ",".join(i for i, _ in batch), "max_results": len(batch)}
+        try:
+            entries = self._request(params, kind="id_list", paced=True)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self._remember(entries)
+        by_id = {entry.arxiv_id: entry for entry in entries}
+        with self._lock:
+            self.ids_requested += len(batch)
+        for identifier, future in batch:
+            future.set_result(by_id.get(identifier))
+
+    def _request(self, params: Dict[str, Any], kind: str, paced: bool = False) -> List[ArxivEntry]:
+        for attempt in range(self.max_retries + 1):
+            if not paced or attempt:
+                self.pacer.wait()
+            with self._lock:
+                self.requests += 1
+            try:
+                pool = self._pool or get_http_pool()
+                headers = {"User-Agent": USER_AGENT}
+                with pool.stream("GET", self.base_url, params=params, headers=headers) as (response, body):
+                    if response.status_code in (429, 503) and attempt < self.max_retries:
+                        ARXIV_REQUESTS.inc(kind=kind, outcome="retry")
+                        self.pacer.defer(_retry_after(response, self.pacer.interval * 2 ** attempt))
+                        continue
+                    response.raise_for_status()
+                    entries = list(parse_feed(self._recorded(body, params)))
+            except Exception:
+                ARXIV_REQUESTS.inc(kind=kind, outcome="error")
+                raise
+            ARXIV_REQUESTS.inc(kind=kind, outcome="ok")
+            return entries
+        raise RuntimeError("unreachable")
+
+    def _recorded(self, chunks: Iterable[bytes], params: Dict[str, Any]) -> Iterator[bytes]:
+        """Pass the feed through, saving a copy under record_dir if set"""
+        if self.record_dir is None:
+            yield from chunks
+            return
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        key = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:16]
+        with open(self.record_dir / f"{key}.atom", "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+
+    def _remember(self, entries: Iterable[ArxivEntry]) -> None:
+        with self._lock:
+            for entry in entries:
+                self._entries[entry.arxiv_id] = entry
+                self._entries.move_to_end(entry.arxiv_id)
+            while len(self._entries) > self.cache_entries:
+                self._entries.popitem(last=False)
+
+
+def _retry_after(response: httpx.Response, default: float) -> float:
+    try:
+        return float(response.headers.get("Retry-After", default))
+    except ValueError:
+        return default
+
+
+_default_client: Optional[ArxivClient] = None
+_default_lock = threading.Lock()
+
+
+def get_arxiv_client() -> ArxivClient:
+    """Process-wide client (FIRSTONE_ARXIV_URL, FIRSTONE_ARXIV_INTERVAL, FIRSTONE_ARXIV_RECORD_DIR)"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = ArxivClient(
+                base_url=os.getenv("FIRSTONE_ARXIV_URL", API_URL),
+                interval=float(os.getenv("FIRSTONE_ARXIV_INTERVAL", str(DEFAULT_INTERVAL))),
+                record_dir=os.getenv("FIRSTONE_ARXIV_RECORD_DIR") or None,
+            )
+        return _default_client
+
+
+def set_arxiv_client(client: Optional[ArxivClient]) -> None:
+    """Use `client` as the process default (None: rebuild from the environment)"""
+    global _default_client
+    with _default_lock:
+        _default_client = client
@@ -0,0 +1,183 @@
+"""
+Local stand-in for the arXiv API, serving recorded Atom feeds.
+
+Feeds saved by the client (FIRSTONE_ARXIV_RECORD_DIR, see arxiv_client.py)
+or downloaded by hand from export.arxiv.org are loaded from a directory.
+``id_list`` requests are answered from every entry found in them, and
+``search_query`` requests with the recorded feed of the same query, or
+failing that with the entries whose title and summary contain the most
+query terms. The server speaks HTTP/1.1 keep-alive, like arXiv, and keeps a
+log of the requests it received so connection reuse and batching can be
+checked.
+
+    with ArxivStandIn("tests/feeds") as server:
+        client = ArxivClient(base_url=server.url, interval=0)
+        client.fetch(["2301.00001", "2301.00002"])
+        assert len(server.requests) == 1
+
+or, to point a whole run at it:
+
+    python -m firstone.arxiv_standin feeds/ --port 8765
+    FIRSTONE_ARXIV_URL=http://127.0.0.1:8765/api/query FIRSTONE_ARXIV_INTERVAL=0 firstone
+"""
+import argparse
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+from firstone.arxiv_client import ATOM, entry_from_element
+from firstone.paper_catalog import arxiv_id
+
+ATOM_NS = ATOM.strip("{}")
+ET.register_namespace("", ATOM_NS)
+ET.register_namespace("arxiv", "http://arxiv.org/schemas/atom")
+ET.register_namespace("opensearch", "http://a9.com/-/spec/opensearch/1.1/")
+
+# arXiv titles its feeds "ArXiv Query: search_query=...&id_list=&start=0&max_results=5"
+_FEED_QUERY = re.compile(r"search_query=(.*?)&id_list=")
+
+
+class ArxivStandIn:
+    """Threaded HTTP server answering like export.arxiv.org/api/query"""
+
+    def __init__(self, feeds_dir: Optional[Union[str, Path]] = None, host: str = "127.0.0.1",
+                 port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.entries: Dict[str, bytes] = {}
+        self.texts: Dict[str, str] = {}
+        self.feeds: Dict[str, List[str]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        if feeds_dir:
+            for path in sorted(Path(feeds_dir).glob("*")):
+                if path.suffix in (".atom", ".xml"):
+                    self.load_feed(path.read_bytes())
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/query"
+
+    @property
+    def connections(self) -> int:
+        """Distinct client connections seen (1 when the client keeps its connection alive)"""
+        with self._lock:
+            return len({r["client"] for r in self.requests})
+
+    def load_feed(self, data: bytes) -> List[str]:
+        """Index the entries of one Atom feed, returns their IDs"""
+        root = ET.fromstring(data)
+        ids = []
+        for element in root.findall(f"{ATOM}entry"):
+            entry = entry_from_element(element)
+            if entry is None:
+                continue
+            self.entries[entry.arxiv_id] = ET.tostring(element)
+            self.texts[entry.arxiv_id] = f"{entry.title} {entry.summary}".lower()
+            ids.append(entry.arxiv_id)
+        title = root.findtext(f"{ATOM}title") or ""
+        match = _FEED_QUERY.search(title)
+        if match and "id_list=&" in title:
+            self.feeds[_normalize_query(match.group(1))] = ids
+        return ids
+
+    def answer(self, params: Dict[str, str]) -> List[str]:
+        """IDs of the entries returned for a query"""
+        max_results = int(params.get("max_results", 10))
+        start = int(params.get("start", 0))
+        if params.get("id_list"):
+            ids = [arxiv_id(i) or i for i in params["id_list"].split(",")]
+            return [i for i in ids if i in self.entries][:max_results]
+        query = _normalize_query(params.get("search_query", ""))
+        if query in self.feeds:
+            return self.feeds[query][start:start + max_results]
+        terms = [t for t in re.findall(r"\w+", query) if len(t) > 2 and t != "all"]
+        scored = sorted(
+            ((sum(t in text for t in terms), i) for i, text in self.texts.items()),
+            key=lambda item: -item[0],
+        )
+        return [i for score, i in scored if score][start:start + max_results]
+
+    def render(self, ids: List[str], params: Dict[str, str]) -> bytes:
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        return (
+            f'<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="{ATOM_NS}">'
+            f"<title>ArXiv Query: {_escape(query)}</title>"
+        ).encode() + b"".join(self.entries[i] for i in ids) + b"</feed>"
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                with standin._lock:
+                    standin.requests.append({"params": params, "client": self.client_address, "at": time.time()})
+                if standin.latency:
+                    time.sleep(standin.latency)
+                body = standin.render(standin.answer(params), params)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/atom+xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "ArxivStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "ArxivStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve recorded arXiv feeds on a local port")
+    parser.add_argument("feeds_dir", help="Directory of recorded .atom/.xml feeds")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay added to every response (s)")
+    args = parser.parse_args(argv)
+
+    server = ArxivStandIn(args.feeds_dir, args.host, args.port, args.latency)
+    print(f"📚 {len(server.entries)} entries, {len(server.feeds)} recorded queries")
+    print(f"🌐 FIRSTONE_ARXIV_URL={server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Batch research runner: ``firstone batch [topics.txt] --concurrency 2``
+
+Topics are read one per line (or as JSON objects with a "topic" key) from a
+file or stdin. Runs execute concurrently under the process-wide LLM rate
+limiter and tool cache, completed topics go through the result cache, and
+every finished run is streamed as one JSON line. A throughput summary closes
+the stream.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, List
+
+from firstone import early_stop, review_pipeline, speculation
+from firstone.http_pool import http_pool_stats
+from firstone.model_routing import hedge_policy, model_health
+from firstone.main import ResearchFlow
+from firstone.rate_limit import shared_rate_limiter
+from firstone.result_cache import get_result_cache
+from firstone.run_context import get_run_stats, set_default_token_budget
+from firstone.tools.tool_cache import shared_tool_cache
+
+
+def read_topics(stream: IO[str]) -> List[str]:
+    """Parse topics, skipping blank lines and '#' comments"""
+    topics = []
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            topic = json.loads(line).get("topic", "").strip()
+            if topic:
+                topics.append(topic)
+        else:
+            topics.append(line)
+    return topics
+
+
+class BatchRunner:
+    """Runs many topics with bounded concurrency and streams JSONL results"""
+
+    def __init__(self, output: IO[str], concurrency: int = 2,
+                 use_cache: bool = True, force_refresh: bool = False):
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.use_cache = use_cache
+        self.force_refresh = force_refresh
+        self.result_cache = get_result_cache() if use_cache else None
+        self._write_lock = threading.Lock()
+        self.records: List[Dict[str, Any]] = []
+
+    def _emit(self, record: Dict[str, Any]) -> None:
+        with self._write_lock:
+            self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.output.flush()
+            if record.get("type") == "result":
+                self.records.append(record)
+
+    def run_topic(self, topic: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        record: Dict[str, Any] = {"type": "result", "topic": topic}
+
+        if self.result_cache and not self.force_refresh:
+            hit = self.result_cache.lookup(topic)
+            if hit:
+                record.update(
+                    status="cached",
+                    run_id=hit.run_id,
+                    similarity=round(hit.similarity, 3),
+                    elapsed_s=round(time.monotonic() - started, 3),
+                    llm_calls=0,
+                )
+                return record
+
+        flow = ResearchFlow()
+        flow.state.topic = topic
+        flow.state.current_year = str(datetime.now().year)
+        record["run_id"] = flow.state.id
+        try:
+            flow.kickoff()
+            record["status"] = "completed" if flow.state.valid else "failed"
+            record["iterations"] = flow.state.retry_count
+            # A short synthesis written under budget pressure is not a full result
+            if flow.state.valid and not flow.state.budget_action and self.result_cache:
+                self.result_cache.put(topic, flow.state.id)
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+
+        stats = get_run_stats(flow.state.id)
+        record["elapsed_s"] = round(time.monotonic() - started, 3)
+        record["llm_calls"] = stats.llm_calls if stats else 0
+        record["tool_calls"] = stats.tool_calls if stats else 0
+        record["rate_limited"] = stats.rate_limited if stats else 0
+        record["total_tokens"] = stats.total_tokens if stats else 0
+        if flow.state.budget_action:
+            record["budget_action"] = flow.state.budget_action
+        return record
+
+    def run(self, topics: Iterable[str]) -> Dict[str, Any]:
+        topics = list(topics)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix="firstone-batch") as pool:
+            futures = [pool.submit(self.run_topic, topic) for topic in topics]
+            for future in as_completed(futures):
+                self._emit(future.result())
+
+        summary = self.summary(time.monotonic() - started)
+        self._emit({"type": "summary", **summary})
+        return summary
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        executed = [r for r in self.records if r["status"] != "cached"]
+        llm_calls = sum(r.get("llm_calls", 0) for r in executed)
+        tokens = sum(r.get("total_tokens", 0) for r in executed)
+        by_status: Dict[str, int] = {}
+        for record in self.records:
+            by_status[record["status"]] = by_status.get(record["status"], 0) + 1
+        return {
+            "runs": len(self.records),
+            "by_status": by_status,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "runs_per_hour": round(len(self.records) / elapsed * 3600, 2) if elapsed else 0.0,
+            "llm_calls_per_run": round(llm_calls / len(executed), 2) if executed else 0.0,
+            "tokens_per_run": round(tokens / len(executed)) if executed else 0,
+            "tool_cache": shared_tool_cache.stats(),
+            "result_cache": self.result_cache.stats() if self.result_cache else None,
+            "rate_limiter": shared_rate_limiter.stats(),
+            "http_pool": http_pool_stats(),
+            "llm_models": model_health.stats(),
+            "llm_hedging": hedge_policy.stats(),
+        }
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(prog="firstone batch", description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", nargs="?", default="-",
+                        help="File with one topic per line ('-' for stdin)")
+    parser.add_argument("-c", "--concurrency", type=int, default=2,
+                        help="Number of research flows running at the same time")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--max-rpm", type=int, default=None,
+                        help="Shared LLM requests per minute across all runs")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Token budget per run (0 for none; default FIRSTONE_RUN_TOKEN_BUDGET)")
+    parser.add_argument("--speculative-synthesis", action="store_true",
+                        help="Start each synthesis during its review (kept if approved)")
+    parser.add_argument("--pipelined-review", action="store_true",
+                        help="Review each paper while the research is still running")
+    parser.add_argument("--early-stop-papers", type=int, default=None,
+                        help="Stop the researcher once it has found this many qualifying papers (0: never)")
+    parser.add_argument("--hedge-llm", action="store_true",
+                        help="Duplicate LLM calls slower than their model's recent p95 (first answer wins)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't read or write the completed-result cache")
+    parser.add_argument("--force-refresh", action="store_true",
+                        help="Ignore cached results but still record new ones")
+    args = parser.parse_args(argv)
+
+    if args.max_rpm is not None:
+        shared_rate_limiter.max_per_minute = args.max_rpm
+    if args.token_budget is not None:
+        set_default_token_budget(args.token_budget)
+    if args.speculative_synthesis:
+        speculation.set_default_enabled(True)
+    if args.pipelined_review:
+        review_pipeline.set_default_enabled(True)
+    if args.early_stop_papers is not None:
+        early_stop.set_default_target(args.early_stop_papers)
+    if args.hedge_llm:
+        hedge_policy.enabled = True
+
+    if args.input == "-":
+        topics = read_topics(sys.stdin)
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            topics = read_topics(f)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    runner = BatchRunner(output, concurrency=args.concurrency,
+                         use_cache=not args.no_cache, force_refresh=args.force_refresh)
+
+    print(f"🚀 Batch: {len(topics)} topic(s), concurrency {runner.concurrency}", file=sys.stderr)
+    try:
+        # Keep stdout for JSONL: flow and crew logging goes to stderr
+        with redirect_stdout(sys.stderr):
+            summary = runner.run(topics)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"\n{'='*80}", file=sys.stderr)
+    print(f"📊 BATCH SUMMARY", file=sys.stderr)
+    print(f"{'='*80}", file=sys.stderr)
+    print(f"  Runs: {summary['runs']} {summary['by_status']}", file=sys.stderr)
+    print(f"  Throughput: {summary['runs_per_hour']} runs/hour", file=sys.stderr)
+    print(f"  LLM calls per run: {summary['llm_calls_per_run']}", file=sys.stderr)
+    print(f"  Tokens per run: {summary['tokens_per_run']}", file=sys.stderr)
+    print(f"  Tool cache hit rate: {summary['tool_cache']['hit_rate']:.1%}", file=sys.stderr)
+    if summary["result_cache"]:
+        print(f"  Result cache hit rate: {summary['result_cache']['hit_rate']:.1%}", file=sys.stderr)
+    print(f"{'='*80}\n", file=sys.stderr)
+    return summary
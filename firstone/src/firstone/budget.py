@@ -0,0 +1,77 @@
+"""
+Token budget policy for research runs.
+
+Each run's token usage and budget live on its RunStats (see run_context). The
+flows ask this module before spending more: whether another research/review
+round still fits, and whether the synthesis can be the full report or has to
+be a shorter one. When a run is over budget it takes the cheaper path instead
+of running out the provider quota.
+
+Estimates count ~4 characters per token, close enough to choose a path.
+"""
+from typing import Optional
+
+from firstone.metrics import FLOW_BUDGET_ACTIONS
+from firstone.run_context import RunStats, current_run
+
+CHARS_PER_TOKEN = 4
+
+# Rough cost of each step beyond the research text it re-sends
+RESEARCH_ROUND_TOKENS = 20_000  # researcher turns with tool results, plus the review
+FULL_SYNTHESIS_TOKENS = 8_000  # 3000-5000 words of output
+SHORT_SYNTHESIS_TOKENS = 2_000
+
+SKIP_RETRY = "skip_retry"
+SHORT_SYNTHESIS = "short_synthesis"
+
+SHORT_SYNTHESIS_EXPECTED_OUTPUT = (
+    "A concise markdown synthesis report (600-1000 words) formatted without '```' code blocks, "
+    "with an Executive Summary, the Main Findings grouped by theme, Conclusions and a References list."
+)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return len(text or "") // CHARS_PER_TOKEN
+
+
+def _remaining(run: Optional[RunStats]) -> Optional[int]:
+    run = run if run is not None else current_run()
+    return run.tokens_remaining if run is not None else None
+
+
+def can_retry(research: str, run: Optional[RunStats] = None) -> bool:
+    """True if another research + review round fits, leaving room for a short synthesis"""
+    remaining = _remaining(run)
+    if remaining is None:
+        return True
+    # The retry prompt carries the feedback, the review and synthesis re-send the research
+    needed = RESEARCH_ROUND_TOKENS + SHORT_SYNTHESIS_TOKENS + 2 * estimate_tokens(research)
+    return remaining >= needed
+
+
+def use_short_synthesis(research: str, run: Optional[RunStats] = None) -> bool:
+    """True if the full synthesis report no longer fits in the run's budget"""
+    remaining = _remaining(run)
+    if remaining is None:
+        return False
+    return remaining < FULL_SYNTHESIS_TOKENS + estimate_tokens(research)
+
+
+def record_action(action: str) -> None:
+    FLOW_BUDGET_ACTIONS.inc(action=action)
+
+
+def short_synthesis_description(topic: str, research: str, iterations: int) -> str:
+    """Task description for the budget-constrained synthesis"""
+    return f"""
+Write a SHORT synthesis report on {topic} using the approved research papers below.
+The token budget for this run is nearly spent: stay within 600-1000 words.
+
+APPROVED RESEARCH PAPERS:
+{research}
+
+REVIEW STATUS: APPROVED after {iterations} iteration(s)
+
+Include only: Executive Summary (one paragraph), Main Findings (3-5 themes, a few
+sentences each, citing papers), Conclusions, References (title and link per paper).
+"""
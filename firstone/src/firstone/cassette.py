@@ -0,0 +1,301 @@
+"""
+Record/replay cassettes for LLM and tool traffic.
+
+While a cassette is recording, every LLM call made through `ManagedLLM` and
+every tool call made through `CachedTool` is appended to a JSONL file
+(request fingerprint, response, token counts). Replaying the cassette re-runs
+the same flow offline: LLM and tool calls are answered from the file, the
+rate limiter and backoff sleeps are skipped, and no provider client or API
+key is needed. This makes the Python side of the pipeline deterministic
+enough to profile and compare between versions.
+
+    firstone cassette record "LLM agents" -o run.cassette.jsonl
+    firstone cassette replay run.cassette.jsonl --profile run.prof
+
+The cassette is bound to the current context, so concurrent runs in one
+process don't share it. ``FIRSTONE_CASSETTE`` / ``FIRSTONE_CASSETTE_MODE``
+apply one to every flow run (``{run_id}`` in the path is substituted).
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from crewai.llms.base_llm import BaseLLM
+
+MODES = ("record", "replay")
+FORMAT_VERSION = 1
+
+
+class CassetteMiss(LookupError):
+    """A replayed run made a call the cassette has no answer for"""
+
+
+def fingerprint(kind: str, name: str, payload: Any) -> str:
+    data = json.dumps([kind, name, payload], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _messages_payload(messages: Any) -> Any:
+    if isinstance(messages, str):
+        return messages
+    return [{"role": m.get("role"), "content": m.get("content")} for m in messages]
+
+
+class Cassette:
+    """One recorded run: a header line followed by one line per call"""
+
+    def __init__(self, path: str, mode: str = "replay", strict: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {MODES}")
+        self.path = Path(path)
+        self.mode = mode
+        self.strict = strict
+        self.header: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # Replay: answers by fingerprint, and by (kind, name) in recorded order
+        self._by_key: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._by_name: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.hits = 0
+        self.order_fallbacks = 0
+        self.recorded = 0
+        self._file = None
+
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("type") == "header":
+                    self.header = entry
+                    continue
+                self._by_key[entry["key"]].append(entry)
+                self._by_name[(entry["type"], entry["name"])].append(entry)
+
+    def start(self, **header: Any) -> None:
+        """Open the file for recording and write the header"""
+        if not self.recording:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.header = {"type": "header", "version": FORMAT_VERSION, "created_at": time.time(), **header}
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write(self.header)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        # One flushed line per call, so an interrupted run keeps what it recorded
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+
+    def record(self, kind: str, name: str, payload: Any, response: Any, **extra: Any) -> None:
+        if not self.recording or self._file is None:
+            return
+        self._write({
+            "type": kind,
+            "name": name,
+            "key": fingerprint(kind, name, payload),
+            "response": response,
+            **extra,
+        })
+        self.recorded += 1
+
+    def replay(self, kind: str, name: str, payload: Any) -> Dict[str, Any]:
+        """Recorded entry for this call; falls back to recorded order on a mismatch"""
+        key = fingerprint(kind, name, payload)
+        with self._lock:
+            answers = self._by_key.get(key)
+            if answers:
+                entry = answers.popleft()
+                self._by_name[(kind, name)].remove(entry)
+                self.hits += 1
+                return entry
+            if self.strict or not self._by_name.get((kind, name)):
+                raise CassetteMiss(f"No recorded {kind} call for {name!r} in {self.path}")
+            # Prompts can differ slightly (dates, paths): take the next call of this name
+            entry = self._by_name[(kind, name)].popleft()
+            self._by_key[entry["key"]].remove(entry)
+            self.order_fallbacks += 1
+            return entry
+
+    # LLM traffic (see ManagedLLM)
+    def record_llm(self, agent_name: str, messages: Any, response: Any,
+                   tokens: Optional[Dict[str, int]] = None, llm: Optional[BaseLLM] = None) -> None:
+        # Capabilities change how the agent executor parses answers: keep them
+        profile = {
+            "model": getattr(llm, "model", ""),
+            "stop_words": llm.supports_stop_words() if llm else True,
+            "function_calling": llm.supports_function_calling() if llm else False,
+        }
+        self.record("llm", agent_name, _messages_payload(messages), response,
+                    tokens=tokens or {}, **profile)
+
+    def llm_profile(self, agent_name: str) -> Dict[str, Any]:
+        """Model and capabilities recorded for an agent's LLM"""
+        with self._lock:
+            entries = self._by_name.get(("llm", agent_name))
+            entry = entries[0] if entries else {}
+        return {
+            "model": entry.get("model") or "replay",
+            "stop_words": entry.get("stop_words", True),
+            "function_calling": entry.get("function_calling", False),
+        }
+
+    def replay_llm(self, agent_name: str, messages: Any) -> Dict[str, Any]:
+        return self.replay("llm", agent_name, _messages_payload(messages))
+
+    # Tool traffic (see CachedTool)
+    def record_tool(self, tool_name: str, arguments: Dict[str, Any], result: Any) -> None:
+        self.record("tool", tool_name, arguments, result)
+
+    def replay_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        return self.replay("tool", tool_name, arguments)["response"]
+
+    def stats(self) -> Dict[str, Any]:
+        remaining = sum(len(v) for v in self._by_name.values())
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            "recorded": self.recorded,
+            "replayed": self.hits + self.order_fallbacks,
+            "order_fallbacks": self.order_fallbacks,
+            "unused": remaining,
+        }
+
+
+class ReplayLLM(BaseLLM):
+    """Provider stand-in while replaying: calls never reach it"""
+
+    def __init__(self, model: str = "replay", stop_words: bool = True, function_calling: bool = False):
+        super().__init__(model=model, temperature=0.0, provider="replay")
+        self._stop_words = stop_words
+        self._function_calling = function_calling
+
+    @classmethod
+    def for_agent(cls, cassette: "Cassette", agent_name: str) -> "ReplayLLM":
+        return cls(**cassette.llm_profile(agent_name))
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None) -> str:
+        raise CassetteMiss("ReplayLLM is only a placeholder, calls are answered by the cassette")
+
+    def supports_function_calling(self) -> bool:
+        return self._function_calling
+
+    def supports_stop_words(self) -> bool:
+        return self._stop_words
+
+    def get_context_window_size(self) -> int:
+        return 1_000_000
+
+
+_active: ContextVar[Optional[Cassette]] = ContextVar("firstone_cassette", default=None)
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active.get()
+
+
+def replaying() -> bool:
+    cassette = _active.get()
+    return cassette is not None and cassette.replaying
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "replay", strict: bool = False,
+                 **header: Any) -> Iterator[Cassette]:
+    """Record or replay the LLM/tool calls made inside the block"""
+    cassette = Cassette(path, mode, strict=strict)
+    cassette.start(**header)
+    token = _active.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active.reset(token)
+        cassette.close()
+
+
+@contextmanager
+def cassette_from_env(run_id: str, **header: Any) -> Iterator[Optional[Cassette]]:
+    """Apply FIRSTONE_CASSETTE to a run, unless a cassette is already active"""
+    path = os.getenv("FIRSTONE_CASSETTE", "")
+    if not path or _active.get() is not None:
+        yield _active.get()
+        return
+    mode = os.getenv("FIRSTONE_CASSETTE_MODE", "replay")
+    with use_cassette(path.replace("{run_id}", run_id), mode, **header) as cassette:
+        yield cassette
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    """``firstone cassette record|replay``: run the CLI flow against a cassette"""
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(prog="firstone cassette", description=main.__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+    record = sub.add_parser("record", help="Run a topic for real and record its traffic")
+    record.add_argument("topic")
+    record.add_argument("-o", "--output", required=True, help="Cassette file to write")
+    replay = sub.add_parser("replay", help="Re-run a recorded flow offline")
+    replay.add_argument("cassette")
+    replay.add_argument("--strict", action="store_true",
+                        help="Fail on any call whose request differs from the recording")
+    replay.add_argument("--profile", default=None, help="Write cProfile stats to this file")
+    args = parser.parse_args(argv)
+
+    from firstone.main import ResearchFlow
+
+    flow = ResearchFlow()
+    if args.command == "record":
+        path, mode, strict = args.output, "record", False
+        flow.state.topic = args.topic
+        flow.state.current_year = str(datetime.now().year)
+    else:
+        path, mode, strict = args.cassette, "replay", args.strict
+        header = Cassette(path, "replay").header
+        flow.state.topic = header.get("topic", "")
+        flow.state.current_year = header.get("current_year", str(datetime.now().year))
+
+    started = time.perf_counter()
+    with use_cassette(path, mode, strict=strict, topic=flow.state.topic,
+                      current_year=flow.state.current_year) as cassette:
+        if getattr(args, "profile", None):
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.runcall(flow.kickoff)
+            profiler.dump_stats(args.profile)
+        else:
+            flow.kickoff()
+
+    summary = {
+        **cassette.stats(),
+        "topic": flow.state.topic,
+        "valid": flow.state.valid,
+        "iterations": flow.state.retry_count,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+    print(f"\n📼 Cassette {mode}: {json.dumps(summary, ensure_ascii=False)}")
+    return summary
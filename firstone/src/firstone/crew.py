@@ -1,12 +1,15 @@
 from typing import List, Optional
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from crewai_tools import ArxivPaperTool
 from crewai_tools import FileWriterTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+from .tools.arxiv_tool import ArxivSearchTool
+from .tools.catalog_tool import CatalogSearchTool
 from .tools.pdf_reader_tool import read_pdf
+from .tools.serper_tool import PooledSerperTool
+from .tools.tool_cache import ToolCache, cached
+from .llm import managed_llm
 
 
 # If you want to run a snippet of code before or after the crew starts,
@@ -25,11 +28,63 @@ class ResearchVerification(BaseModel):
     )
 
 
-arxiv = ArxivPaperTool(
-    download_pdfs=False,
-    save_dir="./arxiv_pdfs",
-    use_title_as_filename=True,
-)
+# Pydantic models for the researcher's output: one record per paper, stored once
+# per run and projected down to the fields each later stage needs (see papers.py)
+class PaperRecord(BaseModel):
+    """One paper found by the researcher"""
+    title: str = Field(description="Paper title")
+    authors: List[str] = Field(default_factory=list, description="Author names")
+    year: Optional[int] = Field(default=None, description="Publication year")
+    source: str = Field(default="", description='ArXiv ID like "arXiv:2301.12345", or journal/conference name')
+    link: str = Field(default="", description="ArXiv URL, DOI or paper URL")
+    abstract: str = Field(default="", description="Abstract or summary (at least 50 words)")
+    research_question: str = Field(default="", description="Main research question or objective")
+    methodology: str = Field(default="", description="Key methodology or approach")
+    findings: str = Field(default="", description="Main findings or results")
+    significance: str = Field(default="", description="Significance or impact in the field")
+
+    @field_validator("authors", mode="before")
+    @classmethod
+    def _split_authors(cls, value):
+        if isinstance(value, str):
+            return [name.strip() for name in value.split(",") if name.strip()]
+        return value or []
+
+    @field_validator("year", mode="before")
+    @classmethod
+    def _parse_year(cls, value):
+        if isinstance(value, str):
+            digits = "".join(c for c in value if c.isdigit())[:4]
+            return int(digits) if len(digits) == 4 else None
+        return value
+
+
+class ResearchPapers(BaseModel):
+    """Structured output of the research task"""
+    papers: List[PaperRecord] = Field(description="The 5 to 7 papers found")
+
+
+# Searches and ID lookups go through the shared, paced and batched arXiv client
+arxiv = ArxivSearchTool()
+
+
+def default_research_tools() -> list:
+    """Tools given to the researcher (before the shared cache is applied)"""
+    return [CatalogSearchTool(), PooledSerperTool(), arxiv, read_pdf]
+
+
+# The catalog grows during a run: its answers are only kept briefly
+catalog_tool_cache = ToolCache(max_entries=256, ttl_seconds=60)
+
+
+def _cached_tool(tool):
+    if isinstance(tool, CatalogSearchTool):
+        return cached(tool, cache=catalog_tool_cache)
+    return cached(tool)
+
+
+# Swapped for local stand-ins by the offline benchmarks (see firstone.fakes)
+research_tools_factory = default_research_tools
 
 
 @CrewBase
@@ -39,8 +94,9 @@ class Firstone():
     agents: List[BaseAgent]
     tasks: List[Task]
     
-    # Export ResearchVerification for use in Flow
+    # Export ResearchVerification and ResearchPapers for use in Flow
     ResearchVerification = ResearchVerification
+    ResearchPapers = ResearchPapers
 
 
     @agent
@@ -48,8 +104,11 @@ class Firstone():
         return Agent(
             config=self.agents_config['researcher'], # type: ignore[index]
             verbose=False,
-            tools=[SerperDevTool(), arxiv, read_pdf],  # Adding the SerperDevTool and ArxivPaperTool to the agent's tools
-            max_iter=15,  # Limit iterations to prevent excessive API calls
+            # Shared rate limit across concurrent runs, per-agent model chain
+            llm=managed_llm('researcher', models=self.agents_config['researcher'].get('models')),
+            # Tool results are cached process-wide, across iterations and runs
+            tools=[_cached_tool(tool) for tool in research_tools_factory()],
+            max_iter=15,  # Ceiling: the flows stop earlier once enough papers are found (early_stop.py)
             max_rpm=10,  # Limit requests per minute
         )
 
@@ -57,7 +116,8 @@ class Firstone():
     def reviewer(self) -> Agent:
         return Agent(
             config=self.agents_config['reviewer'], # type: ignore[index]
-            verbose=True
+            verbose=True,
+            llm=managed_llm('reviewer', models=self.agents_config['reviewer'].get('models')),
         )
     
 
@@ -65,7 +125,8 @@ class Firstone():
     def synthesizer(self) -> Agent:
         return Agent(
             config=self.agents_config['synthesizer'], # type: ignore[index]
-            verbose=False
+            verbose=False,
+            llm=managed_llm('synthesizer', models=self.agents_config['synthesizer'].get('models')),
         )
 
     # To learn more about structured task outputs,
@@ -75,7 +136,7 @@ class Firstone():
     def research_task(self) -> Task:
         return Task(
             config=self.tasks_config['research_task'], # type: ignore[index]
-            
+            output_pydantic=ResearchPapers,
         )
 
     @task
@@ -92,7 +153,8 @@ class Firstone():
         return Task(
             config=self.tasks_config['synthesis_task'], # type: ignore[index]
             context=[self.research_task(), self.review_task()],
-            output_file='output/synthesis_report.md',
+            # No output_file: callers persist the result in the per-run
+            # ReportStore so concurrent runs don't overwrite each other
         )
 
     @crew
@@ -0,0 +1,171 @@
+"""
+Early stopping for the researcher's tool loop.
+
+The researcher runs with a fixed iteration cap (``max_iter=15``) and often
+keeps searching after its tools have already returned enough usable papers.
+`EarlyStopController` is the research agent's ``step_callback``: after each
+tool step it counts the distinct qualifying papers seen in the catalog and
+arXiv results (title, identifier, an abstract of `MIN_ABSTRACT_WORDS` words,
+published within `MAX_AGE_YEARS` of the run's year) and moves the running
+executor's iteration cap:
+
+- target reached: the cap is set to the current step, so crewAI asks the
+  agent for its final answer right away (one LLM call, no more tools),
+- otherwise the cap follows the papers found per step so far: the steps
+  still needed at that rate, plus `SLACK_STEPS` for the write-up, never
+  above the agent's own ``max_iter``,
+- once at least `MIN_PAPERS` were found, `PATIENCE` steps in a row that add
+  nothing also end the search.
+
+With pipelined review (see review_pipeline.py) the papers counted are the
+ones the reviewer accepted.
+
+FIRSTONE_EARLY_STOP_PAPERS sets the target (default 7, 0 turns it off).
+"""
+import math
+import os
+import re
+from typing import Any, Optional, Set
+
+from crewai.agents.parser import AgentAction
+
+from firstone.metrics import RESEARCH_EARLY_STOPS, RESEARCH_STEPS
+from firstone.paper_catalog import paper_key
+
+MIN_PAPERS = 5
+MIN_ABSTRACT_WORDS = 30
+MAX_AGE_YEARS = 5
+PATIENCE = 3
+SLACK_STEPS = 2
+
+_default_target = int(os.getenv("FIRSTONE_EARLY_STOP_PAPERS", "7"))
+
+_FIELD = re.compile(r"^(Title|ArXiv ID|Link|Source|Published|Year|Summary|Abstract):[ \t]*(.*)$", re.MULTILINE)
+
+
+def set_default_target(papers: int) -> None:
+    """Qualifying papers after which the researcher stops (0: never stop early)"""
+    global _default_target
+    _default_target = max(int(papers), 0)
+
+
+def default_target() -> int:
+    return _default_target
+
+
+def paper_entries(text: str):
+    """Paper entries (field -> value) in a catalog or arXiv tool result"""
+    for block in re.split(r"\n\s*\n", text):
+        fields = {}
+        matches = list(_FIELD.finditer(block))
+        for match, following in zip(matches, matches[1:] + [None]):
+            # Abstracts can run over several lines, up to the next field
+            end = following.start() if following else len(block)
+            fields[match.group(1)] = block[match.start(2):end].strip()
+        if fields.get("Title"):
+            yield fields
+
+
+class EarlyStopController:
+    """Research agent step callback that ends the tool loop once it has enough"""
+
+    def __init__(
+        self,
+        current_year: Any = None,
+        target: Optional[int] = None,
+        pipeline: Any = None,
+        min_papers: int = MIN_PAPERS,
+        patience: int = PATIENCE,
+    ):
+        self.current_year = int(current_year) if str(current_year or "").isdigit() else None
+        self.target = default_target() if target is None else target
+        self.pipeline = pipeline
+        if pipeline is not None and self.target:
+            self.target = min(self.target, pipeline.min_accepted)
+        self.min_papers = min(min_papers, self.target) if self.target else min_papers
+        self.patience = patience
+        self.agent = None
+        self.stopped: Optional[str] = None
+        self._executor = None
+        self._next_callback = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.steps = 0
+        self.dry_steps = 0
+        self.seen: Set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.target > 0
+
+    def attach(self, agent) -> "EarlyStopController":
+        """Become `agent`'s step callback (an existing callback still runs first)"""
+        if self.enabled:
+            self.agent = agent
+            self._next_callback = agent.step_callback
+            agent.step_callback = self
+        return self
+
+    def qualifies(self, entry: dict) -> bool:
+        if not (entry.get("ArXiv ID") or entry.get("Link") or entry.get("Source")):
+            return False
+        abstract = entry.get("Summary") or entry.get("Abstract") or ""
+        if len(abstract.split()) < MIN_ABSTRACT_WORDS:
+            return False
+        year = re.match(r"\d{4}", entry.get("Published") or entry.get("Year") or "")
+        if year and self.current_year:
+            return int(year.group()) >= self.current_year - MAX_AGE_YEARS
+        return True
+
+    @property
+    def found(self) -> int:
+        if self.pipeline is not None:
+            return len(self.pipeline.accepted())
+        return len(self.seen)
+
+    def __call__(self, step: Any) -> None:
+        if self._next_callback:
+            self._next_callback(step)
+        # crewAI also reports the bare tool result, then the action carrying it: count actions
+        executor = getattr(self.agent, "agent_executor", None)
+        if executor is None or not isinstance(step, AgentAction) or step.result is None:
+            return
+        if executor is not self._executor:
+            # New task execution (e.g. the retry after a quota error)
+            self._executor = executor
+            self._reset()
+            self.stopped = None
+
+        self.steps += 1
+        before = self.found
+        for entry in paper_entries(str(step.result)):
+            if self.qualifies(entry):
+                self.seen.add(paper_key(entry["Title"], entry.get("ArXiv ID") or entry.get("Source", ""),
+                                        entry.get("Link", "")))
+        found = self.found
+        self.dry_steps = 0 if found > before else self.dry_steps + 1
+
+        # The executor counts this step once the callback returns
+        next_iteration = executor.iterations + 1
+        ceiling = self.agent.max_iter
+        if found >= self.target:
+            reason = "target"
+        elif found >= self.min_papers and self.dry_steps >= self.patience:
+            reason = "stalled"
+        else:
+            reason = None
+        if reason:
+            cap = next_iteration
+        elif found:
+            needed = math.ceil((self.target - found) * self.steps / found)
+            cap = next_iteration + needed + SLACK_STEPS
+        else:
+            cap = ceiling
+        executor.max_iter = max(min(cap, ceiling), next_iteration)
+
+        if reason and not self.stopped:
+            self.stopped = reason
+            RESEARCH_EARLY_STOPS.inc(reason=reason)
+            RESEARCH_STEPS.observe(self.steps)
+            print(f"🛑 Research stopped after {self.steps} tool step(s): {found} qualifying paper(s) ({reason})")
@@ -0,0 +1,277 @@
+"""
+Local stand-ins for the LLM provider and the researcher's web tools.
+
+Used by the offline benchmarks to run the real flows, crews and agent loops
+without network access or provider quota. `FakeLLM` answers in the ReAct
+format the crewAI executor parses: the researcher calls each tool once (and
+submits each paper when pipelined review is on), then every agent returns a
+canned final answer. Latencies are configurable so the
+benchmarks can separate framework overhead from simulated provider time.
+
+    from firstone import fakes
+    fakes.install(llm_latency=0.2, tool_latency=0.05)
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from firstone import crew as crew_module
+from firstone.llm import register_llm_provider
+from firstone.review_pipeline import SUBMIT_TOOL_NAME
+from firstone.tools.arxiv_tool import ARXIV_TOOL_NAME
+from firstone.tools.catalog_tool import CATALOG_TOOL_NAME, CatalogSearchTool
+from firstone.tools.pdf_reader_tool import read_pdf
+
+SERPER_TOOL_NAME = "Search the internet with Serper"
+
+# Where agents.yaml / tasks.yaml and the flows put the topic in the prompts
+_TOPIC_PATTERN = re.compile(r"(?:papers about|report about|report on) (.+?)(?:,| using |:|\n| then )")
+
+
+class LatencyModel:
+    """
+    Latency with uniform jitter, e.g. 0.2 s +/- 20 %, and optionally a slow
+    tail: a `tail_rate` share of the samples take `tail_seconds` more.
+    """
+
+    def __init__(self, seconds: float = 0.0, jitter: float = 0.2, seed: Optional[int] = None,
+                 tail_rate: float = 0.0, tail_seconds: float = 0.0):
+        self.seconds = seconds
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_seconds = tail_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        with self._lock:
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+            tail = self.tail_seconds if self._random.random() < self.tail_rate else 0.0
+        return self.seconds * factor + tail
+
+    def wait(self) -> float:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+def fake_paper_records(topic: str, count: int = 5) -> List[Dict[str, Any]]:
+    explanation = "The methodology and findings are described here. " * 8
+    return [
+        {
+            "title": f"Advances in {topic} (part {i})",
+            "authors": ["A. Author", "B. Author"],
+            "year": 2025,
+            "source": f"arXiv:2501.{10000 + i}",
+            "link": f"https://arxiv.org/abs/2501.{10000 + i}",
+            "abstract": f"This paper studies {topic} from angle {i}. " + "It reports results. " * 10,
+            "research_question": explanation,
+            "methodology": explanation,
+            "findings": explanation,
+            "significance": explanation,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def fake_papers(topic: str, count: int = 5) -> str:
+    """Research task answer: paper records in the ResearchPapers JSON shape"""
+    return json.dumps({"papers": fake_paper_records(topic, count)})
+
+
+def fake_synthesis(topic: str) -> str:
+    body = "The reviewed papers agree on the main trends. " * 40
+    return (
+        f"# Synthesis Report: {topic}\n\n## Executive Summary\n\n{body}\n\n"
+        f"## Main Findings\n\n{body}\n\n## Conclusions\n\n{body}\n"
+    )
+
+
+class FakeLLM(BaseLLM):
+    """Scripted LLM: one action per tool in `actions`, then a canned answer"""
+
+    def __init__(
+        self,
+        model: str = "fake/bench",
+        agent_name: str = "agent",
+        latency: Optional[LatencyModel] = None,
+        actions: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+        reject_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(model=model, temperature=0.0, provider="fake")
+        self.agent_name = agent_name
+        self.latency = latency or LatencyModel()
+        self.actions = actions or []
+        self.reject_rate = reject_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    @staticmethod
+    def _text(messages) -> str:
+        if isinstance(messages, str):
+            return messages
+        return "\n".join(str(m.get("content", "")) for m in messages)
+
+    @staticmethod
+    def _topic(text: str) -> str:
+        # Agent goals can still hold the raw "{topic}" placeholder: skip it
+        for match in _TOPIC_PATTERN.finditer(text):
+            if "{" not in match.group(1):
+                return match.group(1).strip(" .")
+        return "the topic"
+
+    def _final_answer(self, text: str) -> str:
+        topic = self._topic(text)
+        if self.agent_name == "reviewer":
+            valid = self._random.random() >= self.reject_rate
+            return json.dumps({
+                "valid": valid,
+                "feedback": None if valid else "Add more ArXiv papers with longer explanations.",
+            })
+        if self.agent_name == "synthesizer":
+            return fake_synthesis(topic)
+        return fake_papers(topic)
+
+    def _submissions(self, text: str) -> List[Dict[str, Any]]:
+        """In pipelined review, the researcher submits each paper after its searches"""
+        if self.agent_name != "researcher" or SUBMIT_TOOL_NAME not in text:
+            return []
+        return fake_paper_records(self._topic(text))
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None) -> str:
+        self.calls += 1
+        self.latency.wait()
+        text = self._text(messages)
+
+        # Each tool result comes back to the agent as an assistant "Observation:"
+        # (the system prompt mentions the word too, so only count assistant turns)
+        step = 0 if isinstance(messages, str) else sum(
+            str(m.get("content", "")).count("Observation:")
+            for m in messages if m.get("role") == "assistant"
+        )
+        submissions = self._submissions(text)
+        # crewAI's "stop using any tools" prompt when the iteration cap is reached
+        forced = not isinstance(messages, str) and "stop using any tools" in str(messages[-1].get("content", ""))
+        if not forced and step < len(self.actions) + len(submissions):
+            if step < len(self.actions):
+                tool_name, arguments = self.actions[step]
+            else:
+                tool_name, arguments = SUBMIT_TOOL_NAME, submissions[step - len(self.actions)]
+            # "{topic}" placeholders keep tool calls distinct between runs
+            topic = self._topic(text)
+            arguments = {k: v.format(topic=topic) if isinstance(v, str) else v
+                         for k, v in arguments.items()}
+            answer = (
+                f"Thought: I need more sources.\n"
+                f"Action: {tool_name}\n"
+                f"Action Input: {json.dumps(arguments)}"
+            )
+        else:
+            answer = f"Thought: I now know the final answer\nFinal Answer: {self._final_answer(text)}"
+
+        self._track_token_usage_internal({
+            "prompt_tokens": len(text) // 4,
+            "completion_tokens": len(answer) // 4,
+            "total_tokens": (len(text) + len(answer)) // 4,
+        })
+        return answer
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 1_000_000
+
+
+class FakeSearchInput(BaseModel):
+    search_query: str = Field(..., description="Mandatory search query you want to use to search the internet")
+
+
+class FakeSerperTool(BaseTool):
+    """Same name and arguments as SerperDevTool, canned organic results"""
+    name: str = SERPER_TOOL_NAME
+    description: str = "Search the internet for a query and return relevant results."
+    args_schema: Type[BaseModel] = FakeSearchInput
+    latency: Any = None
+
+    def _run(self, search_query: str) -> str:
+        if self.latency:
+            self.latency.wait()
+        return json.dumps({"organic": [
+            {"title": f"{search_query} - result {i}", "link": f"https://example.org/{i}",
+             "snippet": f"Overview of {search_query}, part {i}."}
+            for i in range(1, 6)
+        ]})
+
+
+class FakeArxivInput(BaseModel):
+    search_query: str = Field(..., description="Search query for Arxiv, e.g., 'transformer neural network'")
+    max_results: int = Field(5, ge=1, le=100, description="Max results to fetch; must be between 1 and 100")
+
+
+class FakeArxivTool(BaseTool):
+    """Same name and search arguments as ArxivSearchTool, canned paper entries"""
+    name: str = ARXIV_TOOL_NAME
+    description: str = "Fetches metadata from Arxiv based on a search query."
+    args_schema: Type[BaseModel] = FakeArxivInput
+    latency: Any = None
+
+    def _run(self, search_query: str, max_results: int = 5) -> str:
+        if self.latency:
+            self.latency.wait()
+        return "\n\n".join(
+            f"Title: {search_query} study {i}\nAuthors: A. Author\nPublished: 2025-01-0{i % 9 + 1}\n"
+            f"ArXiv ID: 2501.{10000 + i}\nSummary: A study of {search_query}. "
+            + "It describes the method, the experiments and the results in detail. " * 3
+            for i in range(1, max_results + 1)
+        )
+
+
+def install(llm_latency: float = 0.0, tool_latency: float = 0.0, jitter: float = 0.2,
+            reject_rate: float = 0.0, seed: Optional[int] = None, model: str = "fake/bench",
+            llm_tail_rate: float = 0.0, llm_tail_latency: float = 0.0) -> None:
+    """Route every agent to FakeLLM and give the researcher the fake tools"""
+    llm_model = LatencyModel(llm_latency, jitter, seed, tail_rate=llm_tail_rate, tail_seconds=llm_tail_latency)
+    tool_model = LatencyModel(tool_latency, jitter, seed)
+
+    def researcher_actions(agent_name: str) -> List[Tuple[str, Dict[str, Any]]]:
+        if agent_name != "researcher":
+            return []
+        return [
+            (CATALOG_TOOL_NAME, {"search_query": "{topic}", "max_results": 8}),
+            (ARXIV_TOOL_NAME, {"search_query": "{topic}", "max_results": 5}),
+            (SERPER_TOOL_NAME, {"search_query": "{topic} survey"}),
+        ]
+
+    register_llm_provider("fake", lambda name, agent_name: FakeLLM(
+        model=name,
+        agent_name=agent_name,
+        latency=llm_model,
+        actions=researcher_actions(agent_name),
+        reject_rate=reject_rate,
+        seed=seed,
+    ))
+    # The catalog is local (SQLite): the real tool is used
+    crew_module.research_tools_factory = lambda: [
+        CatalogSearchTool(),
+        FakeSerperTool(latency=tool_model),
+        FakeArxivTool(latency=tool_model),
+        read_pdf,
+    ]
+    os.environ["MODEL"] = model
@@ -0,0 +1,79 @@
+"""
+Instrumentation shared by the research flows (CLI and backend).
+
+`InstrumentedFlow` is mixed into each ``ResearchFlow``: it binds the run scope
+(see run_context) for the whole kickoff, opens the run's root span, times
+every flow step and records the outcome of the run. `crew_kickoff` wraps a
+crew kickoff in the same way, and `backoff` is the flows' traced sleep.
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from firstone.cassette import cassette_from_env, replaying
+from firstone.metrics import (
+    CREW_KICKOFF_DURATION,
+    CREW_KICKOFFS,
+    FLOW_ACTIVE,
+    FLOW_DURATION,
+    FLOW_REVIEW_ATTEMPTS,
+    FLOW_RUNS,
+    FLOW_STEP_DURATION,
+)
+from firstone.run_context import run_scope
+from firstone.tracing import tracer
+
+
+class InstrumentedFlow:
+    """Mixin placed before ``Flow[...]`` in a flow's bases"""
+
+    async def kickoff_async(self, inputs=None):
+        started = time.perf_counter()
+        outcome = "error"
+        FLOW_ACTIVE.inc()
+        try:
+            topic = getattr(self.state, "topic", "")
+            with run_scope(self.state.id, token_budget=getattr(self.state, "token_budget", None)) as run, \
+                    cassette_from_env(self.state.id, topic=topic,
+                                      current_year=getattr(self.state, "current_year", "")), \
+                    tracer.span("research_flow", topic=topic) as root:
+                result = await super().kickoff_async(inputs)
+                outcome = "completed" if getattr(self.state, "valid", False) else "failed"
+                root.set_attributes(outcome=outcome, iterations=getattr(self.state, "retry_count", 0),
+                                    prompt_tokens=run.prompt_tokens, completion_tokens=run.completion_tokens)
+            return result
+        finally:
+            FLOW_ACTIVE.dec()
+            FLOW_RUNS.inc(outcome=outcome)
+            FLOW_DURATION.observe(time.perf_counter() - started)
+            FLOW_REVIEW_ATTEMPTS.observe(getattr(self.state, "retry_count", 0))
+
+    async def _execute_method(self, method_name, method, *args, **kwargs):
+        # Every @start/@listen/@router step goes through here
+        iteration = getattr(self.state, "retry_count", 0) + 1
+        with FLOW_STEP_DURATION.time(step=str(method_name)), \
+                tracer.span(str(method_name), iteration=iteration):
+            return await super()._execute_method(method_name, method, *args, **kwargs)
+
+
+@contextmanager
+def crew_kickoff(agent: str) -> Iterator[None]:
+    """Count, time and trace a crew kickoff for `agent`"""
+    started = time.perf_counter()
+    try:
+        with tracer.span("crew.kickoff", agent=agent):
+            yield
+    except Exception:
+        CREW_KICKOFFS.inc(agent=agent, outcome="error")
+        raise
+    else:
+        CREW_KICKOFFS.inc(agent=agent, outcome="ok")
+    finally:
+        CREW_KICKOFF_DURATION.observe(time.perf_counter() - started, agent=agent)
+
+
+def backoff(seconds: float, reason: str) -> None:
+    """Sleep between attempts (skipped while replaying a cassette)"""
+    with tracer.span("backoff", reason=reason, seconds=seconds):
+        if not replaying():
+            time.sleep(seconds)
@@ -0,0 +1,286 @@
+"""
+One pooled HTTP client for every external tool.
+
+crewAI's tools open their own sessions (Serper uses a fresh ``requests.post``
+per search) and the researcher agent, with its tools, is rebuilt on every
+iteration of every run, so connections and TLS handshakes were set up again
+for each call. `HttpPool` owns a single ``httpx.AsyncClient`` on a dedicated
+event-loop thread, created once per process:
+
+- keep-alive connections are reused across tools, iterations and runs,
+- HTTP/2 is negotiated when the ``h2`` package is installed,
+- concurrent requests are capped per host (arXiv gets a single connection),
+- connect/read timeouts are set once for every tool.
+
+Tools run in the agents' worker threads and flows in their own event loops,
+so the pool is used through `request` (blocking) or `arequest` (awaitable
+from any loop); `stream` yields a response body as it is received. Each
+request is traced at the connection level, which gives the reuse statistics
+of `stats()` and the ``firstone_http_*`` metrics.
+
+FIRSTONE_HTTP_MAX_CONNECTIONS, FIRSTONE_HTTP_PER_HOST, FIRSTONE_HTTP_TIMEOUT
+and FIRSTONE_HTTP2 configure the process default (see `get_http_pool`).
+"""
+import asyncio
+import importlib.util
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from firstone.metrics import HTTP_CONNECTIONS, HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+# Hosts that ask for fewer concurrent connections than the default
+HOST_LIMITS = {"export.arxiv.org": 1}
+
+_END = object()
+
+
+class HttpPool:
+    """Shared httpx.AsyncClient running on its own event-loop thread"""
+
+    def __init__(
+        self,
+        max_connections: int = 50,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 60.0,
+        per_host: int = 8,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        http2: Optional[bool] = None,
+        host_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.per_host = per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        available = importlib.util.find_spec("h2") is not None
+        self.http2 = available if http2 is None else (http2 and available)
+        self.host_limits = {**HOST_LIMITS, **(host_limits or {})}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+
+    @property
+    def started(self) -> bool:
+        return self._client is not None
+
+    def start(self) -> "HttpPool":
+        """Create the loop thread and the client (idempotent)"""
+        with self._start_lock:
+            if self._client is not None:
+                return self
+            ready = threading.Event()
+
+            def serve():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._client = httpx.AsyncClient(
+                    http2=self.http2,
+                    timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive,
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                    follow_redirects=True,
+                )
+                ready.set()
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=serve, name="firstone-http-pool", daemon=True)
+            self._thread.start()
+            ready.wait()
+        return self
+
+    def close(self) -> None:
+        with self._start_lock:
+            if self._client is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(10)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(10)
+            self._client = None
+            self._semaphores.clear()
+
+    # ------------------------------------------------------------------
+    # Requests
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Blocking request, body read (for tools running in worker threads)"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._request(method, url, **kwargs), self._loop).result()
+
+    async def arequest(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Awaitable request, from any event loop"""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._request(method, url, **kwargs), self._loop)
+        return await asyncio.wrap_future(future)
+
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs: Any) -> Iterator[Tuple[httpx.Response, Iterator[bytes]]]:
+        """
+        Blocking streamed request: yields the response (status and headers)
+        and an iterator over the body chunks as they are received.
+        """
+        self.start()
+        chunks: "queue.Queue[Any]" = queue.Queue()
+        head: "queue.Queue[Any]" = queue.Queue()
+
+        async def pump():
+            response = None
+            started = time.perf_counter()
+            try:
+                async with self._slot(url):
+                    started = time.perf_counter()
+                    async with self._client.stream(method, url, extensions=self._trace(url), **kwargs) as response:
+                        head.put(response)
+                        async for chunk in response.aiter_bytes():
+                            chunks.put(chunk)
+                chunks.put(_END)
+            except BaseException as e:
+                head.put(e)
+                chunks.put(e)
+                if response is None:
+                    self._observe(url, None, time.perf_counter() - started)
+                    return
+            self._observe(url, response, time.perf_counter() - started)
+
+        task = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        first = head.get()
+        if isinstance(first, BaseException):
+            raise first
+
+        def body() -> Iterator[bytes]:
+            while True:
+                item = chunks.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+
+        try:
+            yield first, body()
+        finally:
+            task.cancel()
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        async with self._slot(url):
+            started = time.perf_counter()
+            try:
+                response = await self._client.request(method, url, extensions=self._trace(url), **kwargs)
+            except Exception:
+                self._observe(url, None, time.perf_counter() - started)
+                raise
+            self._observe(url, response, time.perf_counter() - started)
+            return response
+
+    def _slot(self, url: str) -> asyncio.Semaphore:
+        """Per-host concurrency limit (semaphores live on the pool's loop)"""
+        host = urlsplit(url).hostname or ""
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.host_limits.get(host, self.per_host))
+        return semaphore
+
+    # ------------------------------------------------------------------
+    # Connection statistics
+
+    def _host_stats(self, host: str) -> Dict[str, Any]:
+        return self._hosts.setdefault(host, {
+            "requests": 0, "new_connections": 0, "tls_handshakes": 0, "errors": 0, "http_versions": {},
+        })
+
+    def _trace(self, url: str) -> Dict[str, Any]:
+        """httpcore trace hook: counts the connections actually opened"""
+        host = urlsplit(url).hostname or ""
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            if event == "connection.connect_tcp.complete":
+                with self._stats_lock:
+                    self._host_stats(host)["new_connections"] += 1
+                HTTP_CONNECTIONS.inc(host=host)
+            elif event == "connection.start_tls.complete":
+                with self._stats_lock:
+                    self._host_stats(host)["tls_handshakes"] += 1
+
+        return {"trace": trace}
+
+    def _observe(self, url: str, response: Optional[httpx.Response], elapsed: float) -> None:
+        host = urlsplit(url).hostname or ""
+        with self._stats_lock:
+            stats = self._host_stats(host)
+            stats["requests"] += 1
+            if response is None:
+                stats["errors"] += 1
+            else:
+                versions = stats["http_versions"]
+                versions[response.http_version] = versions.get(response.http_version, 0) + 1
+        HTTP_REQUESTS.inc(host=host, status=str(response.status_code) if response is not None else "error")
+        HTTP_REQUEST_DURATION.observe(elapsed, host=host)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-host requests, connections opened and reuse ratio"""
+        with self._stats_lock:
+            hosts = {}
+            for host, s in self._hosts.items():
+                reused = max(s["requests"] - s["new_connections"], 0)
+                hosts[host] = {
+                    **s,
+                    "http_versions": dict(s["http_versions"]),
+                    "reused_connections": reused,
+                    "reuse_ratio": round(reused / s["requests"], 3) if s["requests"] else 0.0,
+                }
+        return {
+            "started": self.started,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "per_host": self.per_host,
+            "hosts": hosts,
+        }
+
+
+_default_pool: Optional[HttpPool] = None
+_default_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpPool:
+    """Process-wide pool, started on first use (FIRSTONE_HTTP_* environment variables)"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            http2 = os.getenv("FIRSTONE_HTTP2", "auto").lower()
+            _default_pool = HttpPool(
+                max_connections=int(os.getenv("FIRSTONE_HTTP_MAX_CONNECTIONS", "50")),
+                per_host=int(os.getenv("FIRSTONE_HTTP_PER_HOST", "8")),
+                timeout=float(os.getenv("FIRSTONE_HTTP_TIMEOUT", "30")),
+                http2=None if http2 == "auto" else http2 in ("1", "true", "yes", "on"),
+            )
+        return _default_pool
+
+
+def set_http_pool(pool: Optional[HttpPool]) -> None:
+    """Use `pool` as the process default (None: rebuild from the environment on next use)"""
+    global _default_pool
+    with _default_lock:
+        _default_pool = pool
+
+
+def http_pool_stats() -> Optional[Dict[str, Any]]:
+    """Statistics of the default pool, None if it was never created"""
+    return _default_pool.stats() if _default_pool is not None else None
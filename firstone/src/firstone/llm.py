@@ -0,0 +1,350 @@
+"""
+LLM call layer used by every agent of the crew.
+
+`ManagedLLM` wraps the crewAI LLM chosen for an agent and is the single place
+where process-wide concerns are applied to LLM traffic: the shared rate
+limiter, per-run call and token accounting, the LLM metrics, the ``llm.call`` spans
+(with token counts), cassette recording/replay and the cancellation of
+speculative work.
+
+Each agent has an ordered chain of models: ``FIRSTONE_<AGENT>_MODELS`` (or
+`set_agent_models`), else the ``models`` list of the agent in agents.yaml,
+else MODEL. A call goes to the first model of the chain that is not cooling
+down; a model answering 429/RESOURCE_EXHAUSTED, or whose recent latency is
+above FIRSTONE_LLM_SLOW_SECONDS, cools down for
+FIRSTONE_LLM_FALLBACK_COOLDOWN seconds and the call moves on to the next
+model right away. Only when every model of the chain is rate limited does
+the error reach the flows (and their 60 s backoff).
+
+Optionally (FIRSTONE_LLM_HEDGE=1), a call still unanswered after the p95
+latency of its model's recent answers is hedged: the same request goes to
+the next usable model of the chain (or the same model), the first answer
+wins and the other request is cancelled, or its answer dropped if it was
+already sent (`firstone_llm_hedges_total`, `firstone_llm_hedge_gain_seconds`).
+The deadline runs from the moment the call holds its rate limiter slot, and
+a call is only hedged when the limiter has a free slot for the duplicate.
+
+Chains, health and the hedging policy live in model_routing.py (importable
+without crewAI) and are re-exported here.
+
+Model strings are resolved by crewAI, except for prefixes registered with
+`register_llm_provider` (e.g. ``fake/...`` for the offline benchmarks).
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, TimeoutError as FutureTimeout, wait
+from contextvars import copy_context
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.utilities.llm_utils import create_llm
+
+from firstone.cassette import ReplayLLM, active_cassette
+from firstone.metrics import (
+    LLM_CALL_DURATION, LLM_CALLS, LLM_HEDGES, LLM_MODEL_CALL_DURATION, LLM_ROUTES, LLM_TOKENS,
+    RATE_LIMIT_WAIT,
+)
+from firstone.model_routing import (
+    HedgePolicy, ModelHealth, agent_models, hedge_policy, model_health, parse_models, set_agent_models,
+)
+from firstone.rate_limit import RateLimiter, shared_rate_limiter
+from firstone.run_context import current_run
+from firstone.speculation import raise_if_cancelled, run_cancellable
+from firstone.tracing import span
+
+__all__ = [
+    "LLMFactory", "ManagedLLM", "is_rate_limit_error", "managed_llm", "register_llm_provider", "resolve_llm",
+    # Re-exported from model_routing
+    "HedgePolicy", "ModelHealth", "agent_models", "hedge_policy", "model_health", "parse_models",
+    "set_agent_models",
+]
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for provider quota errors (HTTP 429 / RESOURCE_EXHAUSTED)"""
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+# Model prefix -> factory(model, agent_name) for providers crewAI doesn't know
+LLMFactory = Callable[[str, str], BaseLLM]
+_providers: Dict[str, LLMFactory] = {}
+
+
+def register_llm_provider(prefix: str, factory: LLMFactory) -> None:
+    """Route models named ``<prefix>/...`` to `factory` instead of crewAI"""
+    _providers[prefix] = factory
+
+
+def resolve_llm(model: Optional[str], agent_name: str) -> Optional[BaseLLM]:
+    """Build the provider LLM for `model` (None: the MODEL env var)"""
+    name = model or os.getenv("MODEL", "")
+    factory = _providers.get(name.split("/", 1)[0])
+    if factory is not None:
+        return factory(name, agent_name)
+    # None falls back to crewAI's own resolution (MODEL env var, defaults)
+    return create_llm(model)
+
+
+def _in_thread(fn: Callable[[], Any]) -> Future:
+    """Run `fn` in a daemon thread, in a copy of the caller's context"""
+    future: Future = Future()
+
+    def run() -> None:
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=copy_context().run, args=(run,), name="llm-hedge", daemon=True).start()
+    return future
+
+
+class ManagedLLM(BaseLLM):
+    """Delegates to a crewAI LLM, adding shared rate limiting and run accounting"""
+
+    def __init__(
+        self,
+        model: Union[str, BaseLLM, None] = None,
+        agent_name: str = "agent",
+        rate_limiter: Optional[RateLimiter] = None,
+        fallbacks: Sequence[str] = (),
+        health: Optional[ModelHealth] = None,
+        hedging: Optional[HedgePolicy] = None,
+    ):
+        cassette = active_cassette()
+        if isinstance(model, BaseLLM):
+            inner = model
+        elif cassette and cassette.replaying:
+            # Answers come from the cassette: no provider client or API key needed
+            inner = ReplayLLM.for_agent(cassette, agent_name)
+            fallbacks = ()
+        else:
+            inner = resolve_llm(model, agent_name)
+        if inner is None:
+            raise ValueError("No LLM configured: set MODEL in the environment")
+        super().__init__(
+            model=inner.model,
+            temperature=getattr(inner, "temperature", None),
+            provider=getattr(inner, "provider", None),
+        )
+        self.inner = inner
+        self.agent_name = agent_name
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.health = health or model_health
+        self.hedging = hedging or hedge_policy
+        # Models are known by their configured names (providers may strip the prefix)
+        primary = model if isinstance(model, str) and model else inner.model
+        self.models = [primary] + [name for name in fallbacks if name != primary]
+        # Idle provider LLMs per chain position: concurrent calls (hedges) each get their
+        # own, so per-instance token counts stay exact. Fallbacks are built on first use
+        # (their provider may need other keys).
+        self._idle: Dict[int, List[BaseLLM]] = {0: [inner]}
+        self._built: List[BaseLLM] = [inner]
+        self._pool_lock = threading.Lock()
+
+    def _checkout(self, index: int) -> BaseLLM:
+        with self._pool_lock:
+            idle = self._idle.setdefault(index, [])
+            if idle:
+                return idle.pop()
+        llm = resolve_llm(self.models[index], self.agent_name)
+        with self._pool_lock:
+            self._built.append(llm)
+        return llm
+
+    def _checkin(self, index: int, llm: BaseLLM) -> None:
+        with self._pool_lock:
+            self._idle[index].append(llm)
+
+    def _route(self) -> List[int]:
+        """Chain positions in call order: usable models first, cooling ones last"""
+        positions = range(len(self.models))
+        usable = [i for i in positions if not self.health.cooling(self.models[i])]
+        return usable + [i for i in positions if i not in usable]
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ) -> Any:
+        # A cancelled speculation stops here, before spending quota
+        raise_if_cancelled()
+        kwargs = dict(
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            from_task=from_task,
+            from_agent=from_agent,
+            response_model=response_model,
+        )
+        order = self._route()
+        # Why this model: the preferred one, or why the preferred one was skipped
+        route = "primary" if order[0] == 0 else self.health.cooling(self.models[0]) or "primary"
+        for position, index in enumerate(order):
+            try:
+                return self._call_hedged(index, route, order, messages, kwargs)
+            except Exception as e:
+                if position == len(order) - 1 or not is_rate_limit_error(e):
+                    raise
+                route = "rate_limited"
+                print(f"🔀 {self.models[index]} rate limited, switching to {self.models[order[position + 1]]}")
+
+    def _call_hedged(self, index: int, route: str, order: List[int], messages, kwargs: Dict[str, Any]) -> Any:
+        """
+        Call one model; past the hedging deadline, send the same request to the
+        next usable model of the chain (or the same one) and keep the first answer.
+        """
+        cassette = active_cassette()
+        deadline = None if cassette else self.hedging.deadline(self.health, self.models[index])
+        if deadline is None:
+            return self._call_model(index, route, messages, **kwargs)
+
+        # The deadline is a post-acquire latency: a call queued on the limiter is not slow yet
+        with span("rate_limit.wait"):
+            RATE_LIMIT_WAIT.observe(self.rate_limiter.acquire())
+        raise_if_cancelled()
+        started = time.perf_counter()
+        cancel = {"original": threading.Event(), "hedge": threading.Event()}
+        original = _in_thread(lambda: run_cancellable(
+            cancel["original"], self._call_model, index, route, messages, acquired=True, **kwargs))
+        try:
+            result = original.result(timeout=deadline)
+        except FutureTimeout:
+            pass
+        else:
+            self.hedging.record_call()
+            return result
+
+        # A duplicate only uses spare quota, never a slot another call is waiting for
+        if not self.rate_limiter.try_acquire():
+            LLM_HEDGES.inc(agent=self.agent_name, outcome="skipped")
+            self.hedging.record_call()
+            return original.result()
+        usable = [i for i in order if i != index and not self.health.cooling(self.models[i])]
+        target = usable[0] if usable else index
+        hedge = _in_thread(lambda: run_cancellable(
+            cancel["hedge"], self._call_model, target, "hedge", messages, acquired=True, **kwargs))
+        racers = {original: "original", hedge: "hedge"}
+        pending = set(racers)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                winner = racers[future]
+                loser = "original" if winner == "hedge" else "hedge"
+                # Not sent yet: it won't be; already in flight: its answer is dropped
+                cancel[loser].set()
+                LLM_HEDGES.inc(agent=self.agent_name, outcome="won" if winner == "hedge" else "lost")
+                self.hedging.record_call(hedged=True, won=winner == "hedge")
+                if winner == "hedge":
+                    won_after = time.perf_counter() - started
+                    original.add_done_callback(lambda _: self.hedging.record_gain(
+                        time.perf_counter() - started - won_after))
+                return future.result()
+        self.hedging.record_call(hedged=True)
+        # Both failed: the original's error decides (e.g. 429 moves on in the chain)
+        raise original.exception()
+
+    def _call_model(self, index: int, route: str, messages, acquired: bool = False, **kwargs: Any) -> Any:
+        """One request to one model of the chain, with accounting and metrics"""
+        llm = self._checkout(index)
+        try:
+            return self._send(llm, self.models[index], route, messages, acquired=acquired, **kwargs)
+        finally:
+            self._checkin(index, llm)
+
+    def _send(self, llm: BaseLLM, name: str, route: str, messages, acquired: bool = False, **kwargs: Any) -> Any:
+        """`acquired`: the caller already holds a rate limiter slot for this request"""
+        run = current_run()
+        cassette = active_cassette()
+        LLM_ROUTES.inc(agent=self.agent_name, model=name, route=route)
+        with span("llm.call", agent=self.agent_name, model=name, route=route) as llm_span:
+            if not (cassette and cassette.replaying or acquired):
+                with span("rate_limit.wait"):
+                    RATE_LIMIT_WAIT.observe(self.rate_limiter.acquire())
+                raise_if_cancelled()
+
+            # The agent executor sets stop words on the LLM it was given
+            llm.stop = self.stop
+            tokens_before = self._token_counts(llm)
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                if cassette and cassette.replaying:
+                    entry = cassette.replay_llm(self.agent_name, messages)
+                    llm._track_token_usage_internal(entry.get("tokens") or {})
+                    return entry["response"]
+
+                response = llm.call(messages, **kwargs)
+                if cassette and cassette.recording:
+                    tokens_after = self._token_counts(llm)
+                    cassette.record_llm(
+                        self.agent_name, messages, response,
+                        tokens={k: tokens_after[k] - tokens_before[k] for k in tokens_after},
+                        llm=llm,
+                    )
+                return response
+            except Exception as e:
+                outcome = "rate_limited" if is_rate_limit_error(e) else "error"
+                if run:
+                    run.add(llm_errors=1, rate_limited=int(outcome == "rate_limited"))
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                if not (cassette and cassette.replaying):
+                    self.health.record(name, elapsed, rate_limited=outcome == "rate_limited")
+                LLM_CALLS.inc(agent=self.agent_name, outcome=outcome)
+                LLM_CALL_DURATION.observe(elapsed, agent=self.agent_name)
+                LLM_MODEL_CALL_DURATION.observe(elapsed, model=name)
+                tokens_after = self._token_counts(llm)
+                used = {k: tokens_after[k] - tokens_before[k] for k in tokens_after}
+                if run:
+                    run.add(llm_calls=1, **used)
+                LLM_TOKENS.inc(used["prompt_tokens"], agent=self.agent_name, kind="prompt")
+                LLM_TOKENS.inc(used["completion_tokens"], agent=self.agent_name, kind="completion")
+                llm_span.set_attributes(outcome=outcome, **used)
+
+    @staticmethod
+    def _token_counts(llm: BaseLLM) -> Dict[str, int]:
+        """Cumulative token usage reported by one provider LLM"""
+        try:
+            usage = llm.get_token_usage_summary()
+        except Exception:
+            return {"prompt_tokens": 0, "completion_tokens": 0}
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        }
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        """Usage of every provider LLM used so far (fallbacks and hedges included)"""
+        summary = self.inner.get_token_usage_summary()
+        with self._pool_lock:
+            others = self._built[1:]
+        for llm in others:
+            summary.add_usage_metrics(llm.get_token_usage_summary())
+        return summary
+
+
+def managed_llm(agent_name: str, model: Optional[str] = None,
+                models: Union[str, Sequence[str], None] = None) -> ManagedLLM:
+    """LLM for one of the crew's agents (`models`: its agents.yaml chain)"""
+    chain = [model] if model else agent_models(agent_name, models)
+    return ManagedLLM(model=chain[0], agent_name=agent_name, fallbacks=chain[1:])
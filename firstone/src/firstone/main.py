@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 import sys
 import warnings
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 import time
 import asyncio
@@ -9,7 +9,12 @@ import asyncio
 from crewai.flow.flow import Flow, listen, router, start
 from pydantic import BaseModel
 
-from firstone.crew import Firstone
+from firstone import budget, early_stop, papers, review_pipeline, speculation
+from firstone.crew import Firstone, PaperRecord
+from firstone.paper_catalog import get_paper_catalog
+from firstone.report_store import get_report_store
+from firstone.flow_hooks import InstrumentedFlow, backoff, crew_kickoff
+from firstone.run_context import current_run
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -19,14 +24,22 @@ class ResearchFlowState(BaseModel):
     topic: str = ""
     current_year: str = ""
     research_result: str = ""
+    papers: List[PaperRecord] = []  # Structured research output, stored once per run
     feedback: Optional[str] = None
     valid: bool = False
     retry_count: int = 0
+    token_budget: Optional[int] = None  # None: FIRSTONE_RUN_TOKEN_BUDGET
+    budget_action: Optional[str] = None  # Cheaper path taken near the budget
+    speculative_synthesis: Optional[bool] = None  # None: FIRSTONE_SPECULATIVE_SYNTHESIS
+    pipelined_review: Optional[bool] = None  # None: FIRSTONE_PIPELINED_REVIEW
+    paper_verdicts: List[dict] = []  # Per-paper reviews of the last attempt (pipelined mode)
 
 
-class ResearchFlow(Flow[ResearchFlowState]):
+class ResearchFlow(InstrumentedFlow, Flow[ResearchFlowState]):
     """Flow for iterative research-review-synthesis workflow"""
 
+    _speculation: Optional[speculation.Speculation] = None  # Synthesis started during the review
+
     @start("retry")
     def generate_research(self):
         """Generate research with researcher agent"""
@@ -38,7 +51,7 @@ class ResearchFlow(Flow[ResearchFlowState]):
         if self.state.retry_count > 0:
             delay = 10  # 10 seconds delay between retries
             print(f"⏱️  Waiting {delay} seconds before retry to respect API rate limits...")
-            time.sleep(delay)
+            backoff(delay, reason="retry_delay")
         
         # Prepare inputs with feedback if available
         inputs = {
@@ -65,11 +78,20 @@ FOCUS ON THESE IMPROVEMENTS:
 This is attempt {self.state.retry_count + 1} of 3. Make it count!
 """
         
+        # Opt-in: papers are reviewed one by one while the research goes on
+        research_task = Firstone().research_task()
+        pipeline = None
+        if review_pipeline.enabled(self.state.pipelined_review):
+            pipeline = review_pipeline.ReviewPipeline(self.state.topic)
+            pipeline.attach(research_task)
+        # Ends the researcher's tool loop once it has enough qualifying papers
+        early_stop.EarlyStopController(self.state.current_year, pipeline=pipeline).attach(research_task.agent)
+        
         # Create research crew (researcher only)
         from crewai import Crew, Process
         research_crew = Crew(
             agents=[Firstone().researcher()],
-            tasks=[Firstone().research_task()],
+            tasks=[research_task],
             process=Process.sequential,
             verbose=True,
             memory=False,  # Disable memory to reduce API calls
@@ -78,20 +100,41 @@ This is attempt {self.state.retry_count + 1} of 3. Make it count!
         )
         
         try:
-            result = research_crew.kickoff(inputs=inputs)
+            with crew_kickoff("researcher"):
+                result = research_crew.kickoff(inputs=inputs)
             print("\n📄 Research result received")
-            self.state.research_result = result.raw
+            self.keep_research(result, pipeline)
         except Exception as e:
             if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
                 print(f"\n⚠️  API Quota Exceeded. Waiting 60 seconds before retry...")
-                time.sleep(60)
+                backoff(60, reason="quota_exceeded")
                 # Retry once after waiting
-                result = research_crew.kickoff(inputs=inputs)
+                with crew_kickoff("researcher"):
+                    result = research_crew.kickoff(inputs=inputs)
                 print("\n📄 Research result received (after retry)")
-                self.state.research_result = result.raw
+                self.keep_research(result, pipeline)
             else:
                 raise e
 
+    def keep_research(self, result, pipeline=None):
+        """Store the researcher's paper records once for the run"""
+        self.state.papers = papers.from_result(result)
+        self.state.paper_verdicts = []
+        if pipeline:
+            verdicts = pipeline.drain(self.state.papers)
+            self.state.paper_verdicts = [verdict.to_dict() for verdict in verdicts]
+            # Only the accepted papers go on to the synthesis
+            self.state.papers = pipeline.accepted() or self.state.papers
+            print(f"🧪 {len(pipeline.accepted())}/{len(verdicts)} paper(s) accepted during the research")
+        self.state.research_result = papers.to_markdown(self.state.papers) if self.state.papers else result.raw
+        if self.state.papers:
+            get_report_store().put(self.state.id, papers.PAPERS_ARTIFACT, papers.to_json(self.state.papers))
+            # Later runs find these papers in the local catalog
+            catalog = get_paper_catalog()
+            if catalog:
+                catalog.add_papers(self.state.papers, origin=f"run:{self.state.id}")
+        print(f"📑 {len(self.state.papers)} paper record(s)")
+
     @router(generate_research)
     def evaluate_research(self):
         """Evaluate research with reviewer agent"""
@@ -104,15 +147,45 @@ This is attempt {self.state.retry_count + 1} of 3. Make it count!
             print("\n⚠️  Maximum retry count reached (3 attempts)")
             return "max_retry_exceeded"
         
+        if self.state.paper_verdicts:
+            # Papers were already reviewed one by one (see review_pipeline.py)
+            self.state.valid, self.state.feedback = review_pipeline.outcome(self.state.paper_verdicts)
+        else:
+            self.review_research()
+        
+        print(f"\n✅ Valid: {self.state.valid}")
+        if self.state.feedback:
+            print(f"📝 Feedback: {self.state.feedback[:200]}...")
+        
+        self.state.retry_count += 1
+        
+        if self.state.valid:
+            print("\n✅ Research APPROVED - Proceeding to synthesis")
+            return "approved"
+        
+        self.drop_speculation()
+        if not budget.can_retry(papers.for_review(self.state.papers, self.state.research_result)):
+            print("\n💸 Token budget nearly spent - no further retries")
+            self.state.budget_action = budget.SKIP_RETRY
+            budget.record_action(budget.SKIP_RETRY)
+            return "max_retry_exceeded"
+        
+        print(f"\n❌ Research REJECTED - Retry {self.state.retry_count}/3")
+        return "retry"
+
+    def review_research(self):
+        """Review the whole research with the reviewer agent"""
         # Create review crew (reviewer only)
         from crewai import Crew, Process, Task
         
         # Create a standalone review task with the research result as context
+        # Compact projection of the paper records instead of the whole report
         review_task = Task(
             description=f"""
-Review and critically evaluate this research report about {self.state.topic}:
+Review and critically evaluate these research papers about {self.state.topic}.
+{papers.REVIEW_NOTE}
 
-{self.state.research_result}
+{papers.for_review(self.state.papers, self.state.research_result)}
 
 Follow the strict quality criteria defined in your task configuration.
 """,
@@ -128,7 +201,14 @@ Follow the strict quality criteria defined in your task configuration.
             verbose=True,
         )
         
-        result = review_crew.kickoff(inputs={"topic": self.state.topic})
+        # Opt-in: the synthesis starts now and is kept only if the review approves
+        self.speculate_synthesis()
+        try:
+            with crew_kickoff("reviewer"):
+                result = review_crew.kickoff(inputs={"topic": self.state.topic})
+        except Exception:
+            self.drop_speculation()
+            raise
         
         # Extract validation from pydantic output
         if hasattr(result, 'pydantic') and result.pydantic:
@@ -159,19 +239,6 @@ Follow the strict quality criteria defined in your task configuration.
                 print(f"⚠️  Could not parse review output: {e}")
                 self.state.valid = False
                 self.state.feedback = "Review parsing failed"
-        
-        print(f"\n✅ Valid: {self.state.valid}")
-        if self.state.feedback:
-            print(f"📝 Feedback: {self.state.feedback[:200]}...")
-        
-        self.state.retry_count += 1
-        
-        if self.state.valid:
-            print("\n✅ Research APPROVED - Proceeding to synthesis")
-            return "approved"
-        
-        print(f"\n❌ Research REJECTED - Retry {self.state.retry_count}/3")
-        return "retry"
 
     @listen("approved")
     def synthesize_result(self):
@@ -180,11 +247,55 @@ Follow the strict quality criteria defined in your task configuration.
         print(f"📊 GENERATING SYNTHESIS REPORT")
         print(f"{'='*80}\n")
         
-        # Create synthesis crew
-        from crewai import Crew, Process
+        # A shorter report when the token budget is nearly spent
+        approved_research = papers.for_synthesis(self.state.papers, self.state.research_result)
+        short = budget.use_short_synthesis(approved_research)
+        if short:
+            print("💸 Token budget nearly spent - writing a short synthesis")
+            self.state.budget_action = budget.SHORT_SYNTHESIS
+            budget.record_action(budget.SHORT_SYNTHESIS)
+        
+        # The speculative synthesis started during the review, if its input still holds
+        speculative, self._speculation = self._speculation, None
+        result = speculative.take(key=(approved_research, short)) if speculative else None
+        if result is not None:
+            print("⚡ Using the synthesis written during the review")
+        else:
+            result = self.run_synthesis(approved_research, short, self.state.retry_count)
+        
+        # Persist in this run's own namespace of the report store
+        store = get_report_store()
+        store.put(self.state.id, "synthesis_report.md", str(result.raw))
+        
+        print(f"\n{'='*80}")
+        print(f"✅ SYNTHESIS COMPLETE")
+        print(f"Total iterations: {self.state.retry_count}")
+        run = current_run()
+        if run:
+            print(f"Tokens used: {run.total_tokens}" + (f" / {run.token_budget}" if run.token_budget else ""))
+        print(f"Output saved to: {store.relative_path(self.state.id, 'synthesis_report.md')} (store: {store.root})")
+        print(f"{'='*80}\n")
+
+    def run_synthesis(self, approved_research: str, short: bool, iterations: int):
+        """Run the synthesis crew on the approved paper records"""
+        from crewai import Crew, Process, Task
+        if short:
+            synthesis_task = Task(
+                description=budget.short_synthesis_description(self.state.topic, approved_research, iterations),
+                expected_output=budget.SHORT_SYNTHESIS_EXPECTED_OUTPUT,
+                agent=Firstone().synthesizer(),
+            )
+        else:
+            # The YAML task plus the compact paper records it works from
+            synthesis_config = Firstone().tasks_config['synthesis_task']
+            synthesis_task = Task(
+                description=f"{synthesis_config['description']}\n\nAPPROVED RESEARCH PAPERS:\n{approved_research}",
+                expected_output=synthesis_config['expected_output'],
+                agent=Firstone().synthesizer(),
+            )
         synthesis_crew = Crew(
             agents=[Firstone().synthesizer()],
-            tasks=[Firstone().synthesize_task()],
+            tasks=[synthesis_task],
             process=Process.sequential,
             verbose=True,
         )
@@ -192,41 +303,82 @@ Follow the strict quality criteria defined in your task configuration.
         synthesis_inputs = {
             "topic": self.state.topic,
             "current_year": self.state.current_year,
-            "approved_research": self.state.research_result
         }
         
-        result = synthesis_crew.kickoff(inputs=synthesis_inputs)
-        
-        print(f"\n{'='*80}")
-        print(f"✅ SYNTHESIS COMPLETE")
-        print(f"Total iterations: {self.state.retry_count}")
-        print(f"Output saved to: output/synthesis_report.md")
-        print(f"{'='*80}\n")
+        with crew_kickoff("synthesizer"):
+            return synthesis_crew.kickoff(inputs=synthesis_inputs)
+
+    def speculate_synthesis(self):
+        """Start the synthesis on the research under review (see speculation.py)"""
+        if not speculation.enabled(self.state.speculative_synthesis):
+            return
+        approved_research = papers.for_synthesis(self.state.papers, self.state.research_result)
+        iterations = self.state.retry_count + 1  # If this review approves
+        print("⚡ Speculative synthesis started alongside the review")
+        # Runs without a token budget, so the synthesis is never the short one
+        self._speculation = speculation.Speculation.start(
+            "synthesis",
+            lambda: self.run_synthesis(approved_research, False, iterations),
+            key=(approved_research, False),
+        )
+
+    def drop_speculation(self):
+        """Cancel the speculative synthesis after a rejected (or failed) review"""
+        speculative, self._speculation = self._speculation, None
+        if speculative:
+            speculative.cancel()
+            print("⚡ Speculative synthesis discarded")
 
     @listen("max_retry_exceeded")
     def max_retry_exceeded_exit(self):
         """Handle max retry exceeded"""
+        stopped_by_budget = self.state.budget_action == budget.SKIP_RETRY
         print(f"\n{'='*80}")
-        print(f"❌ RESEARCH FAILED - MAX RETRIES EXCEEDED")
+        if stopped_by_budget:
+            print(f"❌ RESEARCH STOPPED - TOKEN BUDGET SPENT")
+        else:
+            print(f"❌ RESEARCH FAILED - MAX RETRIES EXCEEDED")
         print(f"{'='*80}")
         print(f"Total attempts: {self.state.retry_count}")
-        print(f"The research could not meet quality criteria after 3 attempts.")
+        if stopped_by_budget:
+            print(f"The token budget left no room for another attempt.")
+        else:
+            print(f"The research could not meet quality criteria after 3 attempts.")
         print(f"Last feedback: {self.state.feedback}")
         print(f"{'='*80}\n")
         
-        # Save failed research to file
-        with open("output/failed_research.md", "w") as file:
-            file.write(f"# Failed Research Report\n\n")
-            file.write(f"**Topic:** {self.state.topic}\n\n")
-            file.write(f"**Attempts:** {self.state.retry_count}\n\n")
-            file.write(f"## Last Research Output\n\n{self.state.research_result}\n\n")
-            file.write(f"## Last Reviewer Feedback\n\n{self.state.feedback}\n")
+        # Save failed research in this run's namespace of the report store
+        stopped = "**Stopped:** token budget spent\n\n" if stopped_by_budget else ""
+        get_report_store().put(
+            self.state.id,
+            "failed_research.md",
+            f"# Failed Research Report\n\n"
+            f"**Topic:** {self.state.topic}\n\n"
+            f"**Attempts:** {self.state.retry_count}\n\n"
+            f"{stopped}"
+            f"## Last Research Output\n\n{self.state.research_result}\n\n"
+            f"## Last Reviewer Feedback\n\n{self.state.feedback}\n",
+        )
 
 
 def run():
     """
     Run the research flow with iterative research-review loop.
+    
+    `firstone batch ...` runs many topics instead (see batch()), and
+    `firstone cassette record|replay ...` records or replays a run (see cassette()),
+    `firstone catalog import|search|stats` manages the local paper catalog (see catalog()).
     """
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "cassette":
+        cassette(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "catalog":
+        catalog(sys.argv[2:])
+        return
+    
     # Check for API keys
     import os
     from dotenv import load_dotenv
@@ -274,6 +426,42 @@ def run():
             raise e
 
 
+def batch(argv=None):
+    """
+    Run many topics concurrently under a shared rate limiter and tool cache,
+    streaming results as JSONL (see firstone.batch).
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    from firstone.batch import main as batch_main
+    batch_main(sys.argv[1:] if argv is None else argv)
+
+
+def cassette(argv=None):
+    """
+    Record a run's LLM and tool traffic to a cassette file, or replay one
+    offline at full speed (see firstone.cassette).
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    from firstone.cassette import main as cassette_main
+    cassette_main(sys.argv[1:] if argv is None else argv)
+
+
+def catalog(argv=None):
+    """
+    Import arXiv metadata dumps into the local paper catalog, search it or
+    show its size (see firstone.paper_catalog).
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    from firstone.paper_catalog import main as catalog_main
+    catalog_main(sys.argv[1:] if argv is None else argv)
+
+
 def plot():
     """
     Plot the research flow diagram.
@@ -0,0 +1,314 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Counters, gauges and histograms are plain Python objects guarded by a lock,
+cheap enough to update on every LLM call, tool call or WebSocket message.
+`registry.render()` produces the exposition text served by ``/metrics``.
+The metrics recorded by the flow, the crews, the LLM layer and the tools are
+declared at the bottom of this module.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, sized for LLM-bound steps (seconds to minutes)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# Buckets for in-process work such as a WebSocket fan-out
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed upper bounds"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels: str) -> Dict[str, float]:
+        """Count and sum of the observations for one label set"""
+        with self._lock:
+            row = self._values.get(self._key(labels))
+        if row is None:
+            return {"count": 0, "sum": 0.0}
+        return {"count": row[-1], "sum": row[-2]}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(row[-2])}")
+            lines.append(f"{self.name}_count{self._labels(key)} {_format_value(row[-1])}")
+        return lines
+
+
+class Registry:
+    """Named collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modules reloaded by the dev server re-declare their metrics
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Research flow
+FLOW_RUNS = registry.counter(
+    "firstone_flow_runs_total", "Research flows finished, by outcome", ["outcome"])
+FLOW_DURATION = registry.histogram(
+    "firstone_flow_duration_seconds", "Wall time of a whole research flow")
+FLOW_STEP_DURATION = registry.histogram(
+    "firstone_flow_step_duration_seconds", "Wall time of each flow step", ["step"])
+FLOW_REVIEW_ATTEMPTS = registry.histogram(
+    "firstone_flow_review_attempts", "Research/review iterations needed per topic",
+    buckets=(1, 2, 3, 4))
+FLOW_BUDGET_ACTIONS = registry.counter(
+    "firstone_flow_budget_actions_total",
+    "Cheaper paths taken by runs near their token budget (skip_retry, short_synthesis)", ["action"])
+FLOW_SPECULATIONS = registry.counter(
+    "firstone_flow_speculations_total",
+    "Speculative steps started ahead of the review, by outcome (used, cancelled, stale, failed)",
+    ["name", "outcome"])
+PIPELINE_PAPERS = registry.counter(
+    "firstone_pipeline_papers_total",
+    "Papers in the pipelined review, by outcome (submitted, accepted, rejected)", ["outcome"])
+FLOW_ACTIVE = registry.gauge(
+    "firstone_flow_active", "Research flows currently running")
+
+# Researcher early stopping
+RESEARCH_EARLY_STOPS = registry.counter(
+    "firstone_research_early_stops_total",
+    "Researcher tool loops ended early, by reason (target, stalled)", ["reason"])
+RESEARCH_STEPS = registry.histogram(
+    "firstone_research_early_stop_steps", "Tool steps taken by the researcher before an early stop",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15))
+
+# Crews
+CREW_KICKOFF_DURATION = registry.histogram(
+    "firstone_crew_kickoff_duration_seconds", "Wall time of a crew kickoff, by agent", ["agent"])
+CREW_KICKOFFS = registry.counter(
+    "firstone_crew_kickoffs_total", "Crew kickoffs, by agent and outcome", ["agent", "outcome"])
+
+# LLM
+LLM_CALLS = registry.counter(
+    "firstone_llm_calls_total", "LLM calls, by agent and outcome (ok, error, rate_limited)",
+    ["agent", "outcome"])
+LLM_CALL_DURATION = registry.histogram(
+    "firstone_llm_call_duration_seconds", "LLM call latency, by agent", ["agent"])
+LLM_MODEL_CALL_DURATION = registry.histogram(
+    "firstone_llm_model_call_duration_seconds", "LLM call latency, by model", ["model"])
+LLM_ROUTES = registry.counter(
+    "firstone_llm_routes_total",
+    "Model used per LLM call and why (primary, rate_limited or slow: a preferred model was skipped)",
+    ["agent", "model", "route"])
+LLM_HEDGES = registry.counter(
+    "firstone_llm_hedges_total",
+    "Hedged LLM requests, by agent and outcome (won: the duplicate answered first, lost: the original did, "
+    "skipped: no free rate limiter slot for the duplicate)",
+    ["agent", "outcome"])
+LLM_HEDGE_GAIN = registry.histogram(
+    "firstone_llm_hedge_gain_seconds", "Latency saved by winning hedges (original minus hedged answer time)",
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120))
+LLM_TOKENS = registry.counter(
+    "firstone_llm_tokens_total", "Tokens reported by the LLM provider, by agent and kind (prompt, completion)",
+    ["agent", "kind"])
+RATE_LIMIT_WAIT = registry.histogram(
+    "firstone_rate_limit_wait_seconds", "Time spent waiting on the shared LLM rate limiter",
+    buckets=(0.001, 0.01, 0.1, 1, 5, 10, 30, 60))
+
+# Tools
+TOOL_CALLS = registry.counter(
+    "firstone_tool_calls_total", "Tool calls, by tool and cache result (hit, miss)",
+    ["tool", "cache"])
+TOOL_CALL_DURATION = registry.histogram(
+    "firstone_tool_call_duration_seconds", "Latency of tool calls that missed the cache",
+    ["tool"])
+
+# arXiv API
+ARXIV_REQUESTS = registry.counter(
+    "firstone_arxiv_requests_total", "arXiv API requests, by kind (search, id_list) and outcome (ok, retry, error)",
+    ["kind", "outcome"])
+ARXIV_BATCH_SIZE = registry.histogram(
+    "firstone_arxiv_batch_size", "arXiv IDs fetched per id_list request",
+    buckets=(1, 2, 5, 10, 25, 50, 100))
+ARXIV_PACING_WAIT = registry.histogram(
+    "firstone_arxiv_pacing_wait_seconds", "Time spent waiting for an arXiv request slot",
+    buckets=(0.001, 0.01, 0.1, 1, 3, 10, 30, 60))
+
+# Shared HTTP pool
+HTTP_REQUESTS = registry.counter(
+    "firstone_http_requests_total", "Requests sent through the shared HTTP pool, by host and status",
+    ["host", "status"])
+HTTP_CONNECTIONS = registry.counter(
+    "firstone_http_connections_opened_total",
+    "Connections opened by the shared HTTP pool, by host (requests minus connections were reused)", ["host"])
+HTTP_REQUEST_DURATION = registry.histogram(
+    "firstone_http_request_duration_seconds", "Latency of requests through the shared HTTP pool", ["host"])
+
+# PDF executor (uploads and extraction off the event loop)
+PDF_TASKS = registry.counter(
+    "firstone_pdf_tasks_total", "PDF executor tasks, by operation and outcome (ok, error, rejected)",
+    ["op", "outcome"])
+PDF_TASK_DURATION = registry.histogram(
+    "firstone_pdf_task_duration_seconds", "Time a PDF task spent running in its worker", ["op"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+PDF_QUEUE_WAIT = registry.histogram(
+    "firstone_pdf_queue_wait_seconds", "Time a PDF task waited for a free worker", ["op"],
+    buckets=FAST_BUCKETS + (10, 30))
+PDF_PENDING = registry.gauge(
+    "firstone_pdf_tasks_pending", "PDF tasks queued or running in the executor")
+
+# PDF text normalization (estimated tokens, see pdf_text.estimate_tokens)
+PDF_TEXT_CHARS = registry.counter(
+    "firstone_pdf_text_chars_total", "Characters of extracted PDF text, raw and after normalization", ["stage"])
+PDF_TEXT_TOKENS = registry.counter(
+    "firstone_pdf_text_tokens_total", "Estimated tokens of extracted PDF text, raw and after normalization",
+    ["stage"])
+PDF_BACKEND_CHOICES = registry.counter(
+    "firstone_pdf_backend_choices_total",
+    "Documents extracted per PDF backend, by how it was chosen (sampled, cached, forced, only, fallback)",
+    ["backend", "source"])
@@ -0,0 +1,178 @@
+"""
+Model chains, model health and the hedging policy of the LLM call layer.
+
+Kept apart from llm.py (which needs crewAI) so the API can configure and
+report them, e.g. in /health and /metrics/llm, without loading the agent
+machinery. See llm.py for how `ManagedLLM` uses them.
+"""
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Union
+
+from firstone.metrics import LLM_HEDGE_GAIN
+from firstone.run_context import current_run
+
+
+# Agent name -> model chain set by the application (overrides env and agents.yaml)
+_agent_models: Dict[str, List[str]] = {}
+
+
+def parse_models(value: Union[str, Sequence[str], None]) -> List[str]:
+    """Model chain from a comma-separated string or a list"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [model.strip() for model in value if model and model.strip()]
+
+
+def set_agent_models(agent_name: str, models: Union[str, Sequence[str], None]) -> None:
+    """Model chain of `agent_name`, preferred model first (empty: back to the defaults)"""
+    chain = parse_models(models)
+    if chain:
+        _agent_models[agent_name] = chain
+    else:
+        _agent_models.pop(agent_name, None)
+
+
+def agent_models(agent_name: str, configured: Union[str, Sequence[str], None] = None) -> List[Optional[str]]:
+    """Model chain of an agent (`configured`: its agents.yaml ``models``); [None] is MODEL"""
+    return (
+        _agent_models.get(agent_name)
+        or parse_models(os.getenv(f"FIRSTONE_{agent_name.upper()}_MODELS"))
+        or parse_models(configured)
+        or [None]
+    )
+
+
+class ModelHealth:
+    """Recent behaviour of each model, shared by every agent and run"""
+
+    def __init__(self, cooldown: float = 60.0, slow_seconds: float = 45.0, smoothing: float = 0.3,
+                 window: int = 200):
+        self.cooldown = cooldown
+        self.slow_seconds = slow_seconds
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._latency: Dict[str, float] = {}
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._cooling: Dict[str, float] = {}
+        self._reason: Dict[str, str] = {}
+
+    def cooling(self, model: str) -> Optional[str]:
+        """Why `model` is skipped for now (rate_limited, slow), None if usable"""
+        with self._lock:
+            if time.monotonic() < self._cooling.get(model, 0.0):
+                return self._reason[model]
+            return None
+
+    def record(self, model: str, elapsed: float, rate_limited: bool = False) -> None:
+        with self._lock:
+            if rate_limited:
+                self._cool(model, "rate_limited")
+                return
+            self._samples[model].append(elapsed)
+            previous = self._latency.get(model)
+            latency = elapsed if previous is None else previous + self.smoothing * (elapsed - previous)
+            self._latency[model] = latency
+            if self.slow_seconds and latency > self.slow_seconds:
+                self._cool(model, "slow")
+
+    def _cool(self, model: str, reason: str) -> None:
+        self._cooling[model] = time.monotonic() + self.cooldown
+        self._reason[model] = reason
+        # Measured afresh once the cooldown is over
+        self._latency.pop(model, None)
+
+    def percentile(self, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Latency percentile of the model's recent answers (None: too few of them)"""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            models = set(self._latency) | set(self._cooling) | set(self._samples)
+            cooling = {model: self._cooling.get(model, 0.0) - now for model in models}
+            state = {
+                model: {
+                    "latency_s": round(self._latency[model], 3) if model in self._latency else None,
+                    "cooling_s": round(max(cooling[model], 0.0), 1),
+                    "reason": self._reason.get(model) if cooling[model] > 0 else None,
+                }
+                for model in sorted(models)
+            }
+        for model, entry in state.items():
+            p95 = self.percentile(model, 0.95)
+            entry["p95_s"] = round(p95, 3) if p95 is not None else None
+        return state
+
+
+model_health = ModelHealth(
+    cooldown=float(os.getenv("FIRSTONE_LLM_FALLBACK_COOLDOWN", "60")),
+    slow_seconds=float(os.getenv("FIRSTONE_LLM_SLOW_SECONDS", "45")),
+)
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate of a slow LLM call: after the `percentile`
+    latency of the model's recent answers (at least `min_delay` seconds,
+    once `min_samples` answers were seen). Off by default; runs with a token
+    budget never hedge since the duplicate's tokens are spent either way.
+    """
+
+    def __init__(self, enabled: bool = False, percentile: float = 0.95,
+                 min_samples: int = 20, min_delay: float = 1.0):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "hedged": 0, "won": 0}
+        self._gain = 0.0
+
+    def record_call(self, hedged: bool = False, won: bool = False) -> None:
+        """One call that could be hedged (`hedged`: it was, `won`: by the duplicate)"""
+        with self._lock:
+            self._counts["calls"] += 1
+            self._counts["hedged"] += hedged
+            self._counts["won"] += won
+
+    def record_gain(self, seconds: float) -> None:
+        LLM_HEDGE_GAIN.observe(seconds)
+        with self._lock:
+            self._gain += seconds
+
+    def deadline(self, health: ModelHealth, model: str) -> Optional[float]:
+        """Seconds to wait before hedging a call to `model` (None: don't hedge)"""
+        if not self.enabled:
+            return None
+        run = current_run()
+        if run is not None and run.token_budget:
+            return None
+        latency = health.percentile(model, self.percentile, self.min_samples)
+        return None if latency is None else max(latency, self.min_delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+            gain = self._gain
+        return {
+            "enabled": self.enabled,
+            **counts,
+            "hedge_rate": round(counts["hedged"] / counts["calls"], 4) if counts["calls"] else 0.0,
+            "gain_s": round(gain, 3),
+        }
+
+
+hedge_policy = HedgePolicy(
+    enabled=os.getenv("FIRSTONE_LLM_HEDGE", "").lower() in ("1", "true", "yes", "on"),
+    percentile=float(os.getenv("FIRSTONE_LLM_HEDGE_PERCENTILE", "0.95")),
+    min_delay=float(os.getenv("FIRSTONE_LLM_HEDGE_MIN_DELAY", "1.0")),
+)
@@ -0,0 +1,386 @@
+"""
+Local catalog of papers with full-text search (SQLite FTS5).
+
+Every run's paper records are added to the catalog, and offline arXiv
+metadata dumps (the JSON-lines snapshot published on Kaggle, optionally
+gzipped) can be bulk imported. The researcher searches the catalog first
+(see tools/catalog_tool.py), so most candidate papers are found locally in
+milliseconds and the arXiv/Serper APIs are only used for gaps.
+
+    firstone catalog import arxiv-metadata-oai-snapshot.json --categories cs.AI,cs.CL
+    firstone catalog search "retrieval augmented generation" -n 5
+    firstone catalog stats
+
+Papers are deduplicated by arXiv ID when they have one, by normalized title
+otherwise; a paper seen again keeps the longest text of each field.
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from firstone.report_store import get_report_store
+from firstone.result_cache import STOPWORDS, normalize_topic
+
+if TYPE_CHECKING:  # crew.py imports the catalog tool
+    from firstone.crew import PaperRecord
+
+_ARXIV_ID = re.compile(r"(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?", re.IGNORECASE)
+_YEAR = re.compile(r"\b(19|20)\d{2}\b")
+
+
+@dataclass
+class CatalogHit:
+    """A paper found in the catalog"""
+    title: str
+    authors: str
+    year: Optional[int]
+    source: str
+    link: str
+    abstract: str
+    categories: str
+    origin: str
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def arxiv_id(*values: str) -> Optional[str]:
+    """arXiv ID (without version) found in a source or link, if any"""
+    for value in values:
+        if not value or ("arxiv" not in value.lower() and not _ARXIV_ID.fullmatch(value.strip())):
+            continue
+        match = _ARXIV_ID.search(value)
+        if match:
+            return match.group(1).lower()
+    return None
+
+
+def paper_key(title: str, source: str = "", link: str = "") -> str:
+    identifier = arxiv_id(source, link)
+    if identifier:
+        return f"arxiv:{identifier}"
+    return f"title:{normalize_topic(title)}"
+
+
+def fts_query(text: str) -> str:
+    """FTS5 query matching any significant term of `text` (ranked by bm25)"""
+    terms = [t for t in re.findall(r"\w+", text.lower()) if len(t) > 1 and t not in STOPWORDS]
+    return " OR ".join(f'"{t}"' for t in dict.fromkeys(terms))
+
+
+class PaperCatalog:
+    """SQLite table of papers indexed by an external-content FTS5 table"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.searches = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS papers (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL UNIQUE,
+                    title TEXT NOT NULL,
+                    authors TEXT NOT NULL DEFAULT '',
+                    year INTEGER,
+                    source TEXT NOT NULL DEFAULT '',
+                    link TEXT NOT NULL DEFAULT '',
+                    abstract TEXT NOT NULL DEFAULT '',
+                    categories TEXT NOT NULL DEFAULT '',
+                    origin TEXT NOT NULL,
+                    seen INTEGER NOT NULL DEFAULT 1,
+                    added_at REAL NOT NULL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                    title, abstract, authors,
+                    content='papers', content_rowid='id', tokenize='porter unicode61'
+                );
+                CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+                    INSERT INTO papers_fts(rowid, title, abstract, authors)
+                    VALUES (new.id, new.title, new.abstract, new.authors);
+                END;
+                CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+                    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors)
+                    VALUES ('delete', old.id, old.title, old.abstract, old.authors);
+                END;
+                CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE OF title, abstract, authors ON papers BEGIN
+                    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors)
+                    VALUES ('delete', old.id, old.title, old.abstract, old.authors);
+                    INSERT INTO papers_fts(rowid, title, abstract, authors)
+                    VALUES (new.id, new.title, new.abstract, new.authors);
+                END;
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # A paper seen again keeps the longest value of each text field
+    _UPSERT = """
+        INSERT INTO papers (key, title, authors, year, source, link, abstract, categories, origin, added_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET
+            title = CASE WHEN length(excluded.title) > length(title) THEN excluded.title ELSE title END,
+            authors = CASE WHEN length(excluded.authors) > length(authors) THEN excluded.authors ELSE authors END,
+            year = coalesce(year, excluded.year),
+            source = CASE WHEN source = '' THEN excluded.source ELSE source END,
+            link = CASE WHEN link = '' THEN excluded.link ELSE link END,
+            abstract = CASE WHEN length(excluded.abstract) > length(abstract) THEN excluded.abstract ELSE abstract END,
+            categories = CASE WHEN categories = '' THEN excluded.categories ELSE categories END,
+            seen = seen + 1
+    """
+
+    def add_rows(self, rows: Iterable[Sequence[Any]], conn: Optional[sqlite3.Connection] = None) -> int:
+        """Upsert rows of (title, authors, year, source, link, abstract, categories, origin)"""
+        now = time.time()
+        params = [
+            (paper_key(title, source, link), title, authors, year, source, link, abstract, categories, origin, now)
+            for title, authors, year, source, link, abstract, categories, origin in rows
+            if title
+        ]
+        if not params:
+            return 0
+        if conn is not None:
+            conn.executemany(self._UPSERT, params)
+        else:
+            with self._connect() as conn:
+                conn.executemany(self._UPSERT, params)
+        return len(params)
+
+    def add_papers(self, papers: Iterable["PaperRecord"], origin: str = "run") -> int:
+        """Add a run's paper records"""
+        return self.add_rows(
+            (p.title.strip(), ", ".join(p.authors), p.year, p.source, p.link, p.abstract, "", origin)
+            for p in papers
+        )
+
+    def search(self, query: str, limit: int = 10, min_year: Optional[int] = None) -> List[CatalogHit]:
+        """Papers matching any term of `query`, best bm25 score first (titles weigh most)"""
+        expression = fts_query(query)
+        if not expression:
+            return []
+        sql = (
+            "SELECT p.title, p.authors, p.year, p.source, p.link, p.abstract, p.categories, p.origin, "
+            "bm25(papers_fts, 5.0, 1.0, 0.5) AS score "
+            "FROM papers_fts JOIN papers p ON p.id = papers_fts.rowid "
+            "WHERE papers_fts MATCH ?"
+        )
+        params: List[Any] = [expression]
+        if min_year:
+            sql += " AND (p.year IS NULL OR p.year >= ?)"
+            params.append(min_year)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        with self._lock:
+            self.searches += 1
+            self.hits += bool(rows)
+        return [CatalogHit(*row) for row in rows]
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM papers").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            by_origin = dict(conn.execute(
+                "SELECT CASE WHEN origin LIKE 'run%' THEN 'run' ELSE origin END AS o, count(*) "
+                "FROM papers GROUP BY o"
+            ).fetchall())
+        return {
+            "papers": sum(by_origin.values()),
+            "by_origin": by_origin,
+            "searches": self.searches,
+            "search_hit_rate": self.hits / self.searches if self.searches else 0.0,
+            "db_bytes": self.db_path.stat().st_size if self.db_path.exists() else 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Bulk import of arXiv metadata dumps
+
+    def import_arxiv_dump(
+        self,
+        path: Union[str, Path],
+        categories: Optional[Sequence[str]] = None,
+        since_year: Optional[int] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 5000,
+        progress: Optional[IO[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Import an arXiv metadata snapshot (one JSON object per line, ``.gz`` accepted).
+
+        Args:
+            path: Dump file
+            categories: Keep papers with a category starting with one of these (e.g. "cs.")
+            since_year: Skip papers published before this year
+            limit: Stop after this many imported papers
+            batch_size: Rows per executemany (one transaction per batch)
+            progress: Stream for progress lines
+        """
+        started = time.perf_counter()
+        read = imported = 0
+        opener = gzip.open if str(path).endswith(".gz") else open
+        batch: List[tuple] = []
+
+        def flush():
+            nonlocal imported
+            with self._connect() as conn:
+                conn.execute("PRAGMA synchronous=NORMAL")
+                imported += self.add_rows(batch, conn=conn)
+            batch.clear()
+            if progress:
+                print(f"  {read} read, {imported} imported...", file=progress)
+
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                read += 1
+                row = arxiv_dump_row(json.loads(line), categories, since_year)
+                if row is None:
+                    continue
+                batch.append(row)
+                if limit and imported + len(batch) >= limit:
+                    break
+                if len(batch) >= batch_size:
+                    flush()
+        if batch:
+            flush()
+
+        elapsed = time.perf_counter() - started
+        return {
+            "read": read,
+            "imported": imported,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(imported / elapsed) if elapsed else None,
+        }
+
+
+def _dump_authors(entry: Dict[str, Any]) -> str:
+    parsed = entry.get("authors_parsed")
+    if parsed:
+        return ", ".join(" ".join(part for part in (a[1], a[0]) if part).strip() for a in parsed)
+    return re.sub(r"\s+and\s+", ", ", " ".join(str(entry.get("authors", "")).split()))
+
+
+def _dump_year(entry: Dict[str, Any]) -> Optional[int]:
+    versions = entry.get("versions") or []
+    for text in ([versions[0].get("created", "")] if versions else []) + [entry.get("update_date", "")]:
+        match = _YEAR.search(text or "")
+        if match:
+            return int(match.group(0))
+    return None
+
+
+def arxiv_dump_row(entry: Dict[str, Any], categories: Optional[Sequence[str]] = None,
+                   since_year: Optional[int] = None) -> Optional[tuple]:
+    """Catalog row for one arXiv snapshot entry, None if filtered out"""
+    identifier = str(entry.get("id", "")).strip()
+    if not identifier:
+        return None
+    entry_categories = str(entry.get("categories", ""))
+    if categories and not any(c.startswith(tuple(categories)) for c in entry_categories.split()):
+        return None
+    year = _dump_year(entry)
+    if since_year and year and year < since_year:
+        return None
+    return (
+        " ".join(str(entry.get("title", "")).split()),
+        _dump_authors(entry),
+        year,
+        f"arXiv:{identifier}",
+        f"https://arxiv.org/abs/{identifier}",
+        " ".join(str(entry.get("abstract", "")).split()),
+        entry_categories,
+        "arxiv_dump",
+    )
+
+
+_default_catalog: Optional[PaperCatalog] = None
+_configured = False
+
+
+def get_paper_catalog() -> Optional[PaperCatalog]:
+    """
+    Catalog used by the flows and the researcher's catalog tool.
+
+    FIRSTONE_PAPER_CATALOG sets the database path (default: next to the
+    report store), FIRSTONE_PAPER_CATALOG=off disables it.
+    """
+    global _default_catalog, _configured
+    if not _configured:
+        path = os.getenv("FIRSTONE_PAPER_CATALOG", str(get_report_store().root / "paper_catalog.sqlite3"))
+        if path.lower() not in ("", "0", "off", "false"):
+            _default_catalog = PaperCatalog(path)
+        _configured = True
+    return _default_catalog
+
+
+def set_paper_catalog(catalog: Optional[PaperCatalog]) -> None:
+    """Use `catalog` as the process default (None disables the catalog)"""
+    global _default_catalog, _configured
+    _default_catalog = catalog
+    _configured = True
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    """``firstone catalog import|search|stats``"""
+    parser = argparse.ArgumentParser(prog="firstone catalog", description=main.__doc__)
+    parser.add_argument("--db", default=None, help="Catalog database (default: FIRSTONE_PAPER_CATALOG)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Bulk import an arXiv metadata dump (JSON lines, .gz ok)")
+    imp.add_argument("dump")
+    imp.add_argument("--categories", default="", help="Comma-separated category prefixes, e.g. cs.AI,cs.CL")
+    imp.add_argument("--since", type=int, default=None, help="Skip papers published before this year")
+    imp.add_argument("--limit", type=int, default=None, help="Import at most this many papers")
+    imp.add_argument("--batch-size", type=int, default=5000)
+    search = sub.add_parser("search", help="Full-text search of the catalog")
+    search.add_argument("query")
+    search.add_argument("-n", "--limit", type=int, default=10)
+    sub.add_parser("stats", help="Catalog size by origin")
+    args = parser.parse_args(argv)
+
+    catalog = PaperCatalog(args.db) if args.db else get_paper_catalog()
+    if catalog is None:
+        parser.error("the paper catalog is disabled (FIRSTONE_PAPER_CATALOG)")
+
+    if args.command == "import":
+        categories = [c.strip() for c in args.categories.split(",") if c.strip()]
+        print(f"📥 Importing {args.dump} into {catalog.db_path}...", file=sys.stderr)
+        result = catalog.import_arxiv_dump(args.dump, categories or None, args.since,
+                                           args.limit, args.batch_size, progress=sys.stderr)
+    elif args.command == "search":
+        started = time.perf_counter()
+        hits = catalog.search(args.query, limit=args.limit)
+        result = {
+            "query": args.query,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "hits": [hit.to_dict() for hit in hits],
+        }
+    else:
+        result = catalog.stats()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
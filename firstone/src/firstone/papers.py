@@ -0,0 +1,153 @@
+"""
+Paper records shared between the flow's stages.
+
+The research task returns typed `PaperRecord` entries (see crew.py). They are
+kept once per run, in the flow state and as ``papers.json`` in the run's
+report store namespace. The later stages are not given the researcher's whole
+report: they get a compact projection that keeps only the fields they use,
+with long text fields clipped (the clipped fields show their full word count
+so the reviewer can still check length requirements).
+
+Researcher answers that are not valid JSON (older cassettes, models ignoring
+the schema) are parsed from the markdown layout the task used to ask for.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from firstone.crew import PaperRecord, ResearchPapers
+
+PAPERS_ARTIFACT = "papers.json"
+
+# Told to the reviewer along with the clipped records
+REVIEW_NOTE = (
+    "One record per paper. Long fields are clipped; the word count in parentheses "
+    "is the length of the full text."
+)
+
+# Field -> max characters (None: unclipped) for each consumer of the records
+REVIEW_VIEW: Dict[str, Optional[int]] = {
+    "title": None, "authors": 120, "year": None, "source": None, "link": None,
+    "abstract": 400, "methodology": 250, "findings": 250,
+}
+SYNTHESIS_VIEW: Dict[str, Optional[int]] = {
+    "title": None, "authors": 120, "year": None, "link": None,
+    "methodology": 300, "findings": 600, "significance": 400,
+}
+
+
+def from_result(result: Any) -> List[PaperRecord]:
+    """Paper records from a research crew output (pydantic, JSON or markdown)"""
+    pydantic = getattr(result, "pydantic", None)
+    if isinstance(pydantic, ResearchPapers):
+        return list(pydantic.papers)
+    return parse(str(getattr(result, "raw", result) or ""))
+
+
+def parse(text: str) -> List[PaperRecord]:
+    """Paper records from a researcher answer, JSON first, then markdown"""
+    if "{" in text:
+        try:
+            data = json.loads(text[text.index("{"):text.rindex("}") + 1], strict=False)
+            if isinstance(data, dict) and isinstance(data.get("papers"), list):
+                return ResearchPapers.model_validate(data).papers
+        except ValueError:
+            pass
+    return parse_markdown(text)
+
+
+_SECTION = re.compile(r"^##(?!#)\s*(?:\d+[.)]\s*)?(.+?)\s*$", re.MULTILINE)
+_FIELD = re.compile(r"^\s*(?:[-*]\s*)?\*\*([A-Za-z /]+?):?\*\*:?\s*(.*)$")
+_HEADING = re.compile(r"^#{3,}\s*(.+?)\s*$")
+_FIELD_NAMES = {
+    "authors": "authors", "author": "authors", "year": "year", "source": "source",
+    "link": "link", "url": "link", "doi": "link", "abstract": "abstract", "summary": "abstract",
+    "research question": "research_question", "objective": "research_question",
+    "methodology": "methodology", "approach": "methodology",
+    "findings": "findings", "results": "findings", "main findings": "findings",
+    "significance": "significance", "impact": "significance",
+}
+
+
+def parse_markdown(text: str) -> List[PaperRecord]:
+    """Parse the ``## 1. Title`` / ``**Field:** value`` report layout"""
+    records = []
+    sections = list(_SECTION.finditer(text))
+    for i, section in enumerate(sections):
+        body = text[section.end():sections[i + 1].start() if i + 1 < len(sections) else len(text)]
+        fields: Dict[str, str] = {}
+        current = None
+        for line in body.splitlines():
+            field_match = _FIELD.match(line)
+            heading = _HEADING.match(line)
+            if field_match or heading:
+                label = (field_match.group(1) if field_match else heading.group(1)).strip().lower()
+                current = _FIELD_NAMES.get(label)
+                value = field_match.group(2).strip() if field_match else ""
+                if current and value:
+                    fields[current] = f"{fields[current]} {value}".strip() if current in fields else value
+            elif current and line.strip():
+                fields[current] = f"{fields.get(current, '')} {line.strip()}".strip()
+        if fields:
+            records.append(PaperRecord(title=section.group(1).strip("[] "), **fields))
+    return records
+
+
+def _clip(value: str, limit: Optional[int]) -> str:
+    value = " ".join(value.split())
+    if limit is None or len(value) <= limit:
+        return value
+    return f"{value[:limit].rsplit(' ', 1)[0]}… ({len(value.split())} words)"
+
+
+def project(papers: List[PaperRecord], view: Dict[str, Optional[int]]) -> str:
+    """Compact text listing of `papers` restricted to the fields of `view`"""
+    blocks = []
+    for i, paper in enumerate(papers, 1):
+        head = [f"[{i}] {paper.title}"]
+        if "year" in view and paper.year:
+            head.append(f"({paper.year})")
+        lines = [" ".join(head)]
+        for name, limit in view.items():
+            if name in ("title", "year"):
+                continue
+            value = getattr(paper, name)
+            if isinstance(value, list):
+                value = ", ".join(value)
+            lines.append(f"  {name}: {_clip(value, limit) if value else '(missing)'}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def for_review(papers: List[PaperRecord], fallback: str = "") -> str:
+    """What the reviewer sees (`fallback`, the raw report, when nothing was parsed)"""
+    return project(papers, REVIEW_VIEW) if papers else fallback
+
+
+def for_synthesis(papers: List[PaperRecord], fallback: str = "") -> str:
+    """What the synthesizer sees (`fallback`, the raw report, when nothing was parsed)"""
+    return project(papers, SYNTHESIS_VIEW) if papers else fallback
+
+
+def to_markdown(papers: List[PaperRecord]) -> str:
+    """Full human-readable report of the records (failed-run reports, fallbacks)"""
+    sections = []
+    for i, paper in enumerate(papers, 1):
+        sections.append(
+            f"## {i}. {paper.title}\n"
+            f"**Authors:** {', '.join(paper.authors)}\n"
+            f"**Year:** {paper.year or ''}\n"
+            f"**Source:** {paper.source}\n"
+            f"**Link:** {paper.link}\n\n"
+            f"### Abstract\n{paper.abstract}\n\n"
+            f"### Detailed Explanation\n"
+            f"**Research Question:** {paper.research_question}\n"
+            f"**Methodology:** {paper.methodology}\n"
+            f"**Findings:** {paper.findings}\n"
+            f"**Significance:** {paper.significance}\n"
+        )
+    return "\n".join(sections)
+
+
+def to_json(papers: List[PaperRecord]) -> str:
+    return ResearchPapers(papers=papers).model_dump_json(indent=2)
@@ -0,0 +1,269 @@
+"""
+Per-document choice of the PDF text extraction backend.
+
+pdfplumber gives the cleanest text on complex layouts but is several times
+slower than pypdf / PyPDF2 on plain text PDFs. For a new document,
+`choose_backend` extracts a few sample pages (first, middle, last of the
+range to read) with every installed backend and keeps the fastest one
+whose sample is as complete (`MIN_COVERAGE` of the longest sample) and as
+clean (`MIN_QUALITY` of the best `text_quality`) as the others.
+
+The choice is stored by document hash (SHA-256 of the file) in a SQLite
+table, so a document seen before (re-uploaded, attached to another run,
+read by another worker process) is extracted with its backend at once.
+
+FIRSTONE_PDF_BACKEND forces a backend (pdfplumber, pypdf or PyPDF2;
+default auto) and FIRSTONE_PDF_BACKEND_CACHE sets the database path
+(default: next to the report store, "off" keeps choices in memory only).
+"""
+import importlib
+import importlib.util
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from firstone.report_store import get_report_store
+from firstone.result_cache import file_digest
+
+AUTO = "auto"
+# Preference order when no sample can tell the backends apart
+BACKEND_ORDER = ("pdfplumber", "pypdf", "PyPDF2")
+SAMPLE_PAGES = 3
+MIN_COVERAGE = 0.9
+MIN_QUALITY = 0.9
+# Longer runs of Latin letters are words run together by a backend that lost the spaces
+MAX_WORD_CHARS = 30
+
+_NOISE = re.compile(r"\(cid:\d+\)|[\ufffd\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Latin letters only: scripts written without spaces (CJK) are not penalized
+_RUN_TOGETHER = re.compile(r"[A-Za-zÀ-ÖØ-öø-ÿ]{%d,}" % (MAX_WORD_CHARS + 1))
+
+PageSelector = Callable[[int], Sequence[int]]
+
+
+def _pdfplumber(pdf_path: str, select: PageSelector) -> Tuple[int, List[Optional[str]]]:
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
+        return total_pages, [pdf.pages[i].extract_text() for i in select(total_pages)]
+
+
+def _pypdf_reader(module_name: str):
+    def read(pdf_path: str, select: PageSelector) -> Tuple[int, List[Optional[str]]]:
+        module = importlib.import_module(module_name)
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = module.PdfReader(file)
+            total_pages = len(pdf_reader.pages)
+            return total_pages, [pdf_reader.pages[i].extract_text() for i in select(total_pages)]
+    return read
+
+
+BACKENDS: Dict[str, Callable[[str, PageSelector], Tuple[int, List[Optional[str]]]]] = {
+    "pdfplumber": _pdfplumber,
+    "pypdf": _pypdf_reader("pypdf"),
+    "PyPDF2": _pypdf_reader("PyPDF2"),
+}
+
+_available: Optional[List[str]] = None
+
+
+def available_backends() -> List[str]:
+    """Installed backends, in `BACKEND_ORDER`"""
+    global _available
+    if _available is None:
+        _available = [name for name in BACKEND_ORDER if importlib.util.find_spec(name) is not None]
+    return list(_available)
+
+
+def text_quality(text: str) -> float:
+    """Share of the text that is neither glyph noise nor words run together (0 for no text)"""
+    if not text.strip():
+        return 0.0
+    noise = sum(len(match) for match in _NOISE.findall(text))
+    merged = sum(len(run) for run in _RUN_TOGETHER.findall(text))
+    return max(0.0, 1 - (noise + merged) / len(text))
+
+
+def sample_pages(pages_to_read: int, count: int = SAMPLE_PAGES) -> List[int]:
+    """`count` page indexes spread over the first `pages_to_read` pages"""
+    if pages_to_read <= count:
+        return list(range(pages_to_read))
+    return sorted({round(i * (pages_to_read - 1) / (count - 1)) for i in range(count)})
+
+
+def _page_range(max_pages: Optional[int]) -> PageSelector:
+    return lambda total: range(min(total, max_pages) if max_pages else total)
+
+
+@dataclass
+class BackendChoice:
+    """Backend picked for a document and how (forced, cached, sampled, only, fallback)"""
+    backend: str
+    source: str
+    timings: Dict[str, float] = field(default_factory=dict)
+    quality: Dict[str, float] = field(default_factory=dict)
+    selection_seconds: float = 0.0
+
+
+class BackendCache:
+    """Backend chosen for each document hash, in SQLite (shared by processes) and in memory"""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None):
+        self.db_path = Path(db_path) if db_path else None
+        self._memory: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if self.db_path is not None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS backends (
+                        digest TEXT PRIMARY KEY,
+                        backend TEXT NOT NULL,
+                        timings TEXT NOT NULL,
+                        chosen_at REAL NOT NULL
+                    )
+                    """
+                )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            backend = self._memory.get(digest)
+        if backend is None and self.db_path is not None:
+            with self._connect() as conn:
+                row = conn.execute("SELECT backend FROM backends WHERE digest = ?", (digest,)).fetchone()
+            if row:
+                backend = row[0]
+                with self._lock:
+                    self._memory[digest] = backend
+        return backend
+
+    def put(self, digest: str, choice: BackendChoice) -> None:
+        with self._lock:
+            self._memory[digest] = choice.backend
+        if self.db_path is not None:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO backends VALUES (?, ?, ?, ?)",
+                    (digest, choice.backend, json.dumps(choice.timings), time.time()),
+                )
+
+
+_default_backend = os.getenv("FIRSTONE_PDF_BACKEND", AUTO)
+_cache: Optional[BackendCache] = None
+_cache_lock = threading.Lock()
+
+
+def set_default_backend(backend: str = AUTO, cache_path: Optional[str] = None) -> None:
+    """
+    Backend used by `read_pages` (a name from `BACKENDS`, or auto) and the
+    choice database ("off" for memory only; None keeps the current one).
+    Also the initializer of the API's PDF worker processes.
+    """
+    global _default_backend, _cache
+    if backend != AUTO and backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend {backend!r} (expected auto or one of {', '.join(BACKENDS)})")
+    _default_backend = backend
+    if cache_path is not None:
+        with _cache_lock:
+            _cache = BackendCache(None if cache_path.lower() in ("", "0", "off", "false") else cache_path)
+
+
+def get_backend_cache() -> BackendCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            path = os.getenv("FIRSTONE_PDF_BACKEND_CACHE", str(get_report_store().root / "pdf_backends.sqlite3"))
+            _cache = BackendCache(None if path.lower() in ("", "0", "off", "false") else path)
+        return _cache
+
+
+def _sample(pdf_path: str, backends: List[str], max_pages: Optional[int]):
+    """Time and score each backend on the sample pages; returns {backend: (seconds, chars, quality, total, pages)}"""
+    results = {}
+    for name in backends:
+        importlib.import_module(name)  # Import time is not extraction time
+        started = time.perf_counter()
+        try:
+            total, pages = BACKENDS[name](
+                pdf_path, lambda total: sample_pages(min(total, max_pages) if max_pages else total))
+        except Exception:
+            continue
+        elapsed = time.perf_counter() - started
+        text = "\n".join(page or "" for page in pages)
+        results[name] = (elapsed, len(text.strip()), text_quality(text), total, pages)
+    return results
+
+
+def choose_backend(pdf_path: str, max_pages: Optional[int] = None, digest: Optional[str] = None,
+                   _samples: Optional[dict] = None) -> BackendChoice:
+    """Backend for this document: forced, known from its hash, or picked from sample pages"""
+    backends = available_backends()
+    if not backends:
+        raise ImportError("No PDF backend installed (pdfplumber, pypdf or PyPDF2)")
+    if _default_backend != AUTO:
+        return BackendChoice(_default_backend, "forced")
+    if len(backends) == 1:
+        return BackendChoice(backends[0], "only")
+
+    digest = digest or file_digest(pdf_path)
+    cache = get_backend_cache()
+    known = cache.get(digest)
+    if known in backends:
+        return BackendChoice(known, "cached")
+
+    started = time.perf_counter()
+    samples = _sample(pdf_path, backends, max_pages)
+    if _samples is not None:
+        _samples.update(samples)
+    if not samples:
+        # Every backend failed on the samples: let the preferred one report the error
+        return BackendChoice(backends[0], "fallback", selection_seconds=time.perf_counter() - started)
+
+    longest = max(chars for _, chars, _, _, _ in samples.values())
+    best = max(quality for _, _, quality, _, _ in samples.values())
+    acceptable = [
+        name for name, (_, chars, quality, _, _) in samples.items()
+        if chars >= MIN_COVERAGE * longest and quality >= MIN_QUALITY * best
+    ]
+    choice = BackendChoice(
+        backend=min(acceptable, key=lambda name: samples[name][0]),
+        source="sampled",
+        timings={name: round(result[0], 4) for name, result in samples.items()},
+        quality={name: round(result[2], 4) for name, result in samples.items()},
+        selection_seconds=time.perf_counter() - started,
+    )
+    cache.put(digest, choice)
+    return choice
+
+
+def read_pages(pdf_path: str, max_pages: Optional[int] = None,
+               digest: Optional[str] = None) -> Tuple[int, List[Optional[str]], BackendChoice]:
+    """Total page count, text of the first `max_pages` pages, and the backend that read them"""
+    samples: dict = {}
+    choice = choose_backend(pdf_path, max_pages, digest, _samples=samples)
+    if choice.backend in samples:
+        total, pages = samples[choice.backend][3:]
+        if len(pages) == (min(total, max_pages) if max_pages else total):
+            # The sample already covers every page to read
+            return total, pages, choice
+    total, pages = BACKENDS[choice.backend](pdf_path, _page_range(max_pages))
+    return total, pages, choice
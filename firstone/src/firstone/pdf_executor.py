@@ -0,0 +1,127 @@
+"""
+Bounded executor for PDF work, off the API's event loop.
+
+Copying an upload, hashing it, counting pages or extracting text all block,
+and text extraction is CPU-bound pure Python: run on the event loop (or in
+a thread, where it holds the GIL) it stalls every WebSocket and HTTP
+request of the process. `PdfExecutor` runs such work elsewhere:
+
+- CPU-bound operations in a pool of worker processes (spawned, so they
+  don't inherit the server's threads and only import what the task needs),
+- blocking file I/O in a small thread pool (the GIL is released while
+  waiting on the disk).
+
+At most `max_pending` tasks are queued or running; past that `run` raises
+`PdfExecutorBusy` at once instead of growing an unbounded backlog. Each task
+reports its queue wait and run time (``firstone_pdf_*`` metrics).
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from firstone.metrics import PDF_PENDING, PDF_QUEUE_WAIT, PDF_TASK_DURATION, PDF_TASKS
+
+
+class PdfExecutorBusy(Exception):
+    """Raised when `max_pending` PDF tasks are already queued or running"""
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[float, float, Any]:
+    """Runs in the worker: (start, end) wall-clock times and the result"""
+    started = time.time()
+    result = fn(*args)
+    return started, time.time(), result
+
+
+class PdfExecutor:
+    """Process pool for CPU-bound PDF work, thread pool for blocking file I/O"""
+
+    def __init__(self, workers: int = 2, max_pending: int = 32, processes: bool = True, io_threads: int = 4,
+                 initializer: Optional[Callable[..., Any]] = None, initargs: Tuple[Any, ...] = ()):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.processes = processes
+        self.io_threads = max(1, io_threads)
+        # Run once in each CPU worker, e.g. to apply the parent's settings in spawned processes
+        self.initializer = initializer
+        self.initargs = initargs
+        self._cpu: Optional[Executor] = None
+        self._io: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _pool(self, cpu: bool) -> Executor:
+        with self._lock:
+            if cpu and self._cpu is None:
+                if self.processes:
+                    self._cpu = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context("spawn"),
+                        initializer=self.initializer, initargs=self.initargs,
+                    )
+                else:
+                    self._cpu = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix="pdf-cpu",
+                        initializer=self.initializer, initargs=self.initargs,
+                    )
+            if not cpu and self._io is None:
+                self._io = ThreadPoolExecutor(self.io_threads, thread_name_prefix="pdf-io")
+            return self._cpu if cpu else self._io
+
+    async def run(self, op: str, fn: Callable[..., Any], *args: Any, cpu: bool = True) -> Any:
+        """
+        Run ``fn(*args)`` in the process pool (`cpu`) or the I/O thread pool.
+        With processes, `fn` and its arguments must be picklable (module-level
+        functions, plain values).
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                PDF_TASKS.inc(op=op, outcome="rejected")
+                raise PdfExecutorBusy(f"{self._pending} PDF tasks already pending")
+            self._pending += 1
+            PDF_PENDING.set(self._pending)
+        submitted = time.time()
+        outcome = "ok"
+        try:
+            future = self._pool(cpu).submit(_timed, fn, *args)
+            started, ended, result = await asyncio.wrap_future(future)
+            PDF_QUEUE_WAIT.observe(max(started - submitted, 0.0), op=op)
+            PDF_TASK_DURATION.observe(ended - started, op=op)
+            return result
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            PDF_TASKS.inc(op=op, outcome=outcome)
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                PDF_PENDING.set(self._pending)
+
+    def headroom(self) -> int:
+        """Tasks that can still be submitted before `run` raises `PdfExecutorBusy`"""
+        with self._lock:
+            return self.max_pending - self._pending
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._cpu, self._io = (self._cpu, self._io), None, None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "processes": self.processes,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
@@ -0,0 +1,290 @@
+"""
+Text extraction from PDF files.
+
+Plain functions without crewAI, so they can run in the API's worker
+processes (see the backend's PDF executor) as well as behind the PDF
+Document Reader tool. The extraction backend (pdfplumber, pypdf, PyPDF2) is
+picked per document, see pdf_backends.py.
+
+The raw page text is normalized before it reaches a prompt (`normalize_pages`):
+
+- running headers and footers (lines repeated at the top or bottom of most
+  pages, digits ignored, so "Journal 3 (12)" matches "Journal 3 (13)") and
+  page numbers (a bare number on the outermost line of a page, within the
+  page count, or counting up from page to page) are dropped,
+- words hyphenated across a line break are joined (compounds such as
+  "state-of-the-art" or "self-attention" keep their hyphen),
+- ``(cid:NN)`` glyph placeholders are dropped and whitespace is compacted,
+- optionally, the bibliography is cut (from a "References" heading to the
+  end, or to an appendix).
+
+FIRSTONE_PDF_NORMALIZE=0 turns normalization off and
+FIRSTONE_PDF_DROP_REFERENCES=1 cuts bibliographies by default. Each
+document's backend and its character and estimated token reduction are
+returned by `extract_pdf_text` and counted in the ``firstone_pdf_*`` metrics.
+"""
+import os
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from firstone.metrics import PDF_BACKEND_CHOICES, PDF_TEXT_CHARS, PDF_TEXT_TOKENS
+from firstone.pdf_backends import read_pages
+
+# Lines examined at each end of a page for running headers and footers
+EDGE_LINES = 3
+# Share of pages a line must repeat on to count as a header or footer
+REPEAT_RATIO = 0.5
+MIN_REPEAT_PAGES = 3
+
+_PAGE_NUMBER = re.compile(r"^[-–]?\s*(page\s*)?(?P<number>\d{1,4})(\s*(/|of)\s*\d+)?\s*[-–]?$", re.IGNORECASE)
+_HYPHEN_BREAK = re.compile(r"(\S*[A-Za-zÀ-ÖØ-öø-ÿ])-\n(?=[a-zß-öø-ÿ])")
+_CID = re.compile(r"\(cid:\d+\)")
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_REFERENCES = re.compile(r"^(\d+\.?\s*|[IVX]+\.?\s*)?(references|bibliography|works cited|literature cited|"
+                         r"références|bibliographie|参考文献)\s*:?$", re.IGNORECASE)
+_APPENDIX = re.compile(r"^(appendix|appendices|supplementary material|annexe)\b", re.IGNORECASE)
+_PIECES = re.compile(r"\w+|[^\w\s]")
+# Words that keep their hyphen when a compound is broken after them ("self-\nattention")
+COMPOUND_PREFIXES = {
+    "all", "anti", "co", "cross", "end", "ex", "few", "fine", "half", "high", "large", "long", "low",
+    "multi", "non", "one", "open", "post", "quasi", "real", "self", "semi", "short", "small", "state",
+    "two", "well", "zero",
+}
+
+_normalize = os.getenv("FIRSTONE_PDF_NORMALIZE", "1").lower() not in ("0", "false", "no", "off")
+_drop_references = os.getenv("FIRSTONE_PDF_DROP_REFERENCES", "").lower() in ("1", "true", "yes", "on")
+
+
+def set_default_normalization(enabled: bool, drop_references: bool = False) -> None:
+    """Normalization applied when `read_pdf_text` / `extract_pdf_text` get no explicit setting"""
+    global _normalize, _drop_references
+    _normalize = bool(enabled)
+    _drop_references = bool(drop_references)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate BPE token count: one per punctuation mark, one per word plus
+    one per 6 characters of long words. Tracks whitespace and glyph noise,
+    which a characters / 4 estimate does not.
+    """
+    return sum(1 + len(piece) // 6 for piece in _PIECES.findall(text))
+
+
+@dataclass
+class ExtractionStats:
+    """Backend that read one document, and its text size before and after normalization"""
+    chars_before: int
+    chars_after: int
+    tokens_before: int
+    tokens_after: int
+    header_lines_removed: int = 0
+    hyphenations_joined: int = 0
+    references_chars_removed: int = 0
+    backend: str = ""
+    backend_source: str = ""
+    backend_selection_seconds: float = 0.0
+
+    @property
+    def char_reduction(self) -> float:
+        return 1 - self.chars_after / self.chars_before if self.chars_before else 0.0
+
+    @property
+    def token_reduction(self) -> float:
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            **asdict(self),
+            "char_reduction": round(self.char_reduction, 4),
+            "token_reduction": round(self.token_reduction, 4),
+        }
+
+
+def _line_key(line: str) -> str:
+    """Line identity for header/footer detection: case, spacing and digits ignored"""
+    return re.sub(r"\d+", "#", _SPACES.sub(" ", line.strip().lower()))
+
+
+def _edges(lines: List[str]) -> List[int]:
+    """Indexes of the first and last `EDGE_LINES` non-blank lines of a page"""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return sorted(set(filled[:EDGE_LINES] + filled[-EDGE_LINES:]))
+
+
+def _page_numbers(pages: List[List[str]]) -> List[Dict[int, int]]:
+    """Edge lines of each page that hold only a page number: {line index: number}"""
+    candidates = [
+        {i: int(_PAGE_NUMBER.match(lines[i].strip()).group("number"))
+         for i in _edges(lines) if _PAGE_NUMBER.match(lines[i].strip())}
+        for lines in pages
+    ]
+    numbers = []
+    for page_index, (lines, found) in enumerate(zip(pages, candidates)):
+        filled = [i for i, line in enumerate(lines) if line.strip()]
+        outermost = {filled[0], filled[-1]} if filled else set()
+        previous = set(candidates[page_index - 1].values()) if page_index else set()
+        following = set(candidates[page_index + 1].values()) if page_index + 1 < len(pages) else set()
+        # A bare number is a page number on the outermost line (within the page count),
+        # or when it counts up from the previous page or to the next one; otherwise
+        # it is content (a year, the last value of a table...)
+        numbers.append({
+            i: number for i, number in found.items()
+            if (i in outermost and number <= len(pages))
+            or number - 1 in previous or number + 1 in following
+        })
+    return numbers
+
+
+def _strip_running_lines(pages: List[List[str]]) -> int:
+    """Drop repeated headers/footers and page numbers in place; returns lines removed"""
+    counts = Counter()
+    for lines in pages:
+        # Bare numbers are left to `_page_numbers`: with digits ignored they would all match
+        counts.update({_line_key(lines[i]) for i in _edges(lines) if not _PAGE_NUMBER.match(lines[i].strip())})
+    # With fewer than MIN_REPEAT_PAGES pages nothing counts as running: page numbers only
+    threshold = max(MIN_REPEAT_PAGES, REPEAT_RATIO * len(pages))
+    running = {key for key, count in counts.items() if count >= threshold}
+
+    removed = 0
+    for lines, numbers in zip(pages, _page_numbers(pages)):
+        for i in _edges(lines):
+            if i in numbers or (not _PAGE_NUMBER.match(lines[i].strip()) and _line_key(lines[i]) in running):
+                lines[i] = ""
+                removed += 1
+    return removed
+
+
+def _drop_bibliography(pages: List[str]) -> int:
+    """Cut from the last References heading in the second half of the document; returns chars removed"""
+    for page_index in range(len(pages) - 1, len(pages) // 2 - 1, -1):
+        lines = pages[page_index].split("\n")
+        heading = next((i for i in range(len(lines) - 1, -1, -1) if _REFERENCES.match(lines[i].strip())), None)
+        if heading is None:
+            continue
+        before = sum(len(page) for page in pages)
+        rest = ["\n".join(lines[heading:])] + pages[page_index + 1:]
+        pages[page_index] = "\n".join(lines[:heading]).rstrip()
+        # Everything after the heading goes, up to an appendix that follows the bibliography
+        for offset, page in enumerate(rest):
+            page_lines = page.split("\n")
+            appendix = next((i for i, line in enumerate(page_lines) if _APPENDIX.match(line.strip())), None)
+            kept = "\n".join(page_lines[appendix:]) if appendix is not None else ""
+            if offset == 0:
+                pages[page_index] = f"{pages[page_index]}\n\n{kept}".strip()
+            else:
+                pages[page_index + offset] = kept
+            if appendix is not None:
+                break
+        return before - sum(len(page) for page in pages)
+    return 0
+
+
+def _join_hyphen_break(match: re.Match) -> str:
+    """Rejoin a word broken across lines; a compound keeps its hyphen ("state-of-\nthe-art")"""
+    fragment = match.group(1)
+    word = re.sub(r"^\W+", "", fragment).lower()
+    if "-" in fragment or word in COMPOUND_PREFIXES:
+        return f"{fragment}-"
+    return fragment
+
+
+def normalize_pages(pages: List[Optional[str]], drop_references: bool = False) -> Tuple[List[str], Dict[str, int]]:
+    """Normalized text of each page, and counts of what was removed"""
+    split = [(page or "").split("\n") for page in pages]
+    header_lines = _strip_running_lines(split)
+
+    normalized, hyphenations = [], 0
+    for lines in split:
+        text = _CID.sub("", "\n".join(line.strip() for line in lines))
+        text = _SPACES.sub(" ", text)
+        text, joined = _HYPHEN_BREAK.subn(_join_hyphen_break, text)
+        hyphenations += joined
+        normalized.append(_BLANK_LINES.sub("\n\n", text).strip())
+
+    references = _drop_bibliography(normalized) if drop_references else 0
+    return normalized, {
+        "header_lines_removed": header_lines,
+        "hyphenations_joined": hyphenations,
+        "references_chars_removed": references,
+    }
+
+
+def extract_pdf_text(pdf_path: str, max_pages: Optional[int] = None, normalize: Optional[bool] = None,
+                     drop_references: Optional[bool] = None,
+                     digest: Optional[str] = None) -> Tuple[str, Optional[ExtractionStats]]:
+    """
+    Text of the first `max_pages` pages (all by default) after a metadata
+    header, and its extraction stats (None on error). `digest` is the file's
+    SHA-256 when the caller already has it. Records no metrics, so it can run
+    in a worker process: see `record_extraction`.
+    """
+    if not os.path.exists(pdf_path):
+        return f"Error: PDF file not found at {pdf_path}", None
+    normalize = _normalize if normalize is None else normalize
+    drop_references = _drop_references if drop_references is None else drop_references
+
+    try:
+        total_pages, pages, choice = read_pages(pdf_path, max_pages, digest)
+    except Exception as e:
+        return f"Error extracting text from PDF: {str(e)}", None
+
+    raw = _with_metadata(pdf_path, total_pages, pages)
+    text, removed = raw, {}
+    if normalize:
+        normalized_pages, removed = normalize_pages(pages, drop_references)
+        text = _with_metadata(pdf_path, total_pages, normalized_pages)
+    raw_tokens = estimate_tokens(raw)
+    stats = ExtractionStats(
+        chars_before=len(raw),
+        chars_after=len(text),
+        tokens_before=raw_tokens,
+        tokens_after=estimate_tokens(text) if normalize else raw_tokens,
+        backend=choice.backend,
+        backend_source=choice.source,
+        backend_selection_seconds=round(choice.selection_seconds, 4),
+        **removed,
+    )
+    return text, stats
+
+
+def record_extraction(stats: Optional[ExtractionStats]) -> None:
+    """Count a document's backend and text sizes in the ``firstone_pdf_*`` metrics"""
+    if stats is None:
+        return
+    PDF_BACKEND_CHOICES.inc(backend=stats.backend, source=stats.backend_source)
+    PDF_TEXT_CHARS.inc(stats.chars_before, stage="raw")
+    PDF_TEXT_CHARS.inc(stats.chars_after, stage="normalized")
+    PDF_TEXT_TOKENS.inc(stats.tokens_before, stage="raw")
+    PDF_TEXT_TOKENS.inc(stats.tokens_after, stage="normalized")
+
+
+def read_pdf_text(pdf_path: str, max_pages: Optional[int] = None, normalize: Optional[bool] = None,
+                  drop_references: Optional[bool] = None) -> str:
+    """Text of the first `max_pages` pages (all by default), after a metadata header"""
+    text, stats = extract_pdf_text(pdf_path, max_pages, normalize, drop_references)
+    record_extraction(stats)
+    return text
+
+
+def _with_metadata(pdf_path: str, total_pages: int, pages: list) -> str:
+    text_content = [f"--- Page {i+1} ---\n{text}" for i, text in enumerate(pages) if text]
+    metadata = f"PDF: {os.path.basename(pdf_path)}\n"
+    metadata += f"Total Pages: {total_pages}\n"
+    metadata += f"Pages Read: {len(pages)}\n"
+    metadata += f"{'='*80}\n\n"
+    return metadata + "\n\n".join(text_content)
+
+
+def pdf_summary(pdf_path: str) -> Tuple[int, str]:
+    """Page count and first page text (PyPDF2, fast), for upload previews"""
+    import PyPDF2
+
+    with open(pdf_path, 'rb') as pdf_file:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        page_count = len(pdf_reader.pages)
+        first_page = pdf_reader.pages[0].extract_text() if page_count else ""
+    return page_count, first_page or ""
@@ -0,0 +1,84 @@
+"""
+Process-wide rate limiting for LLM calls.
+
+crewAI's ``max_rpm`` is enforced per crew, so several flows running at the
+same time each get their own budget. The limiter here is shared by every
+agent in the process, which keeps concurrent runs under one provider quota.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+
+class RateLimiter:
+    """Sliding-window limiter: at most `max_per_minute` acquisitions per 60 s"""
+
+    def __init__(self, max_per_minute: int = 10, window_seconds: float = 60.0):
+        self.max_per_minute = max_per_minute
+        self.window_seconds = window_seconds
+        self._calls: Deque[float] = deque()
+        self._condition = threading.Condition()
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0] >= self.window_seconds:
+            self._calls.popleft()
+
+    def acquire(self) -> float:
+        """Block until a slot is free, returns the time spent waiting"""
+        if self.max_per_minute <= 0:
+            return 0.0
+        started = time.monotonic()
+        waited = False
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                if len(self._calls) < self.max_per_minute:
+                    self._calls.append(now)
+                    break
+                waited = True
+                self._condition.wait(self.window_seconds - (now - self._calls[0]))
+            elapsed = time.monotonic() - started
+            self.acquired += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += elapsed
+        return elapsed
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now (never waits)"""
+        if self.max_per_minute <= 0:
+            return True
+        with self._condition:
+            now = time.monotonic()
+            self._prune(now)
+            if len(self._calls) >= self.max_per_minute:
+                return False
+            self._calls.append(now)
+            self.acquired += 1
+            return True
+
+    def headroom(self) -> int:
+        """Number of calls that can be made right now without waiting"""
+        if self.max_per_minute <= 0:
+            return -1
+        with self._condition:
+            self._prune(time.monotonic())
+            return self.max_per_minute - len(self._calls)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_per_minute": self.max_per_minute,
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+# Shared by every ManagedLLM in the process (FIRSTONE_MAX_RPM, 0 disables)
+shared_rate_limiter = RateLimiter(int(os.getenv("FIRSTONE_MAX_RPM", "10")))
@@ -0,0 +1,221 @@
+"""
+Per-run, content-addressed storage for generated reports.
+
+Every research run gets its own artifact namespace (``runs/<run_id>/``) so
+concurrent runs never overwrite each other's output. The bytes themselves are
+stored once under ``objects/`` keyed by their SHA-256, which deduplicates
+identical reports across runs, and can optionally be compressed with zlib or
+lzma.
+"""
+import hashlib
+import json
+import lzma
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+
+# compression name -> (compress, decompress, file suffix)
+COMPRESSORS = {
+    "none": (lambda data: data, lambda data: data, ""),
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress, ".zz"),
+    "lzma": (lzma.compress, lzma.decompress, ".xz"),
+}
+
+_SAFE_COMPONENT = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+
+
+@dataclass
+class Artifact:
+    """Metadata for one artifact of a run"""
+    name: str
+    digest: str          # SHA-256 of the uncompressed content
+    size: int            # uncompressed size in bytes
+    stored_size: int     # size on disk after compression
+    compression: str
+    content_type: str
+    created_at: str
+
+
+class ReportStore:
+    """Stores run artifacts in per-run namespaces backed by a shared object store"""
+
+    def __init__(self, root: Union[str, Path], compression: str = "none"):
+        if compression not in COMPRESSORS:
+            raise ValueError(
+                f"Unknown compression '{compression}'. Supported: {', '.join(COMPRESSORS)}"
+            )
+        self.root = Path(root)
+        self.compression = compression
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _check_component(value: str, kind: str) -> str:
+        """Reject identifiers that could escape the store directory"""
+        if not value or not _SAFE_COMPONENT.match(value) or ".." in value:
+            raise ValueError(f"Invalid {kind}: {value!r}")
+        return value
+
+    def _run_dir(self, run_id: str) -> Path:
+        return self.root / "runs" / self._check_component(run_id, "run_id")
+
+    def _manifest_path(self, run_id: str) -> Path:
+        return self._run_dir(run_id) / "manifest.json"
+
+    def _object_path(self, digest: str, compression: str) -> Path:
+        suffix = COMPRESSORS[compression][2]
+        return self.root / "objects" / digest[:2] / f"{digest}{suffix}"
+
+    def relative_path(self, run_id: str, name: str) -> str:
+        """Human readable location of an artifact, for logs and progress messages"""
+        return f"runs/{run_id}/{name}"
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        """Write through a temporary file so readers never see partial content"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _load_manifest(self, run_id: str) -> Dict[str, Dict]:
+        path = self._manifest_path(run_id)
+        if not path.exists():
+            return {}
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f).get("artifacts", {})
+
+    def _find_object(self, digest: str) -> Optional[tuple]:
+        """Return (path, compression) of an existing object, whatever its compression"""
+        for compression in COMPRESSORS:
+            path = self._object_path(digest, compression)
+            if path.exists():
+                return path, compression
+        return None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def put(
+        self,
+        run_id: str,
+        name: str,
+        content: Union[str, bytes],
+        content_type: Optional[str] = None,
+    ) -> Artifact:
+        """
+        Store an artifact for a run.
+
+        Identical content is only written once to the object store; the run
+        manifest just points at the existing object.
+        """
+        self._check_component(name, "artifact name")
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+        if content_type is None:
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if name.endswith(".md"):
+                content_type = "text/markdown"
+
+        with self._lock:
+            existing = self._find_object(digest)
+            if existing:
+                object_path, compression = existing
+            else:
+                compression = self.compression
+                object_path = self._object_path(digest, compression)
+                self._atomic_write(object_path, COMPRESSORS[compression][0](data))
+
+            artifact = Artifact(
+                name=name,
+                digest=digest,
+                size=len(data),
+                stored_size=object_path.stat().st_size,
+                compression=compression,
+                content_type=content_type,
+                created_at=datetime.now().isoformat(),
+            )
+            artifacts = self._load_manifest(run_id)
+            artifacts[name] = asdict(artifact)
+            manifest = {"run_id": run_id, "artifacts": artifacts}
+            self._atomic_write(
+                self._manifest_path(run_id),
+                json.dumps(manifest, indent=2).encode("utf-8"),
+            )
+        return artifact
+
+    def stat(self, run_id: str, name: str) -> Artifact:
+        """Return artifact metadata, raising KeyError if it does not exist"""
+        self._check_component(name, "artifact name")
+        artifacts = self._load_manifest(run_id)
+        if name not in artifacts:
+            raise KeyError(f"Artifact '{name}' not found for run '{run_id}'")
+        return Artifact(**artifacts[name])
+
+    def get(self, run_id: str, name: str) -> bytes:
+        """Return the uncompressed content of an artifact"""
+        artifact = self.stat(run_id, name)
+        path = self._object_path(artifact.digest, artifact.compression)
+        if not path.exists():
+            raise KeyError(f"Object {artifact.digest} missing for '{name}' in run '{run_id}'")
+        return COMPRESSORS[artifact.compression][1](path.read_bytes())
+
+    def read_text(self, run_id: str, name: str) -> str:
+        """Return an artifact decoded as UTF-8"""
+        return self.get(run_id, name).decode("utf-8")
+
+    def exists(self, run_id: str, name: str) -> bool:
+        try:
+            self.stat(run_id, name)
+            return True
+        except (KeyError, ValueError):
+            return False
+
+    def list_artifacts(self, run_id: str) -> List[Artifact]:
+        """List the artifacts of a run"""
+        return [Artifact(**meta) for meta in self._load_manifest(run_id).values()]
+
+    def list_runs(self) -> List[str]:
+        """List run IDs that have at least one artifact"""
+        runs_dir = self.root / "runs"
+        if not runs_dir.exists():
+            return []
+        return sorted(p.name for p in runs_dir.iterdir() if (p / "manifest.json").exists())
+
+
+_default_store: Optional[ReportStore] = None
+
+
+def get_report_store() -> ReportStore:
+    """
+    Default store for the CLI flow.
+
+    Location and compression come from FIRSTONE_REPORT_DIR (default
+    ``output/store``) and FIRSTONE_REPORT_COMPRESSION (default ``none``).
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = ReportStore(
+            os.getenv("FIRSTONE_REPORT_DIR", "output/store"),
+            compression=os.getenv("FIRSTONE_REPORT_COMPRESSION", "none"),
+        )
+    return _default_store
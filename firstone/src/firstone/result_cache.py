@@ -0,0 +1,339 @@
+"""
+Cache of completed research results with near-duplicate topic matching.
+
+Entries are keyed by the normalized topic plus the set of attached PDF hashes.
+An exact key match is tried first; otherwise topics with the same PDF set are
+compared through MinHash signatures of their character shingles, so
+"LLM trends in 2025" and "the 2025 trends of LLMs" resolve to the same
+completed run. Numbers and short tokens must match exactly: "GPT-4 safety"
+and "GPT-5 safety" share most shingles but are different topics. The synthesis itself stays in the ReportStore; the cache only
+points at the run that produced it.
+"""
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Union
+
+from firstone.report_store import ReportStore, get_report_store
+
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "de", "des", "du", "en", "et",
+    "for", "from", "in", "into", "is", "la", "le", "les", "of", "on", "or",
+    "the", "to", "un", "une", "with",
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _fold(text: str) -> str:
+    """NFKC + casefold; accents are stripped from Latin letters only (Japanese dakuten etc. are kept)"""
+    folded = []
+    for char in unicodedata.normalize("NFKC", text).casefold():
+        base = unicodedata.normalize("NFD", char)
+        folded.append(base[0] if base[0] < "\u0250" else char)
+    return "".join(folded)
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Casefold, strip Latin accents and punctuation, drop stopwords and plural 's'.
+
+    Tokens are Unicode words, so CJK, Cyrillic or Greek topics keep their
+    text; a topic made only of stopwords and punctuation falls back to its
+    casefolded form. Empty only for a blank topic.
+    """
+    normalized = []
+    for token in re.findall(r"[^\W_]+", _fold(topic)):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        normalized.append(token)
+    return " ".join(normalized) or " ".join(topic.casefold().split())
+
+
+def distinguishing_tokens(normalized: str) -> Set[str]:
+    """Tokens a near-duplicate must share exactly: numbers, versions, acronyms (3 characters or less)"""
+    return {token for token in normalized.split() if len(token) <= 3 or any(c.isdigit() for c in token)}
+
+
+def shingles(text: str, size: int = 4) -> Set[str]:
+    """Character shingles of the space-joined sorted tokens (order insensitive)"""
+    canonical = " ".join(sorted(text.split()))
+    if len(canonical) <= size:
+        return {canonical}
+    return {canonical[i:i + size] for i in range(len(canonical) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with a fixed, process-independent set of permutations"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: Iterable[str]) -> List[int]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+            for item in items
+        ]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._params
+        ]
+
+    @staticmethod
+    def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """Estimated Jaccard similarity of the two shingle sets"""
+        if len(sig_a) != len(sig_b) or not sig_a:
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def file_digest(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheHit:
+    """A completed result served from the cache"""
+    run_id: str
+    topic: str           # topic of the run that produced the result
+    report: str
+    similarity: float    # 1.0 for exact key matches
+    exact: bool
+    created_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+
+class ResultCache:
+    """SQLite-backed index of completed runs, resolved through a ReportStore"""
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        store: ReportStore,
+        ttl_seconds: float = 72 * 3600,
+        similarity_threshold: float = 0.8,
+        num_perm: int = 64,
+    ):
+        self.db_path = Path(db_path)
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    normalized TEXT NOT NULL,
+                    pdf_key TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    run_id TEXT NOT NULL,
+                    artifact TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results_pdf ON results (pdf_key, created_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def pdf_key(pdf_hashes: Iterable[str]) -> str:
+        """Order-insensitive key for a set of PDF hashes"""
+        return hashlib.sha256("|".join(sorted(set(pdf_hashes))).encode()).hexdigest()[:32]
+
+    def key(self, topic: str, pdf_hashes: Iterable[str] = ()) -> str:
+        """Exact cache key: normalized topic plus the PDF set (ValueError for a blank topic)"""
+        normalized = normalize_topic(topic)
+        if not normalized:
+            raise ValueError("Cannot build a cache key for a blank topic")
+        raw = f"{normalized}\n{self.pdf_key(pdf_hashes)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _signature(self, normalized: str) -> List[int]:
+        return self.hasher.signature(shingles(normalized))
+
+    def _resolve(self, row, similarity: float, exact: bool) -> Optional[CacheHit]:
+        key, topic, _normalized, _pdf_key, _signature, run_id, artifact, created_at = row
+        try:
+            report = self.store.read_text(run_id, artifact)
+        except (KeyError, ValueError):
+            # The report is gone from the store: the entry is stale
+            with self._connect() as conn:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            return None
+        return CacheHit(
+            run_id=run_id,
+            topic=topic,
+            report=report,
+            similarity=similarity,
+            exact=exact,
+            created_at=created_at,
+        )
+
+    def lookup(
+        self,
+        topic: str,
+        pdf_hashes: Iterable[str] = (),
+        max_age_seconds: Optional[float] = None,
+    ) -> Optional[CacheHit]:
+        """
+        Find a fresh completed result for a topic.
+
+        Args:
+            topic: Research topic as submitted
+            pdf_hashes: SHA-256 of the attached PDFs (see file_digest)
+            max_age_seconds: Freshness window, defaults to the cache TTL
+        """
+        pdf_hashes = list(pdf_hashes)
+        normalized = normalize_topic(topic)
+        if not normalized:
+            with self._lock:
+                self.misses += 1
+            return None
+        pdf_key = self.pdf_key(pdf_hashes)
+        oldest = time.time() - (self.ttl_seconds if max_age_seconds is None else max_age_seconds)
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM results WHERE key = ? AND created_at >= ?",
+                (self.key(topic, pdf_hashes), oldest),
+            ).fetchone()
+            candidates = [] if row else conn.execute(
+                "SELECT * FROM results WHERE pdf_key = ? AND created_at >= ? ORDER BY created_at DESC",
+                (pdf_key, oldest),
+            ).fetchall()
+
+        if row:
+            hit = self._resolve(row, 1.0, exact=True)
+            if hit:
+                with self._lock:
+                    self.hits += 1
+                return hit
+
+        signature = self._signature(normalized)
+        required = distinguishing_tokens(normalized)
+        best_row, best_similarity = None, 0.0
+        for candidate in candidates:
+            # Shingles barely see "GPT-4" vs "GPT-5": those tokens must be identical
+            if distinguishing_tokens(candidate[2]) != required:
+                continue
+            similarity = MinHasher.similarity(signature, array("Q", candidate[4]).tolist())
+            if similarity > best_similarity:
+                best_row, best_similarity = candidate, similarity
+
+        if best_row is not None and best_similarity >= self.similarity_threshold:
+            hit = self._resolve(best_row, best_similarity, exact=False)
+            if hit:
+                with self._lock:
+                    self.hits += 1
+                    self.near_hits += 1
+                return hit
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(
+        self,
+        topic: str,
+        run_id: str,
+        pdf_hashes: Iterable[str] = (),
+        artifact: str = "synthesis_report.md",
+    ) -> Optional[str]:
+        """Record that `run_id` produced a completed result for this topic (not for a blank topic)"""
+        pdf_hashes = list(pdf_hashes)
+        normalized = normalize_topic(topic)
+        if not normalized:
+            return None
+        key = self.key(topic, pdf_hashes)
+        signature = array("Q", self._signature(normalized)).tobytes()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, topic, normalized, self.pdf_key(pdf_hashes), signature,
+                 run_id, artifact, time.time()),
+            )
+        return key
+
+    def purge_expired(self) -> int:
+        """Delete entries older than the TTL, returns the number removed"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_duplicate_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Default cache for the CLI, next to the default report store.
+
+    FIRSTONE_RESULT_CACHE sets the database path, FIRSTONE_RESULT_CACHE_TTL_HOURS
+    the freshness window.
+    """
+    global _default_cache
+    if _default_cache is None:
+        store = get_report_store()
+        _default_cache = ResultCache(
+            os.getenv("FIRSTONE_RESULT_CACHE", str(store.root / "result_cache.sqlite3")),
+            store=store,
+            ttl_seconds=float(os.getenv("FIRSTONE_RESULT_CACHE_TTL_HOURS", "72")) * 3600,
+        )
+    return _default_cache
@@ -0,0 +1,310 @@
+"""
+Pipelined review: papers are reviewed while the researcher is still searching.
+
+In the default flow the reviewer only starts once the researcher has written
+its whole 5-7 paper report. In pipelined mode the researcher submits each
+paper with the Submit Paper tool as soon as it has its details, and every
+submission is checked (required fields, text lengths) and then reviewed by
+the reviewer agent on its own, on a worker thread, while the researcher goes
+on searching. A rejected paper triggers a targeted follow-up search with the
+researcher's catalog and arXiv tools (the topic plus the rejected paper's
+title terms, papers already submitted left out); the verdicts and the
+candidates found come back to the researcher in its next Submit Paper
+observation, so it can replace the paper within the same attempt.
+
+When the research crew is done the flow drains the pipeline (only the last
+reviews are still running): the accepted papers become the run's papers and
+the attempt is approved when at least `MIN_ACCEPTED` were accepted, without
+the separate whole-report review.
+
+Opt-in: FIRSTONE_PIPELINED_REVIEW=1, or per run.
+"""
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, ConfigDict
+
+from firstone import papers
+from firstone.crew import Firstone, PaperRecord
+from firstone.flow_hooks import crew_kickoff
+from firstone.metrics import PIPELINE_PAPERS
+from firstone.paper_catalog import paper_key
+from firstone.result_cache import STOPWORDS
+from firstone.tools.arxiv_tool import ARXIV_TOOL_NAME
+from firstone.tools.catalog_tool import CATALOG_TOOL_NAME
+
+MIN_ACCEPTED = 5
+MIN_ABSTRACT_WORDS = 30
+MIN_EXPLANATION_WORDS = 20
+FOLLOWUP_CHARS = 1500
+# Title terms added to the topic in a follow-up search
+FOLLOWUP_TERMS = 4
+
+SUBMIT_TOOL_NAME = "Submit Paper"
+
+# Rejection reasons meaning the paper is off-topic
+_OFF_TOPIC = re.compile(r"relevan|off[- ]topic|unrelated|not related|outside the (topic|scope)", re.IGNORECASE)
+
+# Appended to the research task in pipelined mode (no braces: it is interpolated)
+RESEARCH_INSTRUCTIONS = f"""
+
+PIPELINED REVIEW: as soon as you have gathered the details of a paper, submit it with
+the {SUBMIT_TOOL_NAME} tool (one call per paper, all the record fields). Papers are
+reviewed while you keep searching. Each {SUBMIT_TOOL_NAME} answer reports the verdicts
+of earlier papers, with replacement candidates for rejected ones: replace every
+rejected paper until {MIN_ACCEPTED} papers are accepted. Your final answer must still
+list all the papers you kept.
+"""
+
+_default_enabled = os.getenv("FIRSTONE_PIPELINED_REVIEW", "").lower() in ("1", "true", "yes", "on")
+
+
+def set_default_enabled(enabled: bool) -> None:
+    """Turn pipelined review on or off for runs that don't choose"""
+    global _default_enabled
+    _default_enabled = enabled
+
+
+def enabled(requested: Optional[bool] = None) -> bool:
+    return _default_enabled if requested is None else requested
+
+
+@dataclass
+class PaperVerdict:
+    """Outcome of one submitted paper"""
+    index: int
+    title: str
+    accepted: bool
+    reason: str = ""
+    followup: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def check_paper(paper: PaperRecord) -> List[str]:
+    """Problems found without an LLM (missing fields, texts too short)"""
+    problems = []
+    if not (paper.link or paper.source):
+        problems.append("no link or source")
+    if len(paper.abstract.split()) < MIN_ABSTRACT_WORDS:
+        problems.append(f"abstract under {MIN_ABSTRACT_WORDS} words")
+    for name in ("methodology", "findings"):
+        if len(getattr(paper, name).split()) < MIN_EXPLANATION_WORDS:
+            problems.append(f"{name} under {MIN_EXPLANATION_WORDS} words")
+    return problems
+
+
+def review_paper(topic: str, paper: PaperRecord) -> Tuple[bool, str]:
+    """Review one paper with the reviewer agent, returns (accepted, reason)"""
+    from crewai import Crew, Process, Task
+
+    task = Task(
+        description=f"""
+Review this single research paper, found for a report about {topic}.
+{papers.REVIEW_NOTE}
+
+{papers.for_review([paper])}
+
+Accept it (valid: true) if it is relevant to the topic, comes from a credible source
+and its methodology and findings are described clearly enough for a synthesis.
+Otherwise reject it (valid: false) and give the main reason in one sentence as feedback.
+""",
+        expected_output=Firstone().tasks_config['review_task']['expected_output'],
+        agent=Firstone().reviewer(),
+        output_pydantic=Firstone.ResearchVerification,
+    )
+    crew = Crew(agents=[task.agent], tasks=[task], process=Process.sequential, verbose=False)
+    with crew_kickoff("reviewer"):
+        result = crew.kickoff(inputs={"topic": topic})
+    verdict = result.pydantic
+    if verdict is None:
+        return False, "review could not be parsed"
+    return verdict.valid, verdict.feedback or ""
+
+
+def followup_query(topic: str, paper: PaperRecord, reason: str) -> str:
+    """
+    Search query for replacements of a rejected paper: the topic plus the
+    paper's own title terms, unless it was rejected as off-topic (its terms
+    would only find more of the same).
+    """
+    if _OFF_TOPIC.search(reason):
+        return topic
+    known = set(re.findall(r"\w+", topic.lower())) | STOPWORDS
+    terms = [t for t in re.findall(r"\w+", paper.title.lower()) if len(t) > 2 and t not in known]
+    return " ".join([topic, *list(dict.fromkeys(terms))[:FOLLOWUP_TERMS]])
+
+
+def _candidates(output: str, exclude: Set[str]) -> List[str]:
+    """Paper entries ("Title: ..." blocks) of a search tool's output, minus the `exclude` keys"""
+    entries = []
+    for block in output.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.strip().splitlines() if ": " in line)
+        if "Title" not in fields:
+            continue
+        source = fields.get("Source") or fields.get("ArXiv ID", "")
+        if paper_key(fields["Title"], source, fields.get("Link", "")) not in exclude:
+            entries.append(block.strip())
+    return entries
+
+
+def followup_search(topic: str, paper: PaperRecord, reason: str, exclude: Set[str] = frozenset()) -> str:
+    """
+    Replacement candidates for a rejected paper, from the researcher's own
+    tools, without the papers already submitted (`exclude`: their `paper_key`)
+    """
+    from firstone import crew as crew_module
+
+    # Same caches as the researcher: a search it already ran costs nothing
+    tools = {tool.name: crew_module._cached_tool(tool) for tool in crew_module.research_tools_factory()}
+    query = followup_query(topic, paper, reason)
+    found = []
+    for name in (CATALOG_TOOL_NAME, ARXIV_TOOL_NAME):
+        if name in tools:
+            try:
+                found.extend(_candidates(str(tools[name]._run(search_query=query, max_results=5)), exclude))
+            except Exception as e:
+                found.append(f"{name} failed: {e}")
+    if not found:
+        return f"No new candidates for '{query}'."
+    return "\n\n".join(found)[:FOLLOWUP_CHARS]
+
+
+class ReviewPipeline:
+    """Reviews submitted papers on worker threads while the research goes on"""
+
+    def __init__(
+        self,
+        topic: str,
+        review_fn: Callable[[str, PaperRecord], Tuple[bool, str]] = review_paper,
+        search_fn: Optional[Callable[[str, PaperRecord, str, Set[str]], str]] = followup_search,
+        on_verdict: Optional[Callable[[PaperVerdict], None]] = None,
+        workers: int = 2,
+        min_accepted: int = MIN_ACCEPTED,
+    ):
+        self.topic = topic
+        self.review_fn = review_fn
+        self.search_fn = search_fn
+        self.on_verdict = on_verdict
+        self.min_accepted = min_accepted
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="paper-review")
+        self._lock = threading.Lock()
+        self._submitted: Dict[str, Tuple[int, PaperRecord]] = {}
+        self._futures: List[Future] = []
+        self._verdicts: Dict[int, PaperVerdict] = {}
+        self._reported: set = set()
+
+    def submit(self, paper: PaperRecord) -> str:
+        """Queue a paper for review, returns the observation for the researcher"""
+        key = paper_key(paper.title, paper.source, paper.link)
+        with self._lock:
+            if key in self._submitted:
+                return f"'{paper.title}' was already submitted.\n" + self._news()
+            index = len(self._submitted) + 1
+            self._submitted[key] = (index, paper)
+            # Each review runs in its own copy of the run's context
+            self._futures.append(self._executor.submit(copy_context().run, self._review, index, paper))
+        PIPELINE_PAPERS.inc(outcome="submitted")
+        return f"Paper {index} '{paper.title}' queued for review.\n" + self._news()
+
+    def _review(self, index: int, paper: PaperRecord) -> PaperVerdict:
+        problems = check_paper(paper)
+        if problems:
+            accepted, reason = False, "; ".join(problems)
+        else:
+            try:
+                accepted, reason = self.review_fn(self.topic, paper)
+            except Exception as e:
+                accepted, reason = False, f"review failed: {e}"
+        followup = ""
+        if not accepted and self.search_fn:
+            with self._lock:
+                submitted = set(self._submitted)
+            followup = self.search_fn(self.topic, paper, reason, submitted)
+        verdict = PaperVerdict(index, paper.title, accepted, reason, followup)
+        with self._lock:
+            self._verdicts[index] = verdict
+        PIPELINE_PAPERS.inc(outcome="accepted" if accepted else "rejected")
+        if self.on_verdict:
+            self.on_verdict(verdict)
+        return verdict
+
+    def _news(self) -> str:
+        """Verdicts not yet reported to the researcher (called under the lock)"""
+        lines = []
+        for index in sorted(set(self._verdicts) - self._reported):
+            verdict = self._verdicts[index]
+            self._reported.add(index)
+            if verdict.accepted:
+                lines.append(f"ACCEPTED paper {index}: {verdict.title}")
+            else:
+                lines.append(f"REJECTED paper {index}: {verdict.title} ({verdict.reason}). Replace it.")
+                if verdict.followup:
+                    lines.append(f"Replacement candidates:\n{verdict.followup}")
+        accepted = sum(v.accepted for v in self._verdicts.values())
+        pending = len(self._submitted) - len(self._verdicts)
+        lines.append(f"Status: {accepted} accepted, {pending} under review, {self.min_accepted} needed.")
+        return "\n".join(lines)
+
+    def drain(self, papers_found: Optional[List[PaperRecord]] = None, timeout: Optional[float] = None) -> List[PaperVerdict]:
+        """
+        Wait for the outstanding reviews, after queuing the papers of the
+        final answer that were never submitted. Returns every verdict.
+        """
+        for paper in papers_found or []:
+            if paper_key(paper.title, paper.source, paper.link) not in self._submitted:
+                self.submit(paper)
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+        self._executor.shutdown(wait=False)
+        with self._lock:
+            return [self._verdicts[i] for i in sorted(self._verdicts)]
+
+    def accepted(self) -> List[PaperRecord]:
+        with self._lock:
+            by_index = {index: paper for index, paper in self._submitted.values()}
+            return [by_index[i] for i in sorted(self._verdicts) if self._verdicts[i].accepted]
+
+    def tool(self) -> BaseTool:
+        return SubmitPaperTool(pipeline=self)
+
+    def attach(self, task) -> None:
+        """Give a research task the Submit Paper tool and the instructions to use it"""
+        task.description += RESEARCH_INSTRUCTIONS
+        task.tools = [*(task.tools or task.agent.tools or []), self.tool()]
+
+
+def outcome(verdicts: List[Dict[str, Any]], min_accepted: int = MIN_ACCEPTED) -> Tuple[bool, Optional[str]]:
+    """(valid, feedback) of an attempt from its paper verdicts"""
+    accepted = sum(1 for v in verdicts if v["accepted"])
+    if accepted >= min_accepted:
+        return True, None
+    rejected = [f"- Paper '{v['title']}' was rejected: {v['reason']}" for v in verdicts if not v["accepted"]]
+    return False, (
+        f"Only {accepted} paper(s) accepted, at least {min_accepted} needed.\n" + "\n".join(rejected)
+    )
+
+
+class SubmitPaperTool(BaseTool):
+    """Hands one paper record to the run's review pipeline"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = SUBMIT_TOOL_NAME
+    description: str = (
+        "Submit one paper you found, with all its record fields, for review. Reviews run while "
+        "you keep searching; the answer reports the verdicts of earlier papers and replacement "
+        "candidates for rejected ones."
+    )
+    args_schema: Type[BaseModel] = PaperRecord
+    pipeline: Any = None
+
+    def _run(self, **fields: Any) -> str:
+        return self.pipeline.submit(PaperRecord(**fields))
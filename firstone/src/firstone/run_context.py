@@ -0,0 +1,105 @@
+"""
+Per-run accounting shared by the LLM and tool wrappers.
+
+A run scope is bound to the current context while a ResearchFlow executes;
+anything called from inside the flow (crews, LLM calls, tools) can find the
+run it belongs to through `current_run()` without the run ID being threaded
+through crewAI.
+
+Token usage reported by the LLM layer is summed per run, and a run can carry
+a token budget (``FIRSTONE_RUN_TOKEN_BUDGET`` by default, 0 for none) that
+the flows consult before spending more (see firstone.budget).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterator, Optional
+
+
+@dataclass
+class RunStats:
+    """Counters collected for one research run"""
+    run_id: str
+    started_at: float = field(default_factory=time.time)
+    llm_calls: int = 0
+    llm_errors: int = 0
+    rate_limited: int = 0
+    tool_calls: int = 0
+    tool_cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    token_budget: int = 0  # 0: unlimited
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **counts: int) -> None:
+        """Increment counters, e.g. ``stats.add(llm_calls=1)``"""
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def tokens_remaining(self) -> Optional[int]:
+        """Tokens left in the run's budget (None when unlimited)"""
+        if not self.token_budget:
+            return None
+        return max(self.token_budget - self.total_tokens, 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        # asdict() would deep-copy the lock
+        data = {f.name: getattr(self, f.name) for f in fields(self) if not f.name.startswith("_")}
+        data["total_tokens"] = self.total_tokens
+        data["tokens_remaining"] = self.tokens_remaining
+        return data
+
+
+_current_run: ContextVar[Optional[RunStats]] = ContextVar("firstone_current_run", default=None)
+
+# Recently seen runs, so callers can read the stats after the flow finished
+_MAX_RUNS = 512
+_runs: "OrderedDict[str, RunStats]" = OrderedDict()
+_runs_lock = threading.Lock()
+
+# Budget given to runs that don't set their own (0: unlimited)
+_default_token_budget = int(os.getenv("FIRSTONE_RUN_TOKEN_BUDGET", "0"))
+
+
+def set_default_token_budget(tokens: int) -> None:
+    global _default_token_budget
+    _default_token_budget = max(int(tokens), 0)
+
+
+def get_run_stats(run_id: str) -> Optional[RunStats]:
+    with _runs_lock:
+        return _runs.get(run_id)
+
+
+def current_run() -> Optional[RunStats]:
+    """Stats of the run executing in this context, if any"""
+    return _current_run.get()
+
+
+@contextmanager
+def run_scope(run_id: str, token_budget: Optional[int] = None) -> Iterator[RunStats]:
+    """Bind `run_id` to the current context for the duration of the block"""
+    with _runs_lock:
+        stats = _runs.get(run_id)
+        if stats is None:
+            budget = _default_token_budget if token_budget is None else token_budget
+            stats = _runs[run_id] = RunStats(run_id=run_id, token_budget=budget)
+            while len(_runs) > _MAX_RUNS:
+                _runs.popitem(last=False)
+        elif token_budget is not None:
+            stats.token_budget = token_budget
+    token = _current_run.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_run.reset(token)
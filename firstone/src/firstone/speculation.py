@@ -0,0 +1,126 @@
+"""
+Speculative synthesis: start the synthesizer while the reviewer is working.
+
+Most runs are approved on their first review, yet the synthesis only started
+once the review was over. With speculation on, the flows start the synthesis
+crew on the research under review in a background thread, in the run's own
+context (token accounting, traces and cassette are the run's). If the
+reviewer approves, the synthesis step takes the speculative report instead
+of starting over, which saves about the length of the review; if it rejects,
+the speculation is cancelled: LLM calls not yet sent are not sent
+(ManagedLLM checks `raise_if_cancelled`), one already in flight is discarded.
+
+Speculation is opt-in (FIRSTONE_SPECULATIVE_SYNTHESIS=1, or per run) and is
+skipped for runs with a token budget, since rejected runs spend the tokens
+of a synthesis they never use.
+"""
+import os
+import threading
+from concurrent.futures import Future
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Optional
+
+from firstone.metrics import FLOW_SPECULATIONS
+from firstone.run_context import current_run
+from firstone.tracing import span
+
+_cancel_event: ContextVar[Optional[Any]] = ContextVar("firstone_speculation_cancel", default=None)
+
+_default_enabled = os.getenv("FIRSTONE_SPECULATIVE_SYNTHESIS", "").lower() in ("1", "true", "yes", "on")
+
+
+class SpeculationCancelled(Exception):
+    """Raised inside a cancelled speculation before its next LLM call"""
+
+
+def raise_if_cancelled() -> None:
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise SpeculationCancelled("speculative work cancelled")
+
+
+class _LinkedEvent:
+    """Cancellation that also follows the enclosing scope's (e.g. a speculation)"""
+
+    def __init__(self, event: threading.Event, parent: Optional[Any]):
+        self.event = event
+        self.parent = parent
+
+    def is_set(self) -> bool:
+        return self.event.is_set() or (self.parent is not None and self.parent.is_set())
+
+
+def run_cancellable(event: threading.Event, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run `fn`; once `event` is set, `raise_if_cancelled` stops it (used by LLM hedging)"""
+    token = _cancel_event.set(_LinkedEvent(event, _cancel_event.get()))
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _cancel_event.reset(token)
+
+
+def set_default_enabled(enabled: bool) -> None:
+    """Turn speculation on or off for runs that don't choose"""
+    global _default_enabled
+    _default_enabled = enabled
+
+
+def enabled(requested: Optional[bool] = None) -> bool:
+    """Whether the current run should speculate (`requested` None: process default)"""
+    if not (_default_enabled if requested is None else requested):
+        return False
+    run = current_run()
+    return run is None or not run.token_budget
+
+
+class Speculation:
+    """Work started ahead of a decision, kept only if its inputs still hold"""
+
+    def __init__(self, name: str, key: Any):
+        self.name = name
+        self.key = key
+        self.future: Future = Future()
+        self._cancel = threading.Event()
+
+    @classmethod
+    def start(cls, name: str, fn: Callable[[], Any], key: Any = None) -> "Speculation":
+        """Run `fn` in a background thread, in a copy of the caller's context"""
+        speculation = cls(name, key)
+        context = copy_context()
+        threading.Thread(
+            target=context.run, args=(speculation._run, fn),
+            name=f"speculative-{name}", daemon=True,
+        ).start()
+        return speculation
+
+    def _run(self, fn: Callable[[], Any]) -> None:
+        _cancel_event.set(self._cancel)
+        try:
+            with span("speculation", step=self.name):
+                result = fn()
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+    def take(self, key: Any = None) -> Optional[Any]:
+        """
+        The speculative result if it was computed from `key`, else None
+        (the caller then does the work itself). Waits for it if needed.
+        """
+        if key != self.key:
+            self.cancel(outcome="stale")
+            return None
+        try:
+            result = self.future.result()
+        except Exception as e:
+            print(f"⚠️  Speculative {self.name} failed, running it again: {e}")
+            FLOW_SPECULATIONS.inc(name=self.name, outcome="failed")
+            return None
+        FLOW_SPECULATIONS.inc(name=self.name, outcome="used")
+        return result
+
+    def cancel(self, outcome: str = "cancelled") -> None:
+        """Drop the speculation: stop before its next LLM call, discard its result"""
+        self._cancel.set()
+        FLOW_SPECULATIONS.inc(name=self.name, outcome=outcome)
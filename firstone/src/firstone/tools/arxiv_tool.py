@@ -0,0 +1,71 @@
+"""
+ArXiv tool backed by the shared batched client (see firstone.arxiv_client).
+
+Same name and search arguments as crewAI's ArxivPaperTool, so prompts,
+cassettes and the offline stand-ins keep working, plus ``arxiv_ids`` to
+fetch several known papers in one request instead of one call per paper.
+Every entry returned is added to the local paper catalog.
+"""
+from typing import List, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from firstone.arxiv_client import ArxivEntry, get_arxiv_client
+from firstone.paper_catalog import get_paper_catalog
+
+ARXIV_TOOL_NAME = "Arxiv Paper Fetcher and Downloader"
+SUMMARY_LENGTH = 600
+
+
+class ArxivSearchInput(BaseModel):
+    search_query: str = Field("", description="Search query for Arxiv, e.g., 'transformer neural network'")
+    max_results: int = Field(5, ge=1, le=100, description="Max results to fetch; must be between 1 and 100")
+    arxiv_ids: List[str] = Field(
+        default_factory=list,
+        description="ArXiv IDs (e.g. ['2301.12345', '2305.00001']) to fetch together instead of searching",
+    )
+
+
+class ArxivSearchTool(BaseTool):
+    """Searches arXiv or fetches papers by ID through the shared client"""
+    name: str = ARXIV_TOOL_NAME
+    description: str = (
+        "Fetches paper metadata (title, authors, date, abstract, links) from Arxiv, either by "
+        "search query or for a list of ArXiv IDs. To look up several known papers, pass all "
+        "their IDs in one call."
+    )
+    args_schema: Type[BaseModel] = ArxivSearchInput
+
+    def _run(self, search_query: str = "", max_results: int = 5, arxiv_ids: List[str] = None) -> str:
+        client = get_arxiv_client()
+        try:
+            if arxiv_ids:
+                entries = list(client.fetch(arxiv_ids).values())
+            elif search_query.strip():
+                entries = client.search(search_query, max_results=max_results)
+            else:
+                return "Provide a search_query or a list of arxiv_ids."
+        except Exception as e:
+            return f"Failed to fetch Arxiv papers: {e}"
+        if not entries:
+            return "No Arxiv papers found."
+        catalog = get_paper_catalog()
+        if catalog:
+            catalog.add_rows(entry.catalog_row() for entry in entries)
+        return "\n\n" + "\n\n".join(self._format(entry) for entry in entries)
+
+    @staticmethod
+    def _format(entry: ArxivEntry) -> str:
+        summary = entry.summary
+        if len(summary) > SUMMARY_LENGTH:
+            summary = summary[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "..."
+        return (
+            f"Title: {entry.title}\n"
+            f"Authors: {', '.join(entry.authors)}\n"
+            f"Published: {entry.published}\n"
+            f"ArXiv ID: {entry.arxiv_id}\n"
+            f"Link: {entry.link or f'https://arxiv.org/abs/{entry.arxiv_id}'}\n"
+            f"PDF: {entry.pdf_url or 'N/A'}\n"
+            f"Summary: {summary}"
+        )
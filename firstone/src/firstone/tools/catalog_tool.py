@@ -0,0 +1,45 @@
+"""
+Local Paper Catalog tool: full-text search of papers collected by earlier runs
+and imported arXiv dumps (see firstone.paper_catalog)
+"""
+from typing import Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from firstone.paper_catalog import get_paper_catalog
+
+CATALOG_TOOL_NAME = "Local Paper Catalog Search"
+
+
+class CatalogSearchInput(BaseModel):
+    search_query: str = Field(..., description="Keywords describing the papers you are looking for")
+    max_results: int = Field(8, ge=1, le=25, description="Max papers to return; between 1 and 25")
+
+
+class CatalogSearchTool(BaseTool):
+    """Searches the local catalog; tells the agent to go external when it has nothing"""
+    name: str = CATALOG_TOOL_NAME
+    description: str = (
+        "Searches the local catalog of academic papers (titles, authors, abstracts, links) "
+        "collected by previous research runs and from arXiv dumps. Instant and free: use it "
+        "FIRST, and only use ArXiv or web search for what it does not cover."
+    )
+    args_schema: Type[BaseModel] = CatalogSearchInput
+
+    def _run(self, search_query: str, max_results: int = 8) -> str:
+        catalog = get_paper_catalog()
+        hits = catalog.search(search_query, limit=max_results) if catalog else []
+        if not hits:
+            return (
+                f"No papers found in the local catalog for '{search_query}'. "
+                f"Use the ArXiv tool (then web search) to find papers."
+            )
+        entries = []
+        for hit in hits:
+            abstract = hit.abstract if len(hit.abstract) <= 800 else hit.abstract[:800].rsplit(" ", 1)[0] + "…"
+            entries.append(
+                f"Title: {hit.title}\nAuthors: {hit.authors}\nYear: {hit.year or ''}\n"
+                f"Source: {hit.source}\nLink: {hit.link}\nAbstract: {abstract}"
+            )
+        return f"{len(hits)} paper(s) from the local catalog:\n\n" + "\n\n".join(entries)
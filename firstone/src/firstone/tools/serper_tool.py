@@ -0,0 +1,43 @@
+"""
+Serper web search over the shared HTTP pool (see firstone.http_pool).
+
+SerperDevTool posts every search with a new ``requests`` connection, hence a
+new TLS handshake per call. This subclass keeps its arguments, parsing and
+output and only sends the request through the process-wide pool.
+"""
+import logging
+import os
+from typing import Any, Dict
+
+import httpx
+from crewai_tools import SerperDevTool
+
+from firstone.http_pool import get_http_pool
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSerperTool(SerperDevTool):
+    """SerperDevTool whose requests reuse the pool's keep-alive connections"""
+
+    def _make_api_request(self, search_query: str, search_type: str) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"q": search_query, "num": self.n_results}
+        if self.country:
+            payload["gl"] = self.country
+        if self.location:
+            payload["location"] = self.location
+        if self.locale:
+            payload["hl"] = self.locale
+        headers = {"X-API-KEY": os.environ["SERPER_API_KEY"], "content-type": "application/json"}
+        try:
+            response = get_http_pool().request(
+                "POST", self._get_search_url(search_type), headers=headers, json=payload,
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.error(f"Error making request to Serper API: {e}")
+            raise
+        results = response.json()
+        if not results:
+            raise ValueError("Empty response from Serper API")
+        return results
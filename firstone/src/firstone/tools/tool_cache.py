@@ -0,0 +1,134 @@
+"""
+Process-wide cache for tool results.
+
+crewAI's ``cache=True`` keeps one cache per crew, and the flows build a new
+crew on every iteration, so identical arXiv/Serper lookups are repeated across
+iterations and across concurrent runs. `CachedTool` wraps any crewAI tool
+with a cache shared by the whole process.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from crewai.tools import BaseTool
+from pydantic import ConfigDict
+
+from firstone.cassette import active_cassette
+from firstone.metrics import TOOL_CALL_DURATION, TOOL_CALLS
+from firstone.run_context import current_run
+from firstone.tracing import span
+
+
+class ToolCache:
+    """Thread-safe LRU cache with expiry, keyed by tool name and arguments"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 6 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(tool_name: str, arguments: Dict[str, Any]) -> str:
+        return f"{tool_name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedTool(BaseTool):
+    """Wraps a crewAI tool so its results go through a shared ToolCache"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseTool
+    cache: ToolCache
+
+    def _run(self, **kwargs: Any) -> Any:
+        run = current_run()
+        if run:
+            run.add(tool_calls=1)
+
+        with span("tool.call", tool=self.inner.name) as tool_span:
+            cassette = active_cassette()
+            if cassette and cassette.replaying:
+                tool_span.set_attribute("replayed", True)
+                return cassette.replay_tool(self.inner.name, kwargs)
+
+            key = self.cache.key(self.inner.name, kwargs)
+            found, value = self.cache.get(key)
+            tool_span.set_attribute("cache_hit", found)
+            if found:
+                TOOL_CALLS.inc(tool=self.inner.name, cache="hit")
+                if run:
+                    run.add(tool_cache_hits=1)
+                if cassette and cassette.recording:
+                    cassette.record_tool(self.inner.name, kwargs, value)
+                return value
+
+            TOOL_CALLS.inc(tool=self.inner.name, cache="miss")
+            with TOOL_CALL_DURATION.time(tool=self.inner.name):
+                # Call the wrapped implementation directly: run() would log the tool twice
+                result = self.inner._run(**kwargs)
+                if asyncio.iscoroutine(result):
+                    result = asyncio.run(result)
+            # Tools report failures as strings; don't pin them in the cache
+            if not (isinstance(result, str) and result.startswith("Error")):
+                self.cache.put(key, result)
+            if cassette and cassette.recording:
+                cassette.record_tool(self.inner.name, kwargs, result)
+            return result
+
+
+def _plain_description(tool: BaseTool) -> str:
+    """Strip the header crewAI prepends so it isn't added twice"""
+    return tool.description.split("Tool Description: ", 1)[-1]
+
+
+def cached(tool: BaseTool, cache: Optional[ToolCache] = None) -> CachedTool:
+    """Wrap `tool` with the shared (or given) cache"""
+    if isinstance(tool, CachedTool):
+        return tool
+    return CachedTool(
+        name=tool.name,
+        description=_plain_description(tool),
+        args_schema=tool.args_schema,
+        inner=tool,
+        cache=cache or shared_tool_cache,
+    )
+
+
+shared_tool_cache = ToolCache(
+    ttl_seconds=float(os.getenv("FIRSTONE_TOOL_CACHE_TTL", str(6 * 3600)))
+)
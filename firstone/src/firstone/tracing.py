@@ -0,0 +1,237 @@
+"""
+Span tracing for research runs.
+
+Spans nest through a context variable, so a flow step, the crew kickoff it
+starts, the LLM calls and tool calls made by the agents all end up in one
+tree. The trace ID of a run is its run ID; spans are kept in memory per run
+and, when an exporter is configured, written to ``<run_id>.jsonl`` (one span
+per line) or ``<run_id>.otlp.json`` (OTLP/JSON file format) once the run's
+root span ends.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from firstone.run_context import current_run
+
+EXPORT_FORMATS = ("jsonl", "otlp")
+
+
+@dataclass
+class Span:
+    """One timed operation of a run"""
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["duration_ms"] = self.duration_ms
+        return data
+
+
+class _NoopSpan:
+    """Returned outside of any run so callers never have to check"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("firstone_current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str = "firstone") -> Dict[str, Any]:
+    """OTLP/JSON ``TracesData`` document for the spans of one trace"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": service_name}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "firstone.tracing"},
+                "spans": [
+                    {
+                        # OTLP wants 16-byte trace IDs and 8-byte span IDs, hex encoded
+                        "traceId": span.trace_id.replace("-", "")[:32].rjust(32, "0"),
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                        "attributes": [
+                            {"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()
+                        ],
+                        "status": {"code": 2, "message": span.error or ""}
+                        if span.status == "error" else {"code": 1},
+                    }
+                    for span in spans
+                ],
+            }],
+        }],
+    }
+
+
+class Tracer:
+    """Collects spans per run and exports finished traces"""
+
+    def __init__(self, max_traces: int = 256, max_spans_per_trace: int = 10000,
+                 export_format: str = "", export_dir: str = "output/traces"):
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.export_format = ""
+        self.export_dir = Path(export_dir)
+        self.configure(export_format, export_dir)
+
+    def configure(self, export_format: str = "", export_dir: Optional[str] = None) -> None:
+        """Select the exporter ("", "jsonl" or "otlp") and where files go"""
+        export_format = (export_format or "").lower()
+        if export_format and export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown trace export format {export_format!r}, expected one of {EXPORT_FORMATS}")
+        self.export_format = export_format
+        if export_dir is not None:
+            self.export_dir = Path(export_dir)
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            if len(spans) < self.max_spans_per_trace:
+                spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Any]:
+        """Open a child of the current span (or a root span of the current run)"""
+        parent = _current_span.get()
+        if trace_id is None:
+            if parent is not None:
+                trace_id = parent.trace_id
+            else:
+                run = current_run()
+                trace_id = run.run_id if run else None
+        if trace_id is None:
+            yield _NOOP_SPAN
+            return
+
+        span = Span(
+            trace_id=trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent is not None and parent.trace_id == trace_id else None,
+            name=name,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes),
+        )
+        self._record(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            if span.parent_id is None and self.export_format:
+                self.export(trace_id)
+
+    def get_spans(self, trace_id: str) -> List[Span]:
+        """Spans of a run, from memory or from an exported JSONL file"""
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            if spans is not None:
+                return list(spans)
+        path = self.export_dir / f"{trace_id}.jsonl"
+        if path.is_file():
+            fields = Span.__dataclass_fields__
+            with open(path, "r", encoding="utf-8") as f:
+                return [
+                    Span(**{k: v for k, v in json.loads(line).items() if k in fields})
+                    for line in f if line.strip()
+                ]
+        return []
+
+    def trace_tree(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Root spans of a run with their ``children`` nested, in start order"""
+        nodes = {span.span_id: {**span.to_dict(), "children": []}
+                 for span in sorted(self.get_spans(trace_id), key=lambda s: s.start_ns)}
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node["parent_id"])
+            (parent["children"] if parent else roots).append(node)
+        return roots
+
+    def export(self, trace_id: str, export_format: Optional[str] = None) -> Optional[Path]:
+        """Write the spans of a run to the export directory"""
+        export_format = export_format or self.export_format
+        with self._lock:
+            spans = list(self._traces.get(trace_id, []))
+        if not spans or not export_format:
+            return None
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        if export_format == "otlp":
+            path = self.export_dir / f"{trace_id}.otlp.json"
+            content = json.dumps(to_otlp(spans), ensure_ascii=False)
+        else:
+            path = self.export_dir / f"{trace_id}.jsonl"
+            content = "".join(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in spans)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+# Process-wide tracer (FIRSTONE_TRACE_EXPORT=jsonl|otlp, FIRSTONE_TRACE_DIR)
+tracer = Tracer(
+    export_format=os.getenv("FIRSTONE_TRACE_EXPORT", ""),
+    export_dir=os.getenv("FIRSTONE_TRACE_DIR", "output/traces"),
+)
+
+
+def span(name: str, **attributes: Any):
+    """Shortcut for ``tracer.span(name, **attributes)``"""
+    return tracer.span(name, **attributes)
@@ -0,0 +1,61 @@
+import time
+
+from firstone import llm as llm_module
+from firstone.fakes import FakeLLM, LatencyModel
+from firstone.llm import ManagedLLM
+from firstone.model_routing import HedgePolicy, ModelHealth
+from firstone.rate_limit import RateLimiter
+from firstone.speculation import SpeculationCancelled, raise_if_cancelled
+
+MESSAGES = [{"role": "user", "content": "Summarize the papers."}]
+
+
+class SlowLLM(FakeLLM):
+    """Answers after its latency, noting whether its caller cancelled it meanwhile"""
+    cancelled = False
+
+    def call(self, messages, **kwargs):
+        answer = super().call(messages, **kwargs)
+        try:
+            raise_if_cancelled()
+        except SpeculationCancelled:
+            self.cancelled = True
+            raise
+        return answer
+
+
+def make_llm(monkeypatch, rate_limiter):
+    slow = SlowLLM(model="fake/slow", latency=LatencyModel(0.5, jitter=0.0))
+    fast = FakeLLM(model="fake/fast", latency=LatencyModel(0.02, jitter=0.0))
+    monkeypatch.setitem(llm_module._providers, "fake", lambda name, agent_name: fast)
+    health = ModelHealth()
+    for _ in range(20):
+        health.record("fake/slow", 0.05)
+    hedging = HedgePolicy(enabled=True, min_samples=20, min_delay=0.05)
+    managed = ManagedLLM(slow, "writer", rate_limiter=rate_limiter, fallbacks=["fake/fast"],
+                         health=health, hedging=hedging)
+    return managed, slow, fast, hedging
+
+
+def test_slow_call_is_hedged_and_the_original_cancelled(monkeypatch):
+    managed, slow, fast, hedging = make_llm(monkeypatch, RateLimiter(0))
+
+    started = time.perf_counter()
+    managed.call(MESSAGES)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.4
+    assert fast.calls == 1
+    assert hedging.stats()["hedged"] == 1 and hedging.stats()["won"] == 1
+    time.sleep(0.6)  # The original answers late, after its cancellation
+    assert slow.calls == 1 and slow.cancelled
+
+
+def test_no_hedge_without_a_free_rate_limiter_slot(monkeypatch):
+    managed, slow, fast, hedging = make_llm(monkeypatch, RateLimiter(1))
+
+    managed.call(MESSAGES)
+
+    assert fast.calls == 0
+    assert slow.calls == 1 and not slow.cancelled
+    assert hedging.stats()["hedged"] == 0
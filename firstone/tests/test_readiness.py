@@ -0,0 +1,42 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import health
+from app.services.readiness import ReadinessMonitor
+from app.services.warmup import Warmup
+
+
+def make_client(monkeypatch, interval):
+    monitor = ReadinessMonitor(interval=interval)
+    warmup = Warmup(modules=[])
+    monkeypatch.setattr(health, "readiness", monitor)
+    monkeypatch.setattr(health, "warmup", warmup)
+    app = FastAPI()
+    app.include_router(health.router)
+    return TestClient(app), monitor, warmup
+
+
+def test_disabled_probes_leave_readiness_to_warmup(monkeypatch):
+    client, monitor, warmup = make_client(monkeypatch, interval=0)
+    monitor.start()  # disabled: schedules nothing
+
+    assert client.get("/health/ready").status_code == 503  # flow not loaded yet
+
+    warmup.start()
+    warmup.join()
+
+    ready = client.get("/health/ready")
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "healthy"
+    assert client.get("/health").json()["status"] == "healthy"
+
+
+def test_enabled_probes_start_unready(monkeypatch):
+    client, monitor, warmup = make_client(monkeypatch, interval=30)
+    warmup.start()
+    warmup.join()
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
@@ -0,0 +1,41 @@
+from firstone.report_store import ReportStore
+from firstone.result_cache import ResultCache
+
+
+def make_cache(tmp_path):
+    store = ReportStore(tmp_path / "store")
+    return ResultCache(tmp_path / "cache.sqlite3", store=store, similarity_threshold=0.8), store
+
+
+def cache_run(cache, store, topic, run_id):
+    store.put(run_id, "synthesis_report.md", f"Report on {topic}")
+    cache.put(topic, run_id)
+
+
+def test_reordered_topic_is_a_near_duplicate(tmp_path):
+    cache, store = make_cache(tmp_path)
+    cache_run(cache, store, "LLM trends in 2025", "run-1")
+
+    hit = cache.lookup("the 2025 trends of LLMs")
+
+    assert hit is not None and hit.run_id == "run-1"
+
+
+def test_version_numbers_are_not_near_duplicates(tmp_path):
+    cache, store = make_cache(tmp_path)
+    for index, (cached, asked) in enumerate([
+        ("GPT-4 safety evaluation", "GPT-5 safety evaluation"),
+        ("Llama 2 fine-tuning", "Llama 3 fine-tuning"),
+    ]):
+        cache_run(cache, store, cached, f"run-{index}")
+
+        assert cache.lookup(asked) is None
+        assert cache.lookup(cached).run_id == f"run-{index}"
+
+
+def test_non_latin_topics_have_distinct_keys(tmp_path):
+    cache, store = make_cache(tmp_path)
+    cache_run(cache, store, "量子计算", "run-quantum")
+
+    assert cache.key("量子计算") != cache.key("深度学习")
+    assert cache.lookup("深度学习") is None